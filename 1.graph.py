@@ -1,58 +1,69 @@
-from typing import TypedDict, List
+import asyncio
+from typing import List
 from langgraph.graph import StateGraph
 from langchain_core.runnables import RunnableLambda # LCEL Runnable 사용 예시
 import operator # 상태 업데이트 예시 (리스트 추가 등)
+from vector_index import open_index, retrieval_node
+from embedding_cache import cached_embedder
+from map_reduce import MapReduceState, add_map_reduce
 
-# 1. 상태 정의
-class SearchSummarizeState(TypedDict):
-    query: str
-    documents: List[str]
-    summary: str
+# 검색 인덱스 (rag-index 디렉터리, 없으면 예시 문서로 생성)
+# 질문 임베딩은 embedding-cache 에 저장되어 같은 질문을 다시 하면 모델을 돌리지 않음
+index = open_index("rag-index", embed=cached_embedder())
+retrieve = retrieval_node(index, k=2) # 그래프를 구성하는 동안 인덱스를 백그라운드에서 로딩
+
+# 1. 상태 정의 (partials: 문서별 부분 요약, map-reduce 단계에서 채움)
+class SearchSummarizeState(MapReduceState):
+    pass
 
 # 2. 노드 정의 (Python 함수 사용)
 
 def search_documents(state: SearchSummarizeState) -> dict:
-    """주어진 쿼리로 문서를 검색하는 (가짜) 함수"""
+    """주어진 쿼리로 벡터 인덱스에서 문서를 검색하는 함수"""
     print(f"--- 노드: 검색 수행 ---")
-    query = state['query']
-    # 실제로는 여기서 검색 API 호출 등이 이루어집니다.
-    # 여기서는 간단하게 가짜 문서를 반환합니다.
-    documents = [
-        f"{query}에 대한 문서 1: LangGraph는 상태 관리에 유용합니다.",
-        f"{query}에 대한 문서 2: 노드와 엣지로 그래프를 정의합니다.",
-    ]
+    documents = retrieve(state)["documents"]
     print(f"검색된 문서: {documents}")
-    # 상태 업데이트: 'documents' 키에 검색 결과 저장
-    return {"documents": documents}
-
-def summarize_documents(state: SearchSummarizeState) -> dict:
-    """검색된 문서를 요약하는 (가짜) 함수"""
-    print(f"--- 노드: 요약 수행 ---")
-    documents = state['documents']
-    # 실제로는 여기서 LLM 요약 Chain을 호출합니다.
-    # 여기서는 간단하게 요약 결과를 생성합니다.
-    summary = f"'{state['query']}' 검색 결과 요약: " + " ".join(doc.split(': ')[1] for doc in documents)
-    print(f"생성된 요약: {summary}")
-    # 상태 업데이트: 'summary' 키에 요약 결과 저장
-    return {"summary": summary}
+    # 상태 업데이트: 'documents' 키에 검색 결과 저장 (지난 부분 요약은 비움)
+    return {"documents": documents, "partials": None}
+
+async def asearch_documents(state: SearchSummarizeState) -> dict:
+    """search_documents 의 비동기 버전 (ainvoke / astream 용). 인덱스 검색은 스레드에서 실행"""
+    documents = (await asyncio.to_thread(retrieve, state))["documents"]
+    return {"documents": documents, "partials": None}
+
+def summarize_texts(query: str, texts: List[str]) -> str:
+    """문서(또는 부분 요약) 목록을 요약하는 (가짜) 함수"""
+    # 실제로는 map_reduce.LLMSummarizer(ChatOpenAI(...), max_concurrency=8) 를 넘기면
+    # 문서마다 LLM 요약을 동시에 실행합니다.
+    # 여기서는 간단하게 각 문서의 앞부분을 이어 붙입니다.
+    return f"'{query}' 요약: " + " / ".join(text[:60] for text in texts)
 
 # 3. 그래프 빌더 생성 및 노드 추가
 workflow = StateGraph(SearchSummarizeState)
 
-workflow.add_node("searcher", search_documents)
-workflow.add_node("summarizer", summarize_documents)
+workflow.add_node("searcher", RunnableLambda(search_documents, afunc=asearch_documents))
+# 검색 후 문서마다 요약(map)하고 부분 요약을 8개씩 합침(reduce)
+summarizer = add_map_reduce(workflow, "searcher", summarize_texts, fanin=8)
 
 # 4. 엣지 및 진입점/종료점 설정
 workflow.set_entry_point("searcher") # 검색 노드에서 시작
-workflow.add_edge("searcher", "summarizer") # 검색 후 요약 노드로 이동
-workflow.set_finish_point("summarizer") # 요약 노드에서 종료 (명시적 지정)
+workflow.set_finish_point(summarizer) # 요약 노드에서 종료 (명시적 지정)
 
-# 5. 그래프 컴파일
-app = workflow.compile()
+# 5. 그래프 컴파일 (동시에 실행할 요약 태스크 수)
+app = workflow.compile().with_config(max_concurrency=8)
 
-# 6. 그래프 실행
+# 6. 그래프 실행: 부분 요약은 끝나는 대로 출력
 initial_state = {"query": "LangGraph란 무엇인가?", "documents": [], "summary": ""}
-final_state = app.invoke(initial_state)
+final_state = None
+for mode, chunk in app.stream(initial_state, stream_mode=["updates", "values"]):
+    if mode == "values":
+        final_state = chunk
+        continue
+    for node, value in chunk.items():
+        for partial in (value or {}).get("partials") or []:
+            print(f"부분 요약 (level {partial['level']}, #{partial['index']}): {partial['text']}")
+        if value and value.get("summary"):
+            print(f"생성된 요약: {value['summary']}")
 
 print("\n--- 최종 상태 ---")
 print(final_state)
\ No newline at end of file
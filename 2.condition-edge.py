@@ -2,7 +2,14 @@ from typing import TypedDict, List, Annotated, Sequence
 import operator
 from langchain_core.messages import BaseMessage, AIMessage, HumanMessage
 from langgraph.graph import StateGraph, END # END 임포트
-import matplotlib.pyplot as plt
+from vector_index import open_index
+from hybrid_retrieval import HybridRetriever
+from embedding_cache import cached_embedder
+
+# 검색 인덱스 (rag-index 디렉터리, 없으면 예시 문서로 생성) + BM25 를 합친 하이브리드 검색
+index = open_index("rag-index", embed=cached_embedder())
+index.load_async()
+retriever = HybridRetriever(index)
 
 # 1. 상태 정의 (문서 개수를 쉽게 확인하도록 documents 필드 유지)
 class ConditionalRAGState(TypedDict):
@@ -15,12 +22,12 @@ class ConditionalRAGState(TypedDict):
 def search_node(state: ConditionalRAGState) -> dict:
     print("--- 노드: 문서 검색 ---")
     query = state['query']
-    # 예시: 쿼리 길이에 따라 검색 결과 개수 조절 (실제로는 검색 결과에 따라 달라짐)
-    if len(query) < 10:
-        documents = ["짧은 쿼리에 대한 문서 1"]
-    else:
-        documents = ["긴 쿼리에 대한 문서 1", "긴 쿼리에 대한 문서 2", "긴 쿼리에 대한 문서 3"]
+    # 단어가 겹치지 않고 유사도도 낮은 문서는 버리므로 모호한 쿼리일수록 검색된 문서가 적음
+    timings = {}
+    results = retriever.search(query, k=3, min_score=0.4, timings=timings)
+    documents = [result["text"] for result in results]
     print(f"검색된 문서 개수: {len(documents)}")
+    print("검색 단계별 시간: " + ", ".join(f"{stage} {seconds * 1000:.1f}ms" for stage, seconds in timings.items()))
     return {"documents": documents}
 
 def generate_answer_node(state: ConditionalRAGState) -> dict:
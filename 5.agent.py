@@ -1,26 +1,31 @@
-from langchain_openai import ChatOpenAI
+from llm_clients import chat_model # base_url 별 공유 연결 풀
 from langchain_core.tools import tool
 from langchain_core.messages import HumanMessage, AIMessage # 상태 관리용
 from typing import TypedDict, Annotated, Sequence # 상태 정의용
 import operator
 import dotenv
-from langchain import hub # LangChain Hub에서 프롬프트 등을 가져오기 위함
+from hub_prompts import load_prompt # LangChain Hub 프롬프트 (prompts/ 에 저장된 사본)
 from langchain.agents import AgentExecutor, create_react_agent
 from langgraph.graph import MessagesState # 미리 정의된 상태 타입 활용 가능
+from tool_cache import cached_tool, casefold, canonical_expression, cache_stats, SqliteBackend
 
 
 dotenv.load_dotenv()
 
 # 1. LLM 준비 (도구 호출 기능 지원 모델)
 # !! OpenAI API Key 설정 필요 !!
-llm = ChatOpenAI(
+llm = chat_model(
     base_url="http://localhost:1234/v1",
     temperature=0.7, 
     model_name="l3-8b-stheno-v3.1-iq-imatrix"
 )
 
 # 2. Tools 정의
+# 같은 인자로 반복 호출되는 도구 결과는 캐시 (여러 워커가 tool-cache.db 를 함께 사용)
+tool_cache = SqliteBackend("tool-cache.db")
+
 @tool
+@cached_tool(ttl=600, normalize={"location": casefold}, backend=tool_cache) # 날씨는 10분간 재사용
 def get_current_weather(location: str) -> str:
     """주어진 위치의 현재 날씨를 가져옵니다."""
     # 실제 API 호출 대신 더미 데이터 반환
@@ -32,6 +37,7 @@ def get_current_weather(location: str) -> str:
         return f"{location}의 날씨 정보는 알 수 없습니다."
 
 @tool
+@cached_tool(ttl=24 * 3600, normalize={"expression": canonical_expression}, backend=tool_cache)
 def simple_calculator(expression: str) -> str:
     """간단한 수학 표현식을 계산합니다. 예: '2+2', '10*5'"""
     try:
@@ -43,8 +49,8 @@ def simple_calculator(expression: str) -> str:
 
 tools = [get_current_weather, simple_calculator]
 
-# prompt 정의
-prompt = hub.pull("hwchase17/react")
+# prompt 정의 (저장된 사본이 있으면 허브에 접속하지 않음)
+prompt = load_prompt("hwchase17/react")
 print(prompt)
 
 agent = create_react_agent(llm, tools, prompt)
@@ -58,6 +64,8 @@ for chunk in agent_executor.stream({"input": [input_message]}):
     print(chunk)
     print("---")
 
+print(cache_stats()) # 도구별 캐시 적중/미스
+
 # # 최종 결과만 확인
 # final_result = agent_executor.invoke({"input": [input_message]})
 
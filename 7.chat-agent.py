@@ -1,20 +1,29 @@
 from langchain_core.tools import tool
-from langchain_openai import ChatOpenAI
-
-from langgraph.prebuilt import ToolNode
+from tool_cache import cached_tool, casefold, cache_stats
+from lazy_imports import lazy_chat_openai, LazyObject
+from langchain_core.globals import set_llm_cache
+from llm_cache import ResponseCache
+
+from parallel_tool_node import ParallelToolNode
+from scheduler import Scheduler
+from context_window import ContextWindow
 from langgraph.graph import StateGraph, MessagesState, START, END
 
 from dotenv import load_dotenv
 
 load_dotenv()
 
-llm = ChatOpenAI(
+# 도구 결과(tool_cache)와 별개로 LLM 응답도 캐시 (bind_tools 한 도구 목록이 다르면 따로 저장됨)
+set_llm_cache(ResponseCache("llm-cache.db"))
+
+llm = lazy_chat_openai(
     base_url="http://localhost:1234/v1",
     model_name="l3-8b-stheno-v3.1-iq-imatrix"
 )
 
 
 @tool
+@cached_tool(ttl=600, normalize={"query": casefold}) # 같은 지역은 10분간 재사용
 def get_weather(query: str) -> list:
     """Search weatherapi to get the current weather"""
     print('>>>>>> get_weather <<<<<<<')
@@ -24,7 +33,12 @@ def get_weather(query: str) -> list:
     else:
         return "Weather Data Not Found"
 
+# 검색 API 는 초당 1회까지, 실패(429/503/시간 초과)하면 지터 백오프로 재시도 (캐시에 있으면 스케줄러를 거치지 않음)
+search_scheduler = Scheduler("search_web", max_concurrency=2, rate=1.0)
+
 @tool
+@cached_tool(ttl=3600, normalize={"query": casefold})
+@search_scheduler.wrap
 def search_web(query: str) -> list:
     """Search the web for a query"""
     results = "search results"
@@ -32,9 +46,13 @@ def search_web(query: str) -> list:
     return results
 
 tools = [search_web, get_weather]
-tool_node = ToolNode(tools)
+# 한 AIMessage 의 tool_calls 를 동시에 실행 (도구별 동시 실행 제한, 10초 타임아웃)
+tool_node = ParallelToolNode(tools, max_concurrency={"search_web": 2}, timeout=10)
 
-llm_with_tools = llm.bind_tools(tools)
+# bind_tools 도 첫 호출 때 (langchain_openai 를 불러온 뒤) 실행
+llm_with_tools = LazyObject(lambda: llm.bind_tools(tools))
+# 요약은 도구 없이 llm 으로, 도구 호출/결과 쌍은 나뉘지 않게 유지
+context = ContextWindow(llm, max_tokens=3000, keep_last=8)
 
 # res = llm_with_tools.invoke(
 #     [
@@ -49,7 +67,7 @@ def call_model(state: MessagesState):
     messages = state["messages"]
     print('>>>>>> call_model <<<<<<<')
     print(messages)
-    response = llm_with_tools.invoke(messages)
+    response = llm_with_tools.invoke(context.view(messages))
     print('>>>>>> response <<<<<<<')
     print(response)
     return {"messages": [response]}
@@ -90,3 +108,5 @@ print(' chat with web search tool--------------------------------')
 for chunk in agent.stream( {"messages": [("user", "what is Google?")]}, stream_mode="values",):
     chunk["messages"][-1].pretty_print()
 
+print(cache_stats()) # 도구별 캐시 적중/미스
+tool_node.close()
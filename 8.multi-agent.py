@@ -1,12 +1,22 @@
 from typing import TypedDict, Annotated, List, Optional, Sequence
+import asyncio
 import operator
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
 from langgraph.graph import StateGraph, END
-from langchain_openai import ChatOpenAI
+from langchain_core.runnables import RunnableConfig, RunnableLambda
+from langchain_core.globals import set_llm_cache
+from llm_cache import ResponseCache
+from micro_batch import MicroBatcher
+from context_window import ContextWindow
+from graph_registry import register, get_app, draw
+from lazy_imports import lazy_chat_openai
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# 대화 내용이 같으면 Supervisor 의 라우팅 결정도 같으므로 LLM 호출을 건너뜀
+set_llm_cache(ResponseCache("llm-cache.db"))
+
 # 각 Worker는 별도의 Runnable (Chain, AgentExecutor 등) 이라고 가정
 # from some_module import research_agent, code_writer_agent
 
@@ -37,58 +47,111 @@ worker_map = {
 }
 
 # 3. Supervisor 노드 정의
-supervisor_llm = ChatOpenAI(
+# langchain_openai 는 import 만 0.5초가량 걸리므로 Supervisor 가 처음 LLM 을 부를 때 불러옴
+# (llm_clients 레지스트리에서 만들므로 같은 서버를 쓰는 다른 모델과 연결 풀, 동시 요청 제한을 함께 씀)
+supervisor_llm = lazy_chat_openai(
     base_url="http://localhost:1234/v1",
     model_name="l3-8b-stheno-v3.1-iq-imatrix"
 )
+# 여러 세션이 동시에 라우팅을 요청하면 20ms 동안 모아서 한 번의 batch 호출로 보냄
+supervisor_router = MicroBatcher(supervisor_llm, window=0.02, max_batch=16)
+# 대화 전체 대신 최근 메시지 + 이전 내용 요약만 프롬프트에 넣어서 턴이 늘어도 프롬프트 길이를 고정
+supervisor_context = ContextWindow(supervisor_llm, max_tokens=1500, keep_last=6)
 
-def supervisor_node(state: SupervisorState) -> dict:
-    print("--- Supervisor: 다음 작업자 결정 ---")
-    messages = state['messages']
+def supervisor_prompt(messages) -> str:
     # LLM에게 현재 상태를 주고 다음 Worker를 결정하도록 요청
     # 실제 프롬프트는 더 정교해야 함 (Worker 설명, 종료 조건 등 포함)
-    prompt = f"""현재 대화 내용: {messages}.
+    return f"""현재 대화 내용:
+    {supervisor_context.render(messages)}
+
     당신은 Supervisor입니다. 다음으로 어떤 Worker를 호출해야 할까요?
     선택지: [{', '.join(worker_map.keys())}, FINISH]
     가장 적합한 Worker 이름 하나만 또는 FINISH를 반환하세요:"""
 
-    response = supervisor_llm.invoke(prompt)
-    next_node_name = response.content.strip()
-    print(f"Supervisor 결정: {next_node_name}")
+# 선택지에 없는 답이 오면 종료하지 않고 고쳐 달라고 다시 물음 (이 횟수를 넘기면 RoutingError 로 실패)
+ROUTE_ATTEMPTS = 3
 
-    if next_node_name == "FINISH":
-        return {"next_worker": END}
-    elif next_node_name in worker_map:
-        return {"next_worker": next_node_name}
-    else: # 예외 처리 (잘못된 이름 반환 시)
-        print(f"경고: 알 수 없는 Worker 이름 '{next_node_name}'. 종료합니다.")
-        return {"next_worker": END}
-
-# 4. 그래프 빌드
-workflow = StateGraph(SupervisorState)
-
-# Supervisor 노드 추가
-workflow.add_node("supervisor", supervisor_node)
-
-# Worker 노드들 추가
-for name, worker_runnable in worker_map.items():
-    workflow.add_node(name, worker_runnable)
-    # 각 Worker 실행 후에는 Supervisor에게 결과를 보고하러 돌아감
-    workflow.add_edge(name, "supervisor")
-
-# 조건부 엣지: Supervisor의 결정에 따라 Worker로 라우팅
-workflow.add_conditional_edges(
-    "supervisor",           # Supervisor 노드 실행 후
-    lambda state: state["next_worker"], # 상태의 next_worker 값을 보고
-    {name: name for name in worker_map.keys()}.update({END: END}) # 각 Worker 이름에 해당하는 노드로 매핑
-)
+class RoutingError(ValueError):
+    """Supervisor 가 선택지에 없는 답을 냄"""
+
+def parse_route(answer: str) -> str:
+    choices = [*worker_map, "FINISH"]
+    cleaned = answer.strip().strip("'\"`.[] ")
+    if cleaned in choices:
+        return cleaned
+    # "다음은 Researcher 입니다" 처럼 선택지 하나만 들어 있는 답은 받아들임
+    found = [choice for choice in choices if choice.lower() in answer.lower()]
+    if len(found) == 1:
+        return found[0]
+    raise RoutingError(f"알 수 없는 Worker 이름 {answer.strip()!r}")
 
-# 진입점 설정
-workflow.set_entry_point("supervisor")
+def correction(prompt: str, answer: str) -> str:
+    return f"""{prompt}
+    {answer.strip()}
+
+    위 답은 선택지에 없습니다. [{', '.join(worker_map.keys())}, FINISH] 중 하나만 그대로 반환하세요:"""
+
+def supervisor_decision(next_node_name: str) -> dict:
+    print(f"Supervisor 결정: {next_node_name}")
+    return {"next_worker": END if next_node_name == "FINISH" else next_node_name}
+
+# LLM 호출 실패(서버 과부하 등)는 llm_clients 스케줄러가 백오프로 재시도하고, 그래도 실패하면 END 로 바꾸지 않고 그대로 예외를 냄
+def supervisor_node(state: SupervisorState, config: RunnableConfig) -> dict:
+    print("--- Supervisor: 다음 작업자 결정 ---")
+    prompt = supervisor_prompt(state['messages'])
+    for attempt in range(ROUTE_ATTEMPTS):
+        answer = supervisor_router.invoke(prompt, config).content
+        try:
+            return supervisor_decision(parse_route(answer))
+        except RoutingError as e:
+            if attempt + 1 == ROUTE_ATTEMPTS:
+                raise
+            print(f"경고: {e}. 다시 묻습니다.")
+            prompt = correction(prompt, answer)
+
+# ainvoke / astream 용 비동기 버전: 같은 이벤트 루프의 세션들끼리 20ms 동안 모아서 abatch 로 보냄
+async def asupervisor_node(state: SupervisorState, config: RunnableConfig) -> dict:
+    print("--- Supervisor: 다음 작업자 결정 ---")
+    # 요약이 필요하면 render 가 LLM 을 동기로 부르므로 스레드에서 실행
+    prompt = await asyncio.to_thread(supervisor_prompt, state['messages'])
+    for attempt in range(ROUTE_ATTEMPTS):
+        answer = (await supervisor_router.ainvoke(prompt, config)).content
+        try:
+            return supervisor_decision(parse_route(answer))
+        except RoutingError as e:
+            if attempt + 1 == ROUTE_ATTEMPTS:
+                raise
+            print(f"경고: {e}. 다시 묻습니다.")
+            prompt = correction(prompt, answer)
+
+# 4. 그래프 빌드 (레지스트리에 등록해서 프로세스마다 한 번만 compile 하고, 검증 결과와 그림은 graph-cache/ 에 캐시)
+@register("multi-agent")
+def build_multi_agent() -> StateGraph:
+    workflow = StateGraph(SupervisorState)
+
+    # Supervisor 노드 추가
+    workflow.add_node("supervisor", RunnableLambda(supervisor_node, afunc=asupervisor_node))
+
+    # Worker 노드들 추가
+    for name, worker_runnable in worker_map.items():
+        workflow.add_node(name, worker_runnable)
+        # 각 Worker 실행 후에는 Supervisor에게 결과를 보고하러 돌아감
+        workflow.add_edge(name, "supervisor")
+
+    # 조건부 엣지: Supervisor의 결정에 따라 Worker로 라우팅
+    workflow.add_conditional_edges(
+        "supervisor",           # Supervisor 노드 실행 후
+        lambda state: state["next_worker"], # 상태의 next_worker 값을 보고
+        {**{name: name for name in worker_map.keys()}, END: END} # 각 Worker 이름에 해당하는 노드로, END 는 종료로 매핑
+    )
+
+    # 진입점 설정
+    workflow.set_entry_point("supervisor")
+    return workflow
 
 # 그래프 컴파일
-multi_agent_app = workflow.compile()
-multi_agent_app.get_graph().print_ascii()
+multi_agent_app = get_app("multi-agent")
+print(draw("multi-agent", "ascii"))
 
 # 5. 실행 예시
 initial_state = {"messages": [HumanMessage(content="LangGraph에 대해 조사하고 간단한 예제 코드를 작성해줘.")]}
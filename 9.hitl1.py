@@ -1,5 +1,5 @@
 from langgraph.graph import StateGraph, END
-from langgraph.checkpoint.memory import MemorySaver # Checkpointer (선택 사항이지만 HITL에 유용)
+from sqlite_saver import SqliteSaver # Checkpointer (선택 사항이지만 HITL에 유용)
 from typing import TypedDict, Annotated, Union
 import operator
 import uuid # 고유한 스레드 ID 생성을 위해
@@ -71,7 +71,7 @@ workflow.add_conditional_edges(
 workflow.add_edge("approved_action", END)
 workflow.add_edge("rejected_action", END)
 
-memory_saver = MemorySaver()
+memory_saver = SqliteSaver("hitl1.db") # 프로세스를 재시작해도 스레드 기록 유지
 
 app = workflow.compile(
     checkpointer=memory_saver,
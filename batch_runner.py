@@ -0,0 +1,255 @@
+import argparse
+import asyncio
+import importlib
+import itertools
+import json
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+from scheduler import priority
+
+# 초기 상태 수천~수십만 개를 컴파일된 그래프로 한꺼번에 돌리는 오프라인 배치 실행기
+#
+#   stats = run_batch(app, read_jsonl("queries.jsonl"), "answers.jsonl", concurrency=64)
+#   stats = run_batch(build_app, read_jsonl("queries.jsonl"), "answers.jsonl", processes=4)   # 코어가 많을 때
+#
+#   python batch_runner.py mymodule:build_app queries.jsonl answers.jsonl --concurrency 64 --processes 4
+#
+# 입력 JSONL 한 줄은 {"id": ..., "input": {초기 상태}} (input 이 없으면 id 를 뺀 나머지가 초기 상태, id 가 없으면 줄 번호).
+# 결과는 끝나는 순서대로 {"id": ..., "output": 최종 상태, "seconds": ...} 또는 {"id": ..., "error": "..."} 를 한 줄씩 덧붙입니다.
+# 줄마다 바로 flush 하므로 중간에 멈췄다가 같은 출력 파일로 다시 실행하면 output 이 있는 id 는 건너뜁니다 (실패한 id 는 다시 실행).
+#
+# - 한 프로세스 안에서는 concurrency 개의 비동기 작업자가 입력을 하나씩 가져가 app.ainvoke 로 실행 (입력 전체를 메모리에 올리지 않음)
+# - processes > 1 이면 작업자 프로세스마다 그래프를 새로 만들어 같은 방식으로 실행하고 결과는 부모가 한 파일에 씀.
+#   컴파일된 그래프는 pickle 이 안 되므로 app 은 그래프를 돌려주는 모듈 최상위 함수(또는 functools.partial)나 "모듈:이름"
+# - 그래프 안의 LLM 호출은 run_as 우선순위(기본 batch)로 나가서 같은 서버를 쓰는 대화 요청을 밀어내지 않음.
+#   여러 입력이 동시에 보내는 같은 요청은 llm_clients 가 하나로 합치고, 노드에서 micro_batch.MicroBatcher 를
+#   거치면 window 동안 모인 호출이 한 번의 batch 호출로 나감
+# - thread_id 를 주지 않으면 입력 id 를 thread_id 로 씀 (체크포인터가 있는 그래프도 입력마다 다른 스레드)
+
+
+def read_jsonl(path: str, *, id_key: str = "id", input_key: str = "input") -> Iterator[tuple[Any, dict]]:
+    """입력 JSONL 을 (id, 초기 상태) 로 한 줄씩 읽음"""
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            item_id = record.pop(id_key, number)
+            yield item_id, record[input_key] if input_key in record else record
+
+
+def _key(item_id: Any) -> str:
+    return json.dumps(item_id, ensure_ascii=False, sort_keys=True)
+
+
+def finished_ids(output_path: str, *, retry_failed: bool = True) -> set[str]:
+    """출력 파일에 이미 결과가 있는 id (_key 형태). 쓰다 만 마지막 줄은 잘라냄"""
+    if not os.path.exists(output_path):
+        return set()
+    done = set()
+    with open(output_path, "rb+") as f:
+        data = f.read()
+        end = data.rfind(b"\n") + 1
+        if end < len(data):
+            f.truncate(end)
+        for line in data[:end].splitlines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if "output" in record or not retry_failed:
+                done.add(_key(record["id"]))
+    return done
+
+
+def _jsonable(value: Any):
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    return str(value)
+
+
+def _load(app):
+    """그래프, 그래프를 만드는 함수, 또는 "모듈:이름" 을 컴파일된 그래프로"""
+    if isinstance(app, str):
+        module, _, name = app.partition(":")
+        app = getattr(importlib.import_module(module), name or "app")
+    if not hasattr(app, "ainvoke") and callable(app):
+        app = app()
+    return app
+
+
+async def _invoke(app, item_id: Any, state: dict, config: dict) -> tuple[bool, str]:
+    configurable = {"thread_id": str(item_id), **config.get("configurable", {})}
+    record: dict[str, Any] = {"id": item_id}
+    start = time.perf_counter()
+    try:
+        record["output"] = await app.ainvoke(state, {**config, "configurable": configurable})
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+    record["seconds"] = round(time.perf_counter() - start, 4)
+    return "output" in record, json.dumps(record, ensure_ascii=False, default=_jsonable)
+
+
+async def _run_workers(app, next_item: Callable, emit: Callable, concurrency: int, config: dict) -> None:
+    async def worker():
+        while (item := await next_item()) is not None:
+            emit(*await _invoke(app, *item, config))
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+def _worker_process(app, inbox, outbox, concurrency: int, config: dict, run_as: str) -> None:
+    app = _load(app)
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        pending: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
+
+        def feed():
+            # 부모가 보낸 묶음을 이벤트 루프의 대기열로 옮김 (대기열이 차면 기다리므로 입력을 미리 다 받지 않음)
+            while (chunk := inbox.get()) is not None:
+                for item in chunk:
+                    asyncio.run_coroutine_threadsafe(pending.put(item), loop).result()
+            asyncio.run_coroutine_threadsafe(pending.put(None), loop).result()
+
+        async def next_item():
+            item = await pending.get()
+            if item is None:
+                pending.put_nowait(None)  # 다른 작업자도 끝나도록 되돌려 놓음
+            return item
+
+        threading.Thread(target=feed, name="batch-feed", daemon=True).start()
+        with priority(run_as):
+            await _run_workers(app, next_item, lambda ok, line: outbox.put((ok, line)), concurrency, config)
+
+    asyncio.run(main())
+    outbox.put(None)
+
+
+def run_batch(
+    app,
+    inputs: Iterable,
+    output_path: str,
+    *,
+    concurrency: int = 32,
+    processes: int = 1,
+    config: Optional[dict] = None,
+    run_as: str = "batch",
+    resume: bool = True,
+    retry_failed: bool = True,
+    chunk_size: int = 16,
+    mp_context: Optional[str] = "spawn",
+    progress: Optional[Callable[[dict], None]] = None,
+    progress_every: int = 1000,
+) -> dict:
+    """inputs ((id, 초기 상태) 또는 초기 상태) 를 app 으로 실행하고 끝나는 순서대로 output_path 에 덧붙임.
+
+    한 번에 concurrency 개(processes > 1 이면 프로세스마다 concurrency 개)씩 실행하고 실행 통계를 반환
+    """
+    config = config or {}
+    done = finished_ids(output_path, retry_failed=retry_failed) if resume else set()
+    stats = {"total": 0, "skipped": 0, "succeeded": 0, "failed": 0}
+    start = time.perf_counter()
+
+    def todo() -> Iterator[tuple[Any, dict]]:
+        for position, item in enumerate(inputs):
+            item_id, state = item if isinstance(item, tuple) else (position, item)
+            stats["total"] += 1
+            if _key(item_id) in done:
+                stats["skipped"] += 1
+                continue
+            yield item_id, state
+
+    with open(output_path, "a" if resume else "w", encoding="utf-8") as out:
+
+        def emit(ok: bool, line: str) -> None:
+            out.write(line + "\n")
+            out.flush()
+            stats["succeeded" if ok else "failed"] += 1
+            if progress is not None and (stats["succeeded"] + stats["failed"]) % progress_every == 0:
+                progress({**stats, "elapsed": time.perf_counter() - start})
+
+        if processes <= 1:
+            items = todo()
+
+            async def next_item():
+                return next(items, None)
+
+            async def main():
+                with priority(run_as):
+                    await _run_workers(_load(app), next_item, emit, concurrency, config)
+
+            asyncio.run(main())
+        else:
+            context = multiprocessing.get_context(mp_context)
+            inbox = context.Queue(maxsize=processes * 4)
+            outbox = context.Queue()
+            workers = [
+                context.Process(
+                    target=_worker_process,
+                    args=(app, inbox, outbox, concurrency, config, run_as),
+                    name=f"batch-worker-{i}",
+                    daemon=True,
+                )
+                for i in range(processes)
+            ]
+            for worker in workers:
+                worker.start()
+
+            def feed():
+                items = todo()
+                while chunk := list(itertools.islice(items, chunk_size)):
+                    inbox.put(chunk)
+                for _ in workers:
+                    inbox.put(None)
+
+            threading.Thread(target=feed, name="batch-feed", daemon=True).start()
+            finished = 0
+            while finished < len(workers):
+                try:
+                    message = outbox.get(timeout=1.0)
+                except queue.Empty:
+                    crashed = [worker.name for worker in workers if worker.exitcode not in (None, 0)]
+                    if crashed:
+                        raise RuntimeError(f"batch worker process exited unexpectedly: {crashed}")
+                    continue
+                if message is None:
+                    finished += 1
+                else:
+                    emit(*message)
+            for worker in workers:
+                worker.join()
+
+    stats["elapsed"] = time.perf_counter() - start
+    ran = stats["succeeded"] + stats["failed"]
+    stats["per_second"] = ran / stats["elapsed"] if stats["elapsed"] else 0.0
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("app", help='"모듈:이름" (컴파일된 그래프 또는 그래프를 돌려주는 함수)')
+    parser.add_argument("inputs", help="입력 JSONL")
+    parser.add_argument("output", help="결과 JSONL (있으면 끝난 id 는 건너뛰고 이어서 실행)")
+    parser.add_argument("--concurrency", type=int, default=32, help="프로세스마다 동시에 실행하는 입력 수")
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--no-resume", action="store_true", help="출력 파일을 덮어쓰고 처음부터 실행")
+    args = parser.parse_args()
+
+    stats = run_batch(
+        args.app,
+        read_jsonl(args.inputs),
+        args.output,
+        concurrency=args.concurrency,
+        processes=args.processes,
+        resume=not args.no_resume,
+        progress=lambda s: print(f"{s['succeeded'] + s['failed']}개 완료 (실패 {s['failed']}), {s['elapsed']:.1f}s", flush=True),
+    )
+    print(
+        f"입력 {stats['total']}개 중 {stats['skipped']}개 건너뜀, 성공 {stats['succeeded']} 실패 {stats['failed']}, "
+        f"{stats['elapsed']:.1f}s ({stats['per_second']:.1f}/s)"
+    )
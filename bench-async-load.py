@@ -0,0 +1,98 @@
+import argparse
+import asyncio
+import os
+import random
+import resource
+import tempfile
+import time
+
+from langgraph.checkpoint.memory import MemorySaver
+
+from graph_server import build_chat_graph
+from llm_clients import report
+from sqlite_saver import SqliteSaver
+from stub_llm_server import start_in_process
+from write_behind import WriteBehindSaver
+
+# 이벤트 루프 하나에서 수천 개의 대화 스레드(thread_id)를 동시에 돌리는 부하 테스트
+# 사용법: python bench-async-load.py --sessions 5000 --turns 3 --saver sqlite
+#
+# 세션마다 think 초 안에서 무작위로 쉬었다가 ainvoke 로 한 턴씩 대화합니다(체크포인터에서 기록을 읽고
+# 비동기 call_model 이 스텁 LLM 을 부른 뒤 다시 저장). 스텁 LLM 서버는 별도 프로세스에서 돌고 응답에 latency 초가 걸립니다.
+# 측정값: 턴 지연 시간 백분위, 초당 턴 수, 이벤트 루프 지연(10ms 타이머가 늦게 깨어난 정도), 최대 RSS.
+# 루프 지연이 크면 어딘가에서 동기 I/O 가 루프를 막고 있다는 뜻입니다.
+#
+# 초당 턴 수 ~= sessions x turns / think 가 LLM 클라이언트 처리량을 넘으면 요청이 llm_clients 대기열에 쌓여 지연만 늘어납니다.
+# (1코어에서 스텁 서버와 CPU 를 나눠 쓰면 httpx 만으로 초당 45~75 요청 정도)
+#   python bench-async-load.py --sessions 5000 --turns 1 --think 200 --saver write-behind
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    pick = lambda q: samples[min(len(samples) - 1, int(len(samples) * q))] * 1000
+    return f"p50 {pick(0.5):7.0f}ms p90 {pick(0.9):7.0f}ms p99 {pick(0.99):7.0f}ms max {samples[-1] * 1000:7.0f}ms"
+
+
+async def loop_lag(samples, stop):
+    interval = 0.01
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(time.perf_counter() - start - interval)
+
+
+async def session(graph, index, turns, think, latencies, errors):
+    config = {"configurable": {"thread_id": f"session-{index}"}}
+    for turn in range(turns):
+        await asyncio.sleep(random.uniform(0, think))
+        start = time.perf_counter()
+        try:
+            await graph.ainvoke({"messages": [{"role": "user", "content": f"{index}번 세션 {turn}번째 질문"}]}, config)
+        except Exception as e:
+            errors.append(f"{type(e).__name__}: {e}")
+            continue
+        latencies.append(time.perf_counter() - start)
+
+
+async def run(graph, args):
+    latencies, errors, lag = [], [], []
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(loop_lag(lag, stop))
+    start = time.perf_counter()
+    await asyncio.gather(*(session(graph, i, args.turns, args.think, latencies, errors) for i in range(args.sessions)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await ticker
+    print(f"[{args.saver}] 세션 {args.sessions} x {args.turns}턴: {elapsed:.1f}s, {len(latencies) / elapsed:.0f} 턴/s, 오류 {len(errors)}")
+    if latencies:
+        print(f"[{args.saver}] 턴 지연     {percentiles(latencies)}")
+    print(f"[{args.saver}] 루프 지연    {percentiles(lag)}")
+    print(f"[{args.saver}] 최대 RSS     {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f}MB")
+    if errors:
+        print(f"[{args.saver}] 첫 오류: {errors[0][:200]}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=5000)
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--think", type=float, default=2.0, help="턴 사이 최대 대기 시간(초)")
+    parser.add_argument("--latency", type=float, default=0.2, help="스텁 LLM 응답 시간(초)")
+    parser.add_argument("--connections", type=int, default=64, help="LLM 서버로 여는 최대 연결 수 (= 동시 LLM 요청 수)")
+    parser.add_argument("--saver", choices=["memory", "sqlite", "write-behind"], default="sqlite")
+    args = parser.parse_args()
+
+    url, stop, _ = start_in_process(latency=args.latency)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            if args.saver == "memory":
+                saver = MemorySaver()
+            elif args.saver == "sqlite":
+                saver = SqliteSaver(os.path.join(tmp, "load.db"))
+            else:
+                saver = WriteBehindSaver(SqliteSaver(os.path.join(tmp, "load.db")))
+            graph = build_chat_graph(url, "stub", saver, max_concurrency=args.connections)
+            asyncio.run(run(graph, args))
+            print(report())
+    finally:
+        stop()
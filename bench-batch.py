@@ -0,0 +1,114 @@
+import argparse
+import functools
+import hashlib
+import json
+import os
+import tempfile
+import time
+from typing import TypedDict
+
+from batch_runner import read_jsonl, run_batch
+from stub_llm_server import start_in_process
+
+# 1.graph.py 처럼 입력마다 app.invoke 를 한 번씩 부르는 경우와 batch_runner.run_batch 비교
+# 사용법: python bench-batch.py --inputs 2000 --concurrency 32 --processes 2 --slots 16
+#
+# 그래프는 검색(CPU 작업 cpu-ms 밀리초) -> 답변(스텁 LLM 호출) 두 노드입니다.
+#   순차        for 문에서 app.invoke (지금 예제 스크립트들의 방식, 처음 sequential 개만 재서 환산)
+#   배치        run_batch, 한 프로세스에서 concurrency 개씩
+#   배치 xN     run_batch, 작업자 프로세스 N 개 x concurrency 개 (CPU 코어가 여러 개일 때 빨라짐)
+#   이어서      절반만 실행하고 멈춘 출력 파일로 다시 실행 (끝난 입력은 건너뜀)
+
+
+class QAState(TypedDict):
+    query: str
+    documents: list
+    answer: str
+
+
+def build_app(base_url: str, cpu_ms: float = 2.0, max_concurrency: int = 16):
+    from langchain_core.runnables import RunnableLambda
+    from langgraph.graph import END, StateGraph
+
+    import llm_clients
+
+    llm_clients.configure(base_url, max_concurrency=max_concurrency)
+    model = llm_clients.chat_model(base_url=base_url, api_key="stub", model_name="stub")
+
+    def search(state: QAState) -> dict:
+        # 임베딩/검색 대신 cpu_ms 동안 해시 계산
+        digest, deadline = state["query"].encode(), time.perf_counter() + cpu_ms / 1000
+        while time.perf_counter() < deadline:
+            digest = hashlib.sha256(digest).digest()
+        return {"documents": [digest.hex()[:16]]}
+
+    def prompt(state: QAState) -> str:
+        return f"{state['query']} (문서 {state['documents'][0]})"
+
+    def generate(state: QAState) -> dict:
+        return {"answer": model.invoke(prompt(state)).content}
+
+    async def agenerate(state: QAState) -> dict:
+        return {"answer": (await model.ainvoke(prompt(state))).content}
+
+    workflow = StateGraph(QAState)
+    workflow.add_node("search", search)
+    workflow.add_node("generate", RunnableLambda(generate, afunc=agenerate))
+    workflow.set_entry_point("search")
+    workflow.add_edge("search", "generate")
+    workflow.add_edge("generate", END)
+    return workflow.compile()
+
+
+def write_inputs(path: str, count: int) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(count):
+            f.write(json.dumps({"id": f"q{i}", "input": {"query": f"질문 {i}", "documents": [], "answer": ""}}, ensure_ascii=False) + "\n")
+
+
+def count_lines(path: str) -> int:
+    with open(path, encoding="utf-8") as f:
+        return sum(1 for _ in f)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--inputs", type=int, default=2000)
+    parser.add_argument("--sequential", type=int, default=50, help="순차 실행으로 잴 입력 수")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--processes", type=int, default=2)
+    parser.add_argument("--cpu-ms", type=float, default=2.0, help="검색 노드의 CPU 시간")
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--slots", type=int, default=16, help="스텁 서버가 동시에 처리하는 요청 수")
+    args = parser.parse_args()
+
+    url, stop, stats = start_in_process(latency=args.latency, token_delay=0.0, slots=args.slots)
+    factory = functools.partial(build_app, url, args.cpu_ms, args.slots)
+    workdir = tempfile.mkdtemp(prefix="bench-batch-")
+    inputs = os.path.join(workdir, "inputs.jsonl")
+    write_inputs(inputs, args.inputs)
+    print(f"입력 {args.inputs}개, 검색 CPU {args.cpu_ms}ms, LLM 지연 {args.latency * 1000:.0f}ms, "
+          f"서버 동시 처리 {args.slots}, CPU {os.cpu_count()}개")
+    try:
+        app = factory()
+        start = time.perf_counter()
+        for _, state in zip(range(args.sequential), read_jsonl(inputs)):
+            app.invoke(state[1])
+        per_input = (time.perf_counter() - start) / args.sequential
+        print(f"{'순차':<8}: {per_input * args.inputs:7.1f}s (환산, {1 / per_input:6.1f}/s)", flush=True)
+
+        runs = [("배치", {"processes": 1}), (f"배치 x{args.processes}", {"processes": args.processes})]
+        for name, kwargs in runs:
+            output = os.path.join(workdir, f"{name}.jsonl")
+            result = run_batch(factory, read_jsonl(inputs), output, concurrency=args.concurrency, **kwargs)
+            print(f"{name:<8}: {result['elapsed']:7.1f}s ({result['per_second']:6.1f}/s), "
+                  f"실패 {result['failed']}, 출력 {count_lines(output)}줄", flush=True)
+
+        output = os.path.join(workdir, "resume.jsonl")
+        run_batch(factory, (item for _, item in zip(range(args.inputs // 2), read_jsonl(inputs))), output, concurrency=args.concurrency)
+        before = stats.snapshot()["requests"]
+        result = run_batch(factory, read_jsonl(inputs), output, concurrency=args.concurrency)
+        print(f"{'이어서':<8}: {result['elapsed']:7.1f}s, 건너뜀 {result['skipped']} 실행 {result['succeeded']}, "
+              f"LLM 요청 {stats.snapshot()['requests'] - before}, 출력 {count_lines(output)}줄")
+    finally:
+        stop()
@@ -0,0 +1,147 @@
+import argparse
+import operator
+import os
+import statistics
+import tempfile
+import time
+from typing import Annotated, TypedDict
+
+from langchain_core.messages import AIMessage
+from langgraph.graph import StateGraph, MessagesState, START, END
+from langgraph.checkpoint.memory import MemorySaver
+
+from checkpoint_policy import ThrottledSaver
+from sqlite_saver import SqliteSaver
+from write_behind import WriteBehindSaver
+
+# MemorySaver, SqliteSaver, WriteBehindSaver 의 get_state / get_state_history / update_state 지연 시간 비교
+# 사용법: python bench-checkpoint.py --threads 20000 --turns 3
+# 측정 전에 저장을 미루는 래퍼들이 그래프가 끝날 때 마지막 체크포인트를 inner 저장소에 남기는지 먼저 확인합니다.
+
+
+def call_model(state: MessagesState):
+    # LLM 대신 고정 응답을 돌려주는 스텁 노드 (체크포인터 비용만 측정)
+    return {"messages": AIMessage(content=f"응답 {len(state['messages'])}")}
+
+
+def build_graph(checkpointer):
+    builder = StateGraph(MessagesState)
+    builder.add_node("call_model", call_model)
+    builder.add_edge(START, "call_model")
+    return builder.compile(checkpointer=checkpointer)
+
+
+class LoopState(TypedDict):
+    steps: Annotated[int, operator.add]
+
+
+def build_loop_graph(checkpointer, steps):
+    # 노드 하나가 steps 번 반복되는 그래프: 노드 사이마다 체크포인트가 하나씩 생김
+    builder = StateGraph(LoopState)
+    builder.add_node("work", lambda state: {"steps": 1})
+    builder.add_edge(START, "work")
+    builder.add_conditional_edges(
+        "work", lambda state: "work" if state["steps"] < steps else END, ["work", END]
+    )
+    return builder.compile(checkpointer=checkpointer)
+
+
+def run_loop(name, checkpointer, runs, steps):
+    graph = build_loop_graph(checkpointer, steps)
+    samples = []
+    for i in range(runs):
+        config = {"configurable": {"thread_id": f"loop-{i}"}, "recursion_limit": steps + 10}
+        start = time.perf_counter()
+        graph.invoke({"steps": 0}, config)
+        samples.append((time.perf_counter() - start) / steps)
+    print(f"[{name}] {steps}스텝 그래프, 스텝당 {percentiles(samples)}")
+
+
+class SlowMemorySaver(MemorySaver):
+    # 느린 저장소: write-behind 큐가 그래프보다 늦게 비워지는 상황을 만듦
+    def put(self, *args):
+        time.sleep(0.01)
+        return super().put(*args)
+
+
+def check_final_checkpoint(name, saver, inner):
+    # 정책상 중간 스텝을 건너뛰어도 끝난 invoke 의 마지막 체크포인트는 inner 에 있어야 함
+    graph = build_loop_graph(saver, 5)
+    config = {"configurable": {"thread_id": f"check-{name}"}}
+    final = graph.invoke({"steps": 0}, config)
+    stored = inner.get_tuple(config)
+    assert stored is not None and stored.checkpoint["channel_values"]["steps"] == final["steps"], (
+        f"{name}: 마지막 체크포인트가 inner 저장소에 없음"
+    )
+    print(f"[{name}] 마지막 체크포인트 저장 확인")
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    pick = lambda q: samples[min(len(samples) - 1, int(len(samples) * q))] * 1000
+    return f"p50={pick(0.5):.3f}ms p99={pick(0.99):.3f}ms mean={statistics.mean(samples) * 1000:.3f}ms"
+
+
+def timed(fn, configs):
+    samples = []
+    for config in configs:
+        start = time.perf_counter()
+        fn(config)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def run(name, checkpointer, threads, turns, probes):
+    graph = build_graph(checkpointer)
+    configs = [{"configurable": {"thread_id": str(i)}} for i in range(threads)]
+
+    start = time.perf_counter()
+    for _ in range(turns):
+        for config in configs:
+            graph.invoke({"messages": [{"type": "user", "content": "안녕"}]}, config)
+    elapsed = time.perf_counter() - start
+    print(f"[{name}] {threads}개 스레드 x {turns}턴 실행: {elapsed:.2f}s "
+          f"({threads * turns / elapsed:.0f} invoke/s)")
+
+    # 전체 스레드 중 골고루 샘플링해서 조회 지연 측정
+    step = max(1, threads // probes)
+    sample = configs[::step][:probes]
+    print(f"[{name}] get_state          {percentiles(timed(graph.get_state, sample))}")
+    print(f"[{name}] get_state_history  "
+          f"{percentiles(timed(lambda c: list(graph.get_state_history(c)), sample))}")
+    print(f"[{name}] update_state       "
+          f"{percentiles(timed(lambda c: graph.update_state(c, {'messages': []}), sample))}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=10000)
+    parser.add_argument("--turns", type=int, default=2)
+    parser.add_argument("--probes", type=int, default=500)
+    parser.add_argument("--loop-steps", type=int, default=50)
+    parser.add_argument("--loop-runs", type=int, default=50)
+    args = parser.parse_args()
+
+    inner = MemorySaver()
+    check_final_checkpoint("ThrottledSaver", ThrottledSaver(inner), inner)
+    inner = SlowMemorySaver()
+    with WriteBehindSaver(inner) as saver:
+        check_final_checkpoint("WriteBehindSaver", saver, inner)
+
+    run("MemorySaver", MemorySaver(), args.threads, args.turns, args.probes)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        with SqliteSaver(path) as saver:
+            run("SqliteSaver", saver, args.threads, args.turns, args.probes)
+        print(f"[SqliteSaver] DB 파일 크기: {os.path.getsize(path) / 1024 / 1024:.1f}MB")
+
+        # put 을 백그라운드 스레드에서 모아서 한 트랜잭션으로 기록
+        with WriteBehindSaver(SqliteSaver(os.path.join(tmp, "write-behind.db"))) as saver:
+            run("WriteBehind(SqliteSaver)", saver, args.threads, args.turns, args.probes)
+
+        # 노드와 노드 사이의 체크포인트 저장 지연 비교 (그래프가 끝날 때만 기다림)
+        with SqliteSaver(os.path.join(tmp, "loop.db")) as saver:
+            run_loop("SqliteSaver", saver, args.loop_runs, args.loop_steps)
+        with WriteBehindSaver(SqliteSaver(os.path.join(tmp, "loop-write-behind.db"))) as saver:
+            run_loop("WriteBehind(SqliteSaver)", saver, args.loop_runs, args.loop_steps)
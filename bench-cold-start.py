@@ -0,0 +1,122 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# 프로세스 시작부터 "그래프 준비 완료"(import + build + compile + ASCII 그림)까지 걸리는 시간 비교
+# 사용법: python bench-cold-start.py --runs 7
+#
+#   eager     지금까지의 스크립트처럼 langchain_openai 를 바로 import 하고 매번 compile + print_ascii
+#   registry  graph_registry + lazy_imports (graph-cache 가 비어 있는 첫 실행 / 채워진 뒤 실행)
+# 그래프는 8.multi-agent.py 와 같은 모양(supervisor + worker 2개)이고 노드는 아무 일도 하지 않습니다.
+
+
+def build_graph():
+    from typing import Annotated, Optional, Sequence, TypedDict
+    import operator
+    from langgraph.graph import END, StateGraph
+
+    class SupervisorState(TypedDict):
+        messages: Annotated[Sequence, operator.add]
+        next_worker: Optional[str]
+
+    def supervisor(state):
+        return {"next_worker": END}
+
+    def worker(state):
+        return {"messages": ["done"]}
+
+    workflow = StateGraph(SupervisorState)
+    workflow.add_node("supervisor", supervisor)
+    for name in ("Researcher", "CodeWriter"):
+        workflow.add_node(name, worker)
+        workflow.add_edge(name, "supervisor")
+    workflow.add_conditional_edges(
+        "supervisor", lambda state: state["next_worker"],
+        {"Researcher": "Researcher", "CodeWriter": "CodeWriter", END: END},
+    )
+    workflow.set_entry_point("supervisor")
+    return workflow
+
+
+def child(mode):
+    if mode == "eager":
+        from langchain_openai import ChatOpenAI
+
+        ChatOpenAI(base_url="http://localhost:1234/v1", model_name="stub", api_key="stub")
+        app = build_graph().compile()
+        drawing = app.get_graph().draw_ascii()
+    else:
+        from graph_registry import draw, get_app, register
+        from lazy_imports import LazyObject, lazy_import
+
+        langchain_openai = lazy_import("langchain_openai")
+        LazyObject(lambda: langchain_openai.ChatOpenAI(base_url="http://localhost:1234/v1", model_name="stub", api_key="stub"))
+        register("supervisor")(build_graph)
+        app = get_app("supervisor")
+        drawing = draw("supervisor", "ascii")
+    assert app is not None and drawing
+    print("ready", flush=True)
+
+
+def time_to_ready(mode, cache_dir):
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "--child", mode],
+        stdout=subprocess.PIPE, text=True, cwd=cache_dir,
+    )
+    line = proc.stdout.readline()
+    ready = time.perf_counter() - start
+    proc.wait()
+    if line.strip() != "ready":
+        raise RuntimeError(f"{mode} 자식 프로세스 실패 (exit {proc.returncode})")
+    return ready
+
+
+def in_process(runs):
+    from graph_registry import GraphRegistry
+
+    start = time.perf_counter()
+    for _ in range(runs):
+        build_graph().compile()
+    rebuild = (time.perf_counter() - start) / runs
+
+    with tempfile.TemporaryDirectory() as tmp:
+        registry = GraphRegistry(os.path.join(tmp, "graph-cache"))
+        registry.register("supervisor")(build_graph)
+        registry.get("supervisor")
+        start = time.perf_counter()
+        for _ in range(runs):
+            registry.get("supervisor")
+        cached = (time.perf_counter() - start) / runs
+    print(f"프로세스 안에서: 매번 build + compile {rebuild * 1000:.2f}ms, 레지스트리 조회 {cached * 1e6:.1f}us")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--child", choices=["eager", "registry"])
+    args = parser.parse_args()
+
+    if args.child:
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+        child(args.child)
+        sys.exit(0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # 한 번씩 먼저 실행해서 .pyc 와 OS 파일 캐시를 채움 (registry 는 graph-cache 를 지운 뒤 측정)
+        time_to_ready("eager", tmp)
+        time_to_ready("registry", tmp)
+        results = {"eager": [], "registry (빈 graph-cache)": [], "registry (graph-cache 있음)": []}
+        for _ in range(args.runs):
+            results["eager"].append(time_to_ready("eager", tmp))
+            subprocess.run(["rm", "-rf", os.path.join(tmp, "graph-cache")], check=True)
+            results["registry (빈 graph-cache)"].append(time_to_ready("registry", tmp))
+            results["registry (graph-cache 있음)"].append(time_to_ready("registry", tmp))
+        for name, samples in results.items():
+            print(f"{name}: 중앙값 {statistics.median(samples) * 1000:.0f}ms "
+                  f"(최소 {min(samples) * 1000:.0f}ms, 최대 {max(samples) * 1000:.0f}ms)")
+    in_process(200)
@@ -0,0 +1,73 @@
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from langchain_core.messages import AIMessage
+from langgraph.graph import StateGraph, MessagesState, START
+from langgraph.checkpoint.memory import MemorySaver
+
+from sqlite_saver import SqliteSaver
+
+# 1,000턴 대화 스레드에서 체크포인트 저장 용량 / 메모리 비교
+# - MemorySaver          : 매 스텝 전체 messages 를 메모리에 저장
+# - SqliteSaver(full)    : 매 스텝 전체 messages 를 파일에 저장 (snapshot_every=None)
+# - SqliteSaver(delta)   : 늘어난 메시지만 저장, 50스텝마다 스냅샷
+# 사용법: python bench-delta.py --turns 1000
+
+
+def call_model(state: MessagesState):
+    # LLM 대신 고정 길이 응답을 돌려주는 스텁 노드
+    return {"messages": AIMessage(content="응답 " * 50)}
+
+
+def build_graph(checkpointer):
+    builder = StateGraph(MessagesState)
+    builder.add_node("call_model", call_model)
+    builder.add_edge(START, "call_model")
+    return builder.compile(checkpointer=checkpointer)
+
+
+def stored_bytes(saver):
+    if isinstance(saver, MemorySaver):
+        return sum(len(blob) for _, blob in saver.blobs.values())
+    return saver.conn.execute("SELECT SUM(LENGTH(blob)) FROM blobs").fetchone()[0]
+
+
+def run(name, saver, turns):
+    graph = build_graph(saver)
+    config = {"configurable": {"thread_id": "1"}}
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    for i in range(turns):
+        graph.invoke({"messages": [{"type": "user", "content": f"질문 {i}"}]}, config)
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    state = graph.get_state(config)
+    get_state_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    history = sum(1 for _ in graph.get_state_history(config))
+    history_s = time.perf_counter() - start
+
+    assert len(state.values["messages"]) == turns * 2
+    print(f"[{name}] {turns}턴 실행 {elapsed:.2f}s | 저장된 채널 값 {stored_bytes(saver) / 1024 / 1024:.1f}MB "
+          f"| 메모리 현재 {current / 1024 / 1024:.1f}MB 최대 {peak / 1024 / 1024:.1f}MB")
+    print(f"[{name}] get_state {get_state_ms:.2f}ms | get_state_history {history}개 {history_s:.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=1000)
+    args = parser.parse_args()
+
+    run("MemorySaver", MemorySaver(), args.turns)
+    with tempfile.TemporaryDirectory() as tmp:
+        with SqliteSaver(os.path.join(tmp, "full.db"), snapshot_every=None) as saver:
+            run("SqliteSaver(full)", saver, args.turns)
+        with SqliteSaver(os.path.join(tmp, "delta.db")) as saver:
+            run("SqliteSaver(delta)", saver, args.turns)
@@ -0,0 +1,104 @@
+import argparse
+import asyncio
+import functools
+import hashlib
+import operator
+import os
+import random
+import statistics
+import time
+from typing import Annotated, TypedDict
+
+from langgraph.graph import StateGraph, START, END
+
+from parallel_fanout import close_parallel, compile_parallel
+
+# edge0.py 모양(a -> 갈래 N개 -> d)의 그래프를 실행 방식별로 비교
+# 사용법: python bench-fanout.py --branches 16 --work cpu
+#
+#   cpu  갈래마다 문서를 잘라 sha256 을 반복 계산 (파싱/임베딩처럼 CPU 만 쓰는 작업)
+#   io   갈래마다 time.sleep (블로킹 HTTP 호출 같은 작업)
+# 순차 실행(max_concurrency=1)과 thread / process / async 실행기의 시간, 속도 향상,
+# 그리고 합쳐진 aggregate 순서가 모든 방식에서 같은지 확인합니다.
+
+
+class State(TypedDict):
+    text: str
+    aggregate: Annotated[list, operator.add]
+
+
+def a(state: State):
+    return {"aggregate": ["A"]}
+
+
+def d(state: State):
+    return {"aggregate": ["D"]}
+
+
+def cpu_branch(name: str, rounds: int, state: State):
+    # 갈래마다 문서의 다른 부분을 rounds 번 해시
+    digest = state["text"][int(name[1:]) * 64:].encode()
+    for _ in range(rounds):
+        digest = hashlib.sha256(digest).digest()
+    return {"aggregate": [f"{name}:{digest.hex()[:8]}"]}
+
+
+def io_branch(name: str, seconds: float, state: State):
+    # 완료 순서가 매번 달라지도록 지연 시간을 흔듦
+    time.sleep(seconds * random.uniform(0.5, 1.5))
+    return {"aggregate": [name]}
+
+
+def build(branches, work, amount, text_bytes):
+    builder = StateGraph(State)
+    builder.add_node("a", a)
+    builder.add_node("d", d)
+    builder.add_edge(START, "a")
+    names = [f"b{i:02d}" for i in range(1, branches + 1)]
+    for name in names:
+        func = cpu_branch if work == "cpu" else io_branch
+        builder.add_node(name, functools.partial(func, name, amount))
+        builder.add_edge("a", name)
+    builder.add_edge(names, "d")
+    builder.add_edge("d", END)
+    return builder
+
+
+def timed(graph, state, runs, asynchronous=False):
+    samples, result = [], None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = asyncio.run(graph.ainvoke(state)) if asynchronous else graph.invoke(state)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), result["aggregate"]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--branches", type=int, default=16)
+    parser.add_argument("--work", choices=["cpu", "io"], default="cpu")
+    parser.add_argument("--rounds", type=int, default=200_000, help="cpu: 갈래당 sha256 반복 횟수")
+    parser.add_argument("--sleep", type=float, default=0.2, help="io: 갈래당 평균 대기 시간(초)")
+    parser.add_argument("--text-bytes", type=int, default=1_000_000, help="상태에 실리는 문서 크기")
+    parser.add_argument("--workers", type=int, default=None, help="기본: 갈래 수")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    amount = args.rounds if args.work == "cpu" else args.sleep
+    workers = args.workers or args.branches
+    state = {"text": "문서 " * (args.text_bytes // 7), "aggregate": []}
+    print(f"갈래 {args.branches}개, 작업 {args.work}, 작업자 {workers}개, CPU {os.cpu_count()}개")
+
+    sequential = build(args.branches, args.work, amount, args.text_bytes).compile().with_config(max_concurrency=1)
+    base, expected = timed(sequential, state, args.runs)
+    print(f"순차         {base * 1000:8.0f}ms")
+
+    for executor in ("thread", "process", "async"):
+        graph = compile_parallel(
+            build(args.branches, args.work, amount, args.text_bytes),
+            executor=executor, max_workers=workers, state_keys=["text"],
+        )
+        elapsed, aggregate = timed(graph, state, args.runs, asynchronous=executor == "async")
+        close_parallel(graph)
+        same = "같음" if aggregate == expected else "다름!"
+        print(f"{executor:<12} {elapsed * 1000:8.0f}ms  x{base / elapsed:5.2f}  aggregate 순서 {same}")
@@ -0,0 +1,256 @@
+import argparse
+import gc
+import json
+import operator
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from importlib.metadata import version
+from typing import Annotated, TypedDict
+
+from langchain_core.language_models import FakeListChatModel
+from langgraph.graph import StateGraph, START, END
+from langgraph.checkpoint.memory import MemorySaver
+
+from sqlite_saver import SqliteSaver
+
+# 예제 그래프의 모양(토폴로지)별 실행 비용 벤치마크
+# 사용법: python bench-graphs.py --sizes 10,100,1000,10000 --state-bytes 0,100000
+#         python bench-graphs.py --compare bench-results/graphs-0.4.3.json  (다른 langgraph 버전 결과와 비교)
+#
+#   linear       노드 N개 일렬 (1.graph.py)
+#   fanout       a -> N개 병렬 -> 합류, operator.add 로 누적 (edge0.py)
+#   conditional  라우터가 N개 중 하나를 골라 실행 (edge1.py, 2.condition-edge.py)
+#   cyclic       N개 노드로 된 고리를 두 바퀴 (3.loop-graph.py, agent-graph.py)
+#   interrupt    노드 N개 일렬, 가운데에서 멈췄다가 update_state 후 재개 (interrupt.py, 9.hitl1.py)
+#
+# 노드는 LLM/도구 대신 아무 일도 안 하거나(--stub noop) 가짜 채팅 모델을 부릅니다(--stub llm).
+# 상태에는 --state-bytes 크기의 문자열이 실려서 체크포인트마다 직렬화됩니다.
+# 측정값: invoke 지연 시간 백분위(체크포인터 없음 / MemorySaver / SqliteSaver), 초당 슈퍼스텝,
+# 체크포인터로 늘어난 슈퍼스텝당 시간, MemorySaver 스레드 하나가 차지하는 메모리.
+# 노드가 수천 개면 invoke 한 번에 수십 초가 걸리므로 반복 횟수는 --budget 으로 제한됩니다.
+
+TOPOLOGIES = ["linear", "fanout", "conditional", "cyclic", "interrupt"]
+
+
+class BenchState(TypedDict):
+    payload: str
+    route: int
+    steps: Annotated[int, operator.add]
+    aggregate: Annotated[list, operator.add]
+
+
+def make_node(stub):
+    if stub == "llm":
+        llm = FakeListChatModel(responses=["ok"])
+
+        def node(state):
+            llm.invoke("stub")
+            return {"steps": 1}
+    else:
+        def node(state):
+            return {"steps": 1}
+    return node
+
+
+def build(topology, size, stub):
+    node = make_node(stub)
+    builder = StateGraph(BenchState)
+    names = [f"n{i}" for i in range(size)]
+    if topology in ("linear", "interrupt"):
+        for name in names:
+            builder.add_node(name, node)
+        builder.add_edge(START, names[0])
+        for prev, name in zip(names, names[1:]):
+            builder.add_edge(prev, name)
+        builder.add_edge(names[-1], END)
+    elif topology == "fanout":
+        builder.add_node("a", node)
+        builder.add_node("join", node)
+        builder.add_edge(START, "a")
+        for name in names:
+            builder.add_node(name, lambda state, name=name: {"aggregate": [name]})
+            builder.add_edge("a", name)
+        builder.add_edge(names, "join")
+        builder.add_edge("join", END)
+    elif topology == "conditional":
+        builder.add_node("router", node)
+        builder.add_edge(START, "router")
+        for name in names:
+            builder.add_node(name, node)
+            builder.add_edge(name, END)
+        builder.add_conditional_edges("router", lambda state: names[state["route"] % size], names)
+    elif topology == "cyclic":
+        for name in names:
+            builder.add_node(name, node)
+        builder.add_edge(START, names[0])
+        for prev, name in zip(names, names[1:]):
+            builder.add_edge(prev, name)
+        builder.add_conditional_edges(
+            names[-1], lambda state: names[0] if state["steps"] < 2 * size else END, [names[0], END]
+        )
+    else:
+        raise ValueError(f"알 수 없는 토폴로지: {topology}")
+    return builder
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    pick = lambda q: samples[min(len(samples) - 1, int(len(samples) * q))]
+    return {"p50": pick(0.5), "p90": pick(0.9), "p99": pick(0.99), "mean": statistics.mean(samples)}
+
+
+def run_once(graph, topology, size, payload, config):
+    state = {"payload": payload, "route": size // 2, "steps": 0, "aggregate": []}
+    if topology != "interrupt":
+        return graph.invoke(state, config)
+    graph.invoke(state, config)
+    graph.update_state(config, {"aggregate": ["수정"]})
+    return graph.invoke(None, config)
+
+
+def measure(builder, topology, size, payload, runs, budget, checkpointer):
+    kwargs = {}
+    if checkpointer is not None:
+        kwargs["checkpointer"] = checkpointer
+        if topology == "interrupt":
+            kwargs["interrupt_before"] = [f"n{size // 2}"]
+    graph = builder.compile(**kwargs)
+    samples = []
+    started = time.perf_counter()
+    for i in range(runs + 1):
+        config = {"configurable": {"thread_id": f"{topology}-{size}-{i}"}, "recursion_limit": 2 * size + 10}
+        start = time.perf_counter()
+        run_once(graph, topology, size, payload, config)
+        elapsed = time.perf_counter() - start
+        # 첫 실행은 준비 비용이 섞이므로 버림 (한 번에 1초 넘게 걸리는 큰 그래프는 그대로 씀)
+        if i or elapsed > 1:
+            samples.append(elapsed)
+        if samples and time.perf_counter() - started > budget:
+            break
+    supersteps = None
+    if checkpointer is not None:
+        # 입력 체크포인트가 -1 이므로 마지막 step + 1 이 실행된 슈퍼스텝 수 (START 포함)
+        supersteps = graph.get_state(config).metadata["step"] + 1
+    return percentiles(samples), len(samples), supersteps
+
+
+def memory_per_thread(builder, topology, size, payload, threads, budget):
+    kwargs = {"checkpointer": MemorySaver()}
+    if topology == "interrupt":
+        kwargs["interrupt_before"] = [f"n{size // 2}"]
+    graph = builder.compile(**kwargs)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    for i in range(threads):
+        config = {"configurable": {"thread_id": str(i)}, "recursion_limit": 2 * size + 10}
+        run_once(graph, topology, size, payload, config)
+        if time.perf_counter() - started > budget:
+            break
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return used / (i + 1)
+
+
+def bench(topology, size, state_bytes, args, tmp):
+    payload = "x" * state_bytes
+    start = time.perf_counter()
+    builder = build(topology, size, args.stub)
+    builder.compile()
+    result = {"topology": topology, "nodes": size, "state_bytes": state_bytes, "compile": time.perf_counter() - start}
+
+    def timed(key, checkpointer):
+        result[key], result["runs_" + key], supersteps = measure(
+            builder, topology, size, payload, args.runs, args.budget, checkpointer
+        )
+        return supersteps
+
+    if topology != "interrupt":  # interrupt 는 체크포인터 없이 재개할 수 없음
+        timed("latency", None)
+    supersteps = timed("latency_memory", MemorySaver())
+    with SqliteSaver(os.path.join(tmp, f"{topology}-{size}-{state_bytes}.db")) as saver:
+        timed("latency_sqlite", saver)
+    result["supersteps"] = supersteps
+    base = result.get("latency")
+    result["supersteps_per_s"] = supersteps / (base or result["latency_memory"])["p50"]
+    if base:
+        result["checkpoint_overhead_per_step"] = {
+            name: (result[key]["p50"] - base["p50"]) / supersteps
+            for name, key in (("memory", "latency_memory"), ("sqlite", "latency_sqlite"))
+        }
+    result["memory_per_thread"] = memory_per_thread(builder, topology, size, payload, args.threads, args.budget)
+    return result
+
+
+def ms(seconds):
+    return "-" if seconds is None else f"{seconds * 1000:.3f}ms"
+
+
+def print_result(r):
+    base = r.get("latency") or {}
+    overhead = r.get("checkpoint_overhead_per_step") or {}
+    print(f"{r['topology']:<12} N={r['nodes']:<6} state={r['state_bytes']:<7} "
+          f"p50 {ms(base.get('p50')):>10} p99 {ms(base.get('p99')):>10}  "
+          f"memory p50 {ms(r['latency_memory']['p50']):>10}  sqlite p50 {ms(r['latency_sqlite']['p50']):>10}  "
+          f"{r['supersteps_per_s']:>9.0f} step/s  "
+          f"ckpt/step memory {ms(overhead.get('memory')):>9} sqlite {ms(overhead.get('sqlite')):>9}  "
+          f"{r['memory_per_thread'] / 1024:>8.1f}KB/thread", flush=True)
+
+
+def compare(old_path, results):
+    with open(old_path, encoding="utf-8") as f:
+        old = json.load(f)
+    before = {(r["topology"], r["nodes"], r["state_bytes"]): r for r in old["results"]}
+    print(f"\n비교: langgraph {old['meta']['langgraph']} -> {version('langgraph')} (p50, 체크포인터 없음 또는 MemorySaver)")
+    for r in results:
+        prev = before.get((r["topology"], r["nodes"], r["state_bytes"]))
+        if not prev:
+            continue
+        key = "latency" if "latency" in r else "latency_memory"
+        old_p50, new_p50 = prev[key]["p50"], r[key]["p50"]
+        print(f"{r['topology']:<12} N={r['nodes']:<6} state={r['state_bytes']:<7} "
+              f"{ms(old_p50):>10} -> {ms(new_p50):>10} ({(new_p50 / old_p50 - 1) * 100:+.1f}%)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--topologies", default=",".join(TOPOLOGIES))
+    parser.add_argument("--sizes", default="10,100,1000,10000")
+    parser.add_argument("--state-bytes", default="0,10000,100000")
+    parser.add_argument("--stub", choices=["noop", "llm"], default="llm", help="노드가 하는 일")
+    parser.add_argument("--runs", type=int, default=20, help="설정 하나당 최대 반복 횟수")
+    parser.add_argument("--threads", type=int, default=200, help="스레드당 메모리를 잴 때 만드는 최대 스레드 수")
+    parser.add_argument("--budget", type=float, default=20, help="측정 하나에 쓸 시간(초), 넘으면 반복을 멈춤 (최소 1번)")
+    parser.add_argument("--out", default=None, help="결과 JSON (기본: bench-results/graphs-<langgraph 버전>.json)")
+    parser.add_argument("--compare", default=None, help="비교할 이전 결과 JSON")
+    args = parser.parse_args()
+
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 20000))
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for topology in args.topologies.split(","):
+            for size in map(int, args.sizes.split(",")):
+                for state_bytes in map(int, args.state_bytes.split(",")):
+                    result = bench(topology, size, state_bytes, args, tmp)
+                    print_result(result)
+                    results.append(result)
+
+    out = args.out or os.path.join("bench-results", f"graphs-{version('langgraph')}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    meta = {
+        "langgraph": version("langgraph"), "langchain_core": version("langchain-core"),
+        "python": platform.python_version(), "platform": platform.platform(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"), "args": vars(args),
+    }
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump({"meta": meta, "results": results}, f, ensure_ascii=False, indent=2)
+    print(f"결과 저장: {out}")
+    if args.compare:
+        compare(args.compare, results)
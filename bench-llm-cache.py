@@ -0,0 +1,102 @@
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from langchain_core.globals import set_llm_cache
+from langchain_openai import ChatOpenAI
+
+from llm_cache import ResponseCache
+from stub_llm_server import start_in_thread
+
+# 스텁 LLM 서버를 상대로 응답 캐시 없음 / 정확 일치 / 정확 일치 + 의미 유사도 비교
+# 사용법: python bench-llm-cache.py --questions 50 --repeats 4 --latency 0.3 [--semantic]
+# --semantic 은 sentence-transformers 모델을 내려받아 쓰므로 처음 실행은 오래 걸립니다.
+
+TOPICS = ["LangGraph", "체크포인트", "벡터 검색", "프롬프트 캐시", "스트리밍", "도구 호출", "서울 날씨", "파이썬 비동기"]
+TEMPLATES = [
+    "{topic}에 대해 설명해줘",
+    "{topic}의 장점 세 가지를 알려줘",
+    "{topic}를 처음 배우는 사람에게 추천하는 순서는?",
+    "{topic}에서 자주 하는 실수는 뭐야?",
+    "{topic} 예제 코드를 보여줘",
+    "{topic}와 관련된 성능 문제를 정리해줘",
+    "{topic}를 한 문장으로 요약해줘",
+]
+
+
+def paraphrase(question: str, rng: random.Random) -> str:
+    # 표기만 다른 질문 (공백, 문장부호, 존댓말 어미)
+    variants = [
+        question,
+        question + "?",
+        "  " + question + " ",
+        question.replace("줘", "주세요"),
+        question + " 부탁해",
+    ]
+    return rng.choice(variants)
+
+
+def workload(questions: int, repeats: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    unique = [t.format(topic=topic) for topic in TOPICS for t in TEMPLATES]
+    rng.shuffle(unique)
+    unique = unique[:questions]
+    prompts = []
+    for _ in range(repeats):
+        for question in unique:
+            # 반복 요청의 절반은 그대로, 절반은 표기만 바꿔서 보냄
+            prompts.append(question if rng.random() < 0.5 else paraphrase(question, rng))
+    rng.shuffle(prompts)
+    return prompts
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    pick = lambda q: samples[min(len(samples) - 1, int(len(samples) * q))] * 1000
+    return f"p50={pick(0.5):.1f}ms p99={pick(0.99):.1f}ms mean={statistics.mean(samples) * 1000:.1f}ms"
+
+
+def run(name, llm, prompts, stub, cache=None):
+    set_llm_cache(cache)
+    before = stub.requests
+    samples = []
+    start = time.perf_counter()
+    for prompt in prompts:
+        t = time.perf_counter()
+        llm.invoke(prompt)
+        samples.append(time.perf_counter() - t)
+    elapsed = time.perf_counter() - start
+    print(f"[{name}] {len(prompts)}회 호출 {elapsed:.2f}s, LLM 요청 {stub.requests - before}회, "
+          f"{percentiles(samples)}")
+    if cache is not None:
+        print(f"[{name}] {cache.stats}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--questions", type=int, default=50)
+    parser.add_argument("--repeats", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--semantic", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.95)
+    args = parser.parse_args()
+
+    url, stop, stub = start_in_thread(latency=args.latency)
+    llm = ChatOpenAI(base_url=url, api_key="stub", model_name="stub")
+    prompts = workload(args.questions, args.repeats)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        run("캐시 없음", llm, prompts, stub)
+        run("정확 일치", llm, prompts, stub, ResponseCache(os.path.join(tmp, "exact.db")))
+        # 같은 파일을 다시 열면 디스크에 남은 항목으로 처음부터 적중
+        run("정확 일치(재시작)", llm, prompts, stub, ResponseCache(os.path.join(tmp, "exact.db")))
+        if args.semantic:
+            path = os.path.join(tmp, "semantic.db")
+            cache = ResponseCache(path, semantic=True, threshold=args.threshold)
+            cache.embed(["warm up"])  # 모델 로딩 시간은 측정에서 제외
+            run(f"정확 일치 + 의미(>= {args.threshold})", llm, prompts, stub, cache)
+        set_llm_cache(None)
+    stop()
@@ -0,0 +1,66 @@
+import argparse
+import asyncio
+import random
+import time
+
+from langchain_openai import ChatOpenAI
+
+import llm_clients
+from stub_llm_server import start_in_process
+
+# 스크립트/노드마다 ChatOpenAI 를 따로 만드는 경우와 llm_clients 레지스트리를 쓰는 경우 비교
+# 사용법: python bench-llm-clients.py --calls 400 --clients 8 --distinct 40 --slots 4 --limit 4
+#
+# clients 개의 "스크립트"가 calls 번의 요청을 동시에 보내고, 프롬프트는 distinct 가지 중에서 고릅니다
+# (라우팅 질문처럼 같은 프롬프트가 동시에 여러 번 나가는 상황). 스텁 서버는 slots 개까지만 동시에 처리합니다.
+#   따로       클라이언트마다 자기 연결 풀, 제한 없음 -> 같은 요청이 중복으로 나가고 서버 대기열이 길어짐
+#   레지스트리 연결 풀 하나 + 동시 요청 limit 개 + 진행 중인 같은 요청 합치기
+
+PROMPTS = "다음 작업자를 고르세요: {}"
+
+
+def percentile(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))] * 1000
+
+
+async def drive(models, calls, distinct, seed=0):
+    rng = random.Random(seed)
+    latencies = []
+
+    async def one(i):
+        start = time.perf_counter()
+        await models[i % len(models)].ainvoke(PROMPTS.format(rng.randrange(distinct)))
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(calls)))
+    return time.perf_counter() - start, latencies
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=400)
+    parser.add_argument("--clients", type=int, default=8, help="ChatOpenAI 를 따로 만드는 스크립트/노드 수")
+    parser.add_argument("--distinct", type=int, default=40, help="서로 다른 프롬프트 수")
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--slots", type=int, default=4, help="스텁 서버가 동시에 처리하는 요청 수")
+    parser.add_argument("--limit", type=int, default=4, help="레지스트리의 동시 요청 제한")
+    args = parser.parse_args()
+
+    url, stop, stats = start_in_process(latency=args.latency, slots=args.slots)
+    try:
+        separate = [ChatOpenAI(base_url=url, api_key="stub", model_name="stub") for _ in range(args.clients)]
+        llm_clients.configure(url, max_concurrency=args.limit)
+        shared = [llm_clients.chat_model(base_url=url, api_key="stub", model_name="stub") for _ in range(args.clients)]
+        print(f"요청 {args.calls}개 (프롬프트 {args.distinct}종), 클라이언트 {args.clients}개, "
+              f"서버 동시 처리 {args.slots}, LLM 지연 {args.latency * 1000:.0f}ms")
+        for name, models in (("따로", separate), ("레지스트리", shared)):
+            before = stats.snapshot()
+            elapsed, latencies = asyncio.run(drive(models, args.calls, args.distinct))
+            after = stats.snapshot()
+            print(f"{name:<6}: {elapsed:6.2f}s, 서버 요청 {after['requests'] - before['requests']:>4}, "
+                  f"p50 {percentile(latencies, 0.5):6.0f}ms p99 {percentile(latencies, 0.99):6.0f}ms", flush=True)
+        print(llm_clients.report())
+    finally:
+        stop()
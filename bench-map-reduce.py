@@ -0,0 +1,84 @@
+import argparse
+import asyncio
+import math
+import time
+
+from langchain_openai import ChatOpenAI
+from langgraph.graph import StateGraph
+
+from map_reduce import LLMSummarizer, MapReduceState, add_map_reduce
+from stub_llm_server import start_in_process
+
+# 문서 N개 map-reduce 요약의 총 시간이 동시 실행 수에 따라 어떻게 줄어드는지 측정
+# 사용법: python bench-map-reduce.py --documents 200 --latency 0.2 --slots 16 --parallelism 1,4,8,16,32
+#
+# 스텁 LLM 서버는 요청마다 latency 초가 걸리고 동시에 slots 개까지만 처리합니다(나머지는 서버에서 대기).
+# 이상적인 시간은 (map 라운드 수 + reduce 라운드 수) x latency 이고, map 라운드 수는 N / 동시 실행 수입니다.
+# 동시 실행 수가 slots 를 넘으면 더 빨라지지 않고 요청이 서버 쪽 대기열에 쌓이기만 합니다.
+
+
+def build(summarizer, fanin):
+    workflow = StateGraph(MapReduceState)
+    workflow.add_node("searcher", lambda state: {"partials": None})
+    workflow.set_entry_point("searcher")
+    workflow.set_finish_point(add_map_reduce(workflow, "searcher", summarizer, fanin=fanin))
+    return workflow.compile().with_config(max_concurrency=summarizer.max_concurrency)
+
+
+def rounds(documents, parallelism, fanin):
+    total, items = math.ceil(documents / parallelism), documents
+    while items > fanin:
+        items = math.ceil(items / fanin)
+        total += math.ceil(items / parallelism)
+    return total + (1 if items > 1 else 0)
+
+
+def run(app, state, asynchronous):
+    start = time.perf_counter()
+    first = None
+    final = None
+
+    def observe(mode, chunk):
+        nonlocal first, final
+        if mode == "values":
+            final = chunk
+        elif first is None and any((value or {}).get("partials") for value in chunk.values()):
+            first = time.perf_counter() - start
+
+    if asynchronous:
+        async def consume():
+            async for mode, chunk in app.astream(state, stream_mode=["updates", "values"]):
+                observe(mode, chunk)
+        asyncio.run(consume())
+    else:
+        for mode, chunk in app.stream(state, stream_mode=["updates", "values"]):
+            observe(mode, chunk)
+    return time.perf_counter() - start, first, final
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--documents", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--slots", type=int, default=16, help="스텁 서버가 동시에 처리하는 요청 수")
+    parser.add_argument("--parallelism", default="1,4,8,16,32")
+    parser.add_argument("--fanin", type=int, default=8)
+    parser.add_argument("--async", dest="asynchronous", action="store_true", help="astream 으로 실행")
+    args = parser.parse_args()
+
+    url, stop, stats = start_in_process(latency=args.latency, slots=args.slots)
+    try:
+        llm = ChatOpenAI(base_url=url, api_key="stub", model_name="stub", max_retries=0)
+        documents = [f"문서 {i}: LangGraph 는 상태 그래프로 에이전트를 구성합니다. " * 20 for i in range(args.documents)]
+        state = {"query": "LangGraph란 무엇인가?", "documents": documents, "summary": ""}
+        print(f"문서 {args.documents}개, LLM 지연 {args.latency * 1000:.0f}ms, 서버 동시 처리 {args.slots}, fanin {args.fanin}")
+        for parallelism in map(int, args.parallelism.split(",")):
+            summarizer = LLMSummarizer(llm, max_concurrency=parallelism)
+            app = build(summarizer, args.fanin)
+            before = stats.requests
+            elapsed, first, final = run(app, state, args.asynchronous)
+            ideal = rounds(args.documents, min(parallelism, args.slots), args.fanin) * args.latency
+            print(f"동시 {parallelism:>3}: {elapsed:6.2f}s (이상적 {ideal:5.2f}s), 첫 부분 요약 {first:5.2f}s, "
+                  f"LLM 호출 {stats.requests - before}, 요약 {len(final['summary'])}자", flush=True)
+    finally:
+        stop()
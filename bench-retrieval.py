@@ -0,0 +1,117 @@
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from vector_index import VectorIndex
+
+# 합성 코퍼스(기본 100만 청크)에서 VectorIndex 의 검색 지연과 recall@k 측정
+# 사용법: python bench-retrieval.py --chunks 1000000 --dim 384 --kinds ivf,hnsw
+# 벡터는 디스크의 memmap 에 블록 단위로 만들고, 정답(top-k)은 전수 내적으로 계산합니다.
+
+
+def make_corpus(path, n, dim, clusters, block, latent=32, seed=0):
+    # 실제 문장 임베딩처럼 주제별로 몰려 있고 내재 차원이 낮은 벡터:
+    # latent 차원에서 클러스터를 만든 뒤 dim 차원으로 사영하고 약간의 잡음을 더함
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, latent)).astype(np.float32)
+    projection = rng.standard_normal((latent, dim)).astype(np.float32) / np.sqrt(latent)
+    vectors = np.lib.format.open_memmap(path, mode="w+", dtype=np.float32, shape=(n, dim))
+    for start in range(0, n, block):
+        size = min(block, n - start)
+        z = centers[rng.integers(0, clusters, size)] + 0.5 * rng.standard_normal((size, latent)).astype(np.float32)
+        x = z @ projection + 0.05 * rng.standard_normal((size, dim)).astype(np.float32)
+        vectors[start:start + size] = x / np.linalg.norm(x, axis=1, keepdims=True)
+    vectors.flush()
+    return vectors
+
+
+def make_queries(vectors, nq, seed=1):
+    # 코퍼스 벡터에 잡음을 섞은 질문 (정답이 자기 자신 하나로 뻔하지 않도록)
+    rng = np.random.default_rng(seed)
+    q = vectors[rng.integers(0, len(vectors), nq)] + 0.05 * rng.standard_normal((nq, vectors.shape[1])).astype(np.float32)
+    return q / np.linalg.norm(q, axis=1, keepdims=True)
+
+
+def ground_truth(vectors, queries, k, block):
+    best_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+    best_ids = np.zeros((len(queries), k), dtype=np.int64)
+    for start in range(0, len(vectors), block):
+        scores = queries @ np.asarray(vectors[start:start + block]).T
+        ids = np.broadcast_to(np.arange(start, start + scores.shape[1]), scores.shape)
+        merged_scores = np.concatenate([best_scores, scores], axis=1)
+        merged_ids = np.concatenate([best_ids, ids], axis=1)
+        top = np.argpartition(-merged_scores, k - 1, axis=1)[:, :k]
+        best_scores = np.take_along_axis(merged_scores, top, axis=1)
+        best_ids = np.take_along_axis(merged_ids, top, axis=1)
+    return best_ids
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    pick = lambda q: samples[min(len(samples) - 1, int(len(samples) * q))] * 1000
+    return f"p50={pick(0.5):.2f}ms p99={pick(0.99):.2f}ms mean={statistics.mean(samples) * 1000:.2f}ms"
+
+
+def build(path, kind, vectors, block, nlist, train_memory_mb):
+    index = VectorIndex(
+        path, embed=lambda texts: None, kind=kind, nlist=nlist, train_memory_mb=train_memory_mb, writable=True
+    )
+    start = time.perf_counter()
+    for offset in range(0, len(vectors), block):
+        chunk = np.asarray(vectors[offset:offset + block])
+        index.add_vectors(chunk, [f"청크 {i}" for i in range(offset, offset + len(chunk))])
+    index.save()
+    print(f"[{kind}] 구축 {time.perf_counter() - start:.1f}s, "
+          f"인덱스 파일 {os.path.getsize(index.index_path) / 1024 / 1024:.0f}MB")
+
+
+def measure(path, kind, queries, truth, k, param, values):
+    for value in values:
+        start = time.perf_counter()
+        index = VectorIndex(path, embed=lambda texts: None, kind=kind, **{param: value})
+        index.load()  # mmap 으로 열기
+        load_time = time.perf_counter() - start
+        samples, hits = [], 0
+        for query, expected in zip(queries, truth):
+            # retrieval_node 와 같은 경로: 질문 하나씩 검색하고 본문까지 조회
+            t = time.perf_counter()
+            _, ids = index.search_vectors(query[None, :], k)
+            index.fetch(ids[0])
+            samples.append(time.perf_counter() - t)
+            hits += len(set(ids[0].tolist()) & set(expected.tolist()))
+        print(f"[{kind} {param}={value}] 로딩 {load_time * 1000:.0f}ms, "
+              f"recall@{k}={hits / truth.size:.3f}, {percentiles(samples)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=1_000_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--clusters", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nlist", type=int, default=4096)
+    parser.add_argument("--kinds", default="ivf,hnsw")
+    parser.add_argument("--block", type=int, default=50_000)
+    parser.add_argument("--train-memory-mb", type=float, default=256, help="IVF 학습 표본 메모리 (nlist * 39 개가 들어가야 nlist 그대로 학습)")
+    parser.add_argument("--dir", default=None, help="코퍼스와 인덱스를 둘 디렉터리 (기본: 임시 디렉터리)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        start = time.perf_counter()
+        vectors = make_corpus(os.path.join(tmp, "vectors.npy"), args.chunks, args.dim, args.clusters, args.block)
+        queries = make_queries(vectors, args.queries)
+        truth = ground_truth(vectors, queries, args.k, args.block)
+        print(f"코퍼스 {args.chunks}개 x {args.dim}차원 생성과 정답 계산 {time.perf_counter() - start:.1f}s")
+
+        for kind in args.kinds.split(","):
+            path = os.path.join(tmp, kind)
+            build(path, kind, vectors, args.block, args.nlist, args.train_memory_mb)
+            if kind == "ivf":
+                measure(path, kind, queries, truth, args.k, "nprobe", [4, 16, 64])
+            else:
+                measure(path, kind, queries, truth, args.k, "ef_search", [32, 64, 256])
@@ -0,0 +1,85 @@
+import argparse
+import asyncio
+import time
+
+from langchain_openai import ChatOpenAI
+
+import llm_clients
+from scheduler import priority
+from stub_llm_server import start_in_process
+
+# 갑자기 몰린 요청(burst)에서 스케줄러(llm_clients + scheduler)가 과부하를 피하는지 측정
+# 사용법: python bench-scheduler.py --batch 200 --interactive 20 --slots 4 --max-queue 4
+#
+# 스텁 서버는 동시에 slots 개를 처리하고 max_queue 개까지 기다리게 하며, 그보다 많으면 503 + Retry-After 로 거절합니다.
+# batch 개의 요청을 한꺼번에 보내는 동안 interval 초마다 대화(interactive) 요청을 하나씩 보냅니다.
+#   직접       ChatOpenAI 기본값 (제한 없음, openai 클라이언트의 재시도 2회)
+#   스케줄러   우선순위 대기열 + AIMD(동시 요청 max-concurrency 에서 시작) + 지터 백오프 재시도
+# 성공/실패 수, 서버가 거절한 요청 수, 대화/배치 요청의 지연 시간을 비교합니다.
+
+
+def percentile(samples, q):
+    if not samples:
+        return float("nan")
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))] * 1000
+
+
+async def burst(model, batch, interactive, interval):
+    latencies = {"interactive": [], "batch": []}
+    failures = {"interactive": 0, "batch": 0}
+
+    async def one(kind, i):
+        with priority(kind):
+            start = time.perf_counter()
+            try:
+                await model.ainvoke(f"{kind} {i}")
+            except Exception:
+                failures[kind] += 1
+                return
+            latencies[kind].append(time.perf_counter() - start)
+
+    async def chat():
+        for i in range(interactive):
+            await asyncio.sleep(interval)
+            await one("interactive", i)
+
+    start = time.perf_counter()
+    await asyncio.gather(chat(), *(one("batch", i) for i in range(batch)))
+    return time.perf_counter() - start, latencies, failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch", type=int, default=200)
+    parser.add_argument("--interactive", type=int, default=20)
+    parser.add_argument("--interval", type=float, default=0.25, help="대화 요청 간격(초)")
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--slots", type=int, default=4)
+    parser.add_argument("--max-queue", type=int, default=4)
+    parser.add_argument("--max-concurrency", type=int, default=32, help="스케줄러의 동시 요청 상한 (AIMD 시작값)")
+    args = parser.parse_args()
+
+    url, stop, stats = start_in_process(latency=args.latency, slots=args.slots, max_queue=args.max_queue)
+    try:
+        llm_clients.configure(url, max_concurrency=args.max_concurrency)
+        models = {
+            "직접": ChatOpenAI(base_url=url, api_key="stub", model_name="stub"),
+            "스케줄러": llm_clients.chat_model(base_url=url, api_key="stub", model_name="stub"),
+        }
+        print(f"배치 {args.batch}개 + 대화 {args.interactive}개 ({args.interval}s 간격), "
+              f"서버 동시 처리 {args.slots} + 대기 {args.max_queue}, LLM 지연 {args.latency * 1000:.0f}ms")
+        for name, model in models.items():
+            before = stats.snapshot()
+            elapsed, latencies, failures = asyncio.run(burst(model, args.batch, args.interactive, args.interval))
+            after = stats.snapshot()
+            print(
+                f"{name:<5}: {elapsed:6.2f}s, 실패 배치 {failures['batch']:>3} 대화 {failures['interactive']:>2}, "
+                f"서버 거절 {after['rejected'] - before['rejected']:>4} | "
+                f"대화 p50 {percentile(latencies['interactive'], 0.5):6.0f}ms p99 {percentile(latencies['interactive'], 0.99):6.0f}ms | "
+                f"배치 p50 {percentile(latencies['batch'], 0.5):6.0f}ms p99 {percentile(latencies['batch'], 0.99):6.0f}ms",
+                flush=True,
+            )
+        print(llm_clients.report())
+    finally:
+        stop()
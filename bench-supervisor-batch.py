@@ -0,0 +1,143 @@
+import argparse
+import asyncio
+import operator
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Annotated, Optional, Sequence, TypedDict
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_openai import ChatOpenAI
+from langgraph.graph import END, StateGraph
+
+from micro_batch import MicroBatcher
+from stub_llm_server import start_in_process
+
+# 8.multi-agent.py 와 같은 Supervisor 그래프를 여러 세션으로 동시에 돌려서
+# 라우팅 호출을 하나씩 보낼 때와 MicroBatcher 로 묶어 보낼 때의 처리량 비교
+# 사용법: python bench-supervisor-batch.py --sessions 200 --window 0.02 --max-batch 32
+
+
+class SupervisorState(TypedDict):
+    messages: Annotated[Sequence[BaseMessage], operator.add]
+    next_worker: Optional[str]
+
+
+def route_reply(messages: list[dict]) -> str:
+    # 스텁 서버용 Supervisor 흉내: 조사 -> 코드 작성 -> 종료
+    prompt = str(messages[-1].get("content", ""))
+    if "연구 결과" not in prompt:
+        return "Researcher"
+    if "요청에 따른 코드" not in prompt:
+        return "CodeWriter"
+    return "FINISH"
+
+
+def research_worker(state):
+    return {"messages": [AIMessage(content=f"'{state['messages'][0].content}'에 대한 연구 결과입니다.")]}
+
+
+def code_writer_worker(state):
+    return {"messages": [AIMessage(content=f"'{state['messages'][0].content}' 요청에 따른 코드")]}
+
+
+worker_map = {"Researcher": research_worker, "CodeWriter": code_writer_worker}
+
+
+def make_prompt(state):
+    return f"""현재 대화 내용: {[m.content for m in state['messages']]}.
+    당신은 Supervisor입니다. 다음으로 어떤 Worker를 호출해야 할까요?
+    선택지: [{', '.join(worker_map.keys())}, FINISH]
+    가장 적합한 Worker 이름 하나만 또는 FINISH를 반환하세요:"""
+
+
+def decide(response) -> dict:
+    name = response.content.strip()
+    return {"next_worker": name if name in worker_map else END}
+
+
+def build_graph(route, aroute=None):
+    workflow = StateGraph(SupervisorState)
+    if aroute is None:
+        workflow.add_node("supervisor", lambda state: decide(route(make_prompt(state))))
+    else:
+        async def supervisor(state):
+            return decide(await aroute(make_prompt(state)))
+
+        workflow.add_node("supervisor", supervisor)
+    for name, worker in worker_map.items():
+        workflow.add_node(name, worker)
+        workflow.add_edge(name, "supervisor")
+    workflow.add_conditional_edges(
+        "supervisor", lambda state: state["next_worker"], [*worker_map, END]
+    )
+    workflow.set_entry_point("supervisor")
+    return workflow.compile()
+
+
+def session_input(i, same_prompt):
+    text = "LangGraph에 대해 조사하고 간단한 예제 코드를 작성해줘."
+    return {"messages": [HumanMessage(content=text if same_prompt else f"[세션 {i}] {text}")]}
+
+
+def run_threads(name, graph, sessions, same_prompt, stub):
+    before = stub.requests
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        list(pool.map(lambda i: graph.invoke(session_input(i, same_prompt)), range(sessions)))
+    report(name, sessions, time.perf_counter() - start, stub.requests - before)
+
+
+async def run_async(name, graph, sessions, same_prompt, stub):
+    before = stub.requests
+    start = time.perf_counter()
+    await asyncio.gather(*(graph.ainvoke(session_input(i, same_prompt)) for i in range(sessions)))
+    report(name, sessions, time.perf_counter() - start, stub.requests - before)
+
+
+def report(name, sessions, elapsed, requests):
+    # 세션마다 라우팅 결정 3번 (Researcher, CodeWriter, FINISH)
+    print(f"[{name}] 세션 {sessions}개 {elapsed:.2f}s, 라우팅 {sessions * 3 / elapsed:.0f}회/s, "
+          f"LLM 요청 {requests}회")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--window", type=float, default=0.02)
+    parser.add_argument("--max-batch", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--slots", type=int, default=8, help="스텁 서버가 동시에 처리하는 요청 수")
+    parser.add_argument("--same-prompt", action="store_true", help="모든 세션이 같은 질문으로 시작")
+    args = parser.parse_args()
+
+    def fresh_llm():
+        # 모드마다 새 스텁 서버를 띄움 (이전 모드가 남긴 keep-alive 연결 영향을 없애고,
+        # base_url 이 달라지므로 openai 클라이언트도 새로 만들어짐)
+        url, stop, stub = start_in_process(latency=args.latency, reply=route_reply, slots=args.slots)
+        return ChatOpenAI(base_url=url, api_key="stub", model_name="stub"), stub, stop
+
+    llm, stub, stop = fresh_llm()
+    run_threads("호출마다 invoke", build_graph(llm.invoke), args.sessions, args.same_prompt, stub)
+    stop()
+
+    llm, stub, stop = fresh_llm()
+    batcher = MicroBatcher(llm, window=args.window, max_batch=args.max_batch)
+    run_threads("MicroBatcher.invoke", build_graph(batcher.invoke), args.sessions, args.same_prompt, stub)
+    print(f"  묶음 {batcher.stats['batches']}개, 평균 {(batcher.stats['calls'] - batcher.stats['direct']) / max(1, batcher.stats['batches']):.1f}개씩, 바로 보냄 {batcher.stats['direct']}개")
+    stop()
+
+    # 스텁 서버 프로세스는 이벤트 루프 밖에서 fork 해야 하므로 미리 띄워 둠
+    servers = [fresh_llm(), fresh_llm()]
+
+    async def run_async_modes():
+        # openai 비동기 클라이언트의 연결은 처음 쓴 이벤트 루프에 묶이므로 한 루프에서 실행
+        llm, stub, _ = servers[0]
+        await run_async("호출마다 ainvoke", build_graph(None, llm.ainvoke), args.sessions, args.same_prompt, stub)
+        llm, stub, _ = servers[1]
+        batcher = MicroBatcher(llm, window=args.window, max_batch=args.max_batch)
+        await run_async("MicroBatcher.ainvoke", build_graph(None, batcher.ainvoke), args.sessions, args.same_prompt, stub)
+        print(f"  묶음 {batcher.stats['batches']}개, 평균 {(batcher.stats['calls'] - batcher.stats['direct']) / max(1, batcher.stats['batches']):.1f}개씩, 바로 보냄 {batcher.stats['direct']}개")
+
+    asyncio.run(run_async_modes())
+    for _, _, stop in servers:
+        stop()
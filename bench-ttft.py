@@ -0,0 +1,95 @@
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from langgraph.checkpoint.memory import MemorySaver
+
+from graph_server import build_chat_graph, start_in_thread
+from stub_llm_server import start_in_process
+
+# graph_server 의 첫 토큰까지 걸리는 시간(TTFT) 측정
+# 사용법: python bench-ttft.py --clients 1,16,64 --latency 0.2 --token-delay 0.02 --words 50
+#
+# 스텁 LLM 은 latency 초 뒤에 첫 토큰을 보내고 이후 token_delay 초마다 한 단어씩 보냅니다(응답 words+1 단어).
+#   첫 토큰   event: token 이 처음 도착한 시각 (stream_mode="messages")
+#   첫 업데이트 call_model 이 끝나 event: update 가 도착한 시각 = 지금의 stream_mode="values" 로 처음 보이는 시각
+# 마지막에는 첫 토큰을 받자마자 연결을 끊는 클라이언트로 서버가 그래프 실행을 취소하는지 확인합니다.
+
+
+async def request(base_url, thread_id, words, disconnect_after_first=False):
+    host, port = base_url.removeprefix("http://").split(":")
+    reader, writer = await asyncio.open_connection(host, int(port))
+    body = json.dumps({
+        "thread_id": thread_id,
+        "input": {"messages": [{"role": "user", "content": " ".join(["단어"] * words)}]},
+    }).encode()
+    start = time.perf_counter()
+    writer.write(
+        f"POST /graphs/chat/stream HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+    )
+    await writer.drain()
+    first_token = first_update = None
+    tokens = 0
+    event = None
+    while line := await reader.readline():
+        line = line.decode().rstrip("\n")
+        if line.startswith("event: "):
+            event = line[7:]
+        elif line.startswith("data: ") and event == "token":
+            tokens += 1
+            if first_token is None:
+                first_token = time.perf_counter() - start
+                if disconnect_after_first:
+                    break
+        elif line.startswith("data: ") and event == "update" and first_update is None:
+            first_update = time.perf_counter() - start
+        elif line.startswith("data: ") and event == "error":
+            raise RuntimeError(line[6:])
+    writer.close()
+    return first_token, first_update, time.perf_counter() - start, tokens
+
+
+def summary(samples):
+    samples = sorted(samples)
+    pick = lambda q: samples[min(len(samples) - 1, int(len(samples) * q))] * 1000
+    return f"p50 {pick(0.5):6.0f}ms p99 {pick(0.99):6.0f}ms"
+
+
+async def run(base_url, clients, words):
+    results = await asyncio.gather(*(request(base_url, f"c{clients}-{i}", words) for i in range(clients)))
+    ttft, update, total, tokens = zip(*results)
+    print(f"동시 {clients:>4}: 첫 토큰 {summary(ttft)} | 첫 업데이트(values) {summary(update)} | "
+          f"전체 {summary(total)} | 토큰 {statistics.mean(tokens):.0f}개", flush=True)
+
+
+async def cancel_check(base_url, server, words):
+    before = server.cancelled
+    await asyncio.gather(*(request(base_url, f"cancel-{i}", words, disconnect_after_first=True) for i in range(8)))
+    await asyncio.sleep(0.5)
+    print(f"첫 토큰 뒤 끊은 연결 8개 -> 서버가 취소한 실행 {server.cancelled - before}개, 실행 중 {server.active}개")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", default="1,16,64")
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--token-delay", type=float, default=0.02)
+    parser.add_argument("--words", type=int, default=50, help="응답 길이 (스텁은 질문을 그대로 되돌려줌)")
+    args = parser.parse_args()
+
+    llm_url, stop_llm, _ = start_in_process(latency=args.latency, token_delay=args.token_delay)
+    # 동시 클라이언트가 모두 바로 LLM 을 부르도록 동시 요청 제한을 클라이언트 수에 맞춤
+    graph = build_chat_graph(llm_url, "stub", MemorySaver(), max_concurrency=max(map(int, args.clients.split(","))) + 8)
+    base_url, stop_server, server = start_in_thread({"chat": graph})
+    try:
+        print(f"LLM 첫 토큰 {args.latency * 1000:.0f}ms, 토큰 간격 {args.token_delay * 1000:.0f}ms, "
+              f"응답 {args.words + 1}단어 (전부 받는 데 약 {(args.latency + args.words * args.token_delay) * 1000:.0f}ms)")
+        for clients in map(int, args.clients.split(",")):
+            asyncio.run(run(base_url, clients, args.words))
+        asyncio.run(cancel_check(base_url, server, args.words))
+    finally:
+        stop_server()
+        stop_llm()
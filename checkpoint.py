@@ -1,26 +1,49 @@
+import asyncio
+
 from langgraph.graph import StateGraph, MessagesState, START
-from langchain_openai import ChatOpenAI
+from langchain_core.runnables import RunnableLambda
+from lazy_imports import lazy_chat_openai
+from langchain_core.globals import set_llm_cache
+from llm_cache import ResponseCache
 
 from dotenv import load_dotenv
-from langgraph.checkpoint.memory import MemorySaver
+from sqlite_saver import SqliteSaver
+from write_behind import WriteBehindSaver
+from retention import RetentionSaver
+from context_window import ContextWindow
 
 load_dotenv()
 
-model = ChatOpenAI(
+# 대화 기록까지 똑같은 요청은 llm-cache.db 에 저장된 응답으로 대신함
+set_llm_cache(ResponseCache("llm-cache.db"))
+
+model = lazy_chat_openai(
     base_url="http://localhost:1234/v1",
     model_name="l3-8b-stheno-v3.1-iq-imatrix"
 )
+# 오래된 대화는 요약으로 접어서 토큰 예산(2000) 안에서 모델을 호출
+context = ContextWindow(model, max_tokens=2000, keep_last=6)
 
 def call_model(state: MessagesState):
-    response = model.invoke(state["messages"])
+    response = model.invoke(context.view(state["messages"]))
+    return {"messages": response}
+
+# ainvoke / astream 으로 실행할 때 쓰는 비동기 버전 (요약이 필요하면 context.view 가 LLM 을 동기로 부르므로 스레드에서)
+async def acall_model(state: MessagesState):
+    messages = await asyncio.to_thread(context.view, state["messages"])
+    response = await model.ainvoke(messages)
     return {"messages": response}
 
 
 builder = StateGraph(MessagesState)
-builder.add_node("call_model", call_model)
+builder.add_node("call_model", RunnableLambda(call_model, afunc=acall_model))
 builder.add_edge(START, "call_model")
 
-memory = MemorySaver()
+memory = RetentionSaver(
+    WriteBehindSaver(SqliteSaver("checkpoint.db")), # 저장은 백그라운드에서, 그래프가 멈추면 즉시 저장
+    keep_last=20, # 스레드마다 최신 20개 체크포인트만 유지 (그 이전 기록은 스냅샷으로 접어 넣음)
+    ttl=7 * 24 * 3600, # 일주일 동안 사용하지 않은 스레드는 삭제
+)
 graph = builder.compile(checkpointer=memory)
 
 config1 = {"configurable": {"thread_id": "1"}}
@@ -0,0 +1,454 @@
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterator, Sequence
+from typing import Any, Optional
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+)
+from langgraph.checkpoint.serde.types import ERROR, INTERRUPT, TASKS
+
+# 체크포인트 저장 빈도 정책
+# 정책은 event(dict) 를 받아 지금 저장할지 여부를 반환하는 호출 가능한 객체입니다.
+#   event = {
+#       "step": 현재 superstep,
+#       "skipped": 마지막 저장 이후 건너뛴 체크포인트 수,
+#       "elapsed": 마지막 저장 이후 경과 시간(초),
+#       "dirty": 마지막 저장 이후 값이 바뀐 채널 이름 집합,
+#   }
+# 그래프가 멈추는 지점(종료, interrupt, update_state, 에러)은 정책과 상관없이 항상 저장됩니다.
+
+
+class EveryNSteps:
+    """N 번째 체크포인트마다 저장"""
+
+    def __init__(self, n: int):
+        self.n = n
+
+    def __call__(self, event: dict) -> bool:
+        return event["skipped"] + 1 >= self.n
+
+
+class EveryTSeconds:
+    """마지막 저장 이후 T초가 지났으면 저장"""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+
+    def __call__(self, event: dict) -> bool:
+        return event["elapsed"] >= self.seconds
+
+
+class OnlyAtBoundaries:
+    """중간 스텝은 저장하지 않고 그래프가 멈추는 지점에서만 저장"""
+
+    def __call__(self, event: dict) -> bool:
+        return False
+
+
+class DirtyChannels:
+    """지정한 채널 중 하나라도 값이 바뀌었을 때만 저장 (예: DirtyChannels(["messages"]))"""
+
+    def __init__(self, channels: Sequence[str]):
+        self.channels = set(channels)
+
+    def __call__(self, event: dict) -> bool:
+        return bool(self.channels & event["dirty"])
+
+
+class AnyOf:
+    """여러 정책 중 하나라도 저장을 원하면 저장"""
+
+    def __init__(self, *policies):
+        self.policies = policies
+
+    def __call__(self, event: dict) -> bool:
+        return any(policy(event) for policy in self.policies)
+
+
+def _null_version(versions: ChannelVersions):
+    return type(next(iter(versions.values()), ""))()
+
+
+def next_nodes(checkpoint: Checkpoint) -> set[str]:
+    """체크포인트 기준으로 다음 superstep 에 실행될 노드 이름을 계산합니다.
+
+    prepare_next_tasks 처럼 값이 남아 있는 트리거 채널만 셉니다 (소비된 branch:to:* / __start__ 채널은
+    버전만 올라가고 값이 없음).
+    """
+    versions = checkpoint["channel_versions"]
+    values = checkpoint["channel_values"]
+    seen = checkpoint["versions_seen"]
+    null = _null_version(versions)
+    nodes = set()
+    for channel, version in versions.items():
+        if channel.startswith("branch:to:"):
+            node = channel[len("branch:to:"):]
+        elif channel == "__start__":
+            node = "__start__"
+        else:
+            continue
+        if channel in values and version > seen.get(node, {}).get(channel, null):
+            nodes.add(node)
+    return nodes
+
+
+class BoundaryDetector:
+    """그래프가 멈추는 지점(재개 가능한 체크포인트가 반드시 저장돼 있어야 하는 곳)을 판별.
+
+    종료(다음 노드 없음), interrupt_before 노드 직전, interrupt_after 노드 직후,
+    update_state / fork 로 만든 체크포인트가 경계입니다.
+    """
+
+    def __init__(self, interrupt_before: Sequence[str] = (), interrupt_after: Sequence[str] = ()):
+        self.interrupt_before = set(interrupt_before)
+        self.interrupt_after = set(interrupt_after)
+        # (thread_id, ns) -> 직전 체크포인트의 versions_seen (interrupt_after 감지용)
+        self.last_seen: OrderedDict[tuple[str, str], dict] = OrderedDict()
+        self.lock = threading.Lock()
+
+    def __call__(self, key, checkpoint: Checkpoint, metadata: CheckpointMetadata) -> bool:
+        if metadata.get("source") in ("update", "fork"):
+            return True
+        nodes = next_nodes(checkpoint)
+        if not nodes or nodes & self.interrupt_before:
+            return True
+        if self.interrupt_after:
+            seen = {n: checkpoint["versions_seen"].get(n) for n in self.interrupt_after}
+            with self.lock:
+                previous = self.last_seen.get(key)
+                self.last_seen[key] = seen
+                self.last_seen.move_to_end(key)
+                if len(self.last_seen) > 4096:
+                    self.last_seen.popitem(last=False)
+            # 이전 기록이 없으면 안전하게 경계로 취급
+            if previous is None or any(previous[n] != seen[n] for n in seen):
+                return True
+        return False
+
+
+class ThrottledSaver(BaseCheckpointSaver):
+    """정책에 따라 체크포인트 저장을 건너뛰는 체크포인터 래퍼.
+
+    건너뛴 체크포인트는 버리지 않고 스레드마다 최신 하나를 메모리에 들고 있다가,
+    다음에 저장할 때 그 사이에 바뀐 채널을 모두 합쳐서 한 번에 씁니다. 저장된
+    체크포인트의 부모는 마지막으로 저장된 체크포인트로 이어지므로 히스토리가 끊기지
+    않고, 아직 저장되지 않은 체크포인트도 get_state 로 조회할 수 있습니다.
+
+    그래프가 멈추는 지점(종료, interrupt_before / interrupt_after 노드, 노드 안의
+    interrupt(), 에러, update_state)에서는 정책과 상관없이 저장하므로 재개 가능한
+    체크포인트는 항상 디스크(또는 inner 저장소)에 남아 있습니다.
+
+        ThrottledSaver(SqliteSaver("checkpoint.db"), EveryNSteps(5),
+                       interrupt_before=["step_2"])
+    """
+
+    def __init__(
+        self,
+        inner: BaseCheckpointSaver,
+        policy=None,
+        *,
+        interrupt_before: Sequence[str] = (),
+        interrupt_after: Sequence[str] = (),
+    ) -> None:
+        super().__init__(serde=inner.serde)
+        self.inner = inner
+        self.policy = policy or OnlyAtBoundaries()
+        self.is_boundary = BoundaryDetector(interrupt_before, interrupt_after)
+        self.lock = threading.RLock()
+        # (thread_id, ns) -> 아직 저장하지 않은 최신 체크포인트
+        self.pending: dict[tuple[str, str], dict] = {}
+        # (thread_id, ns) -> 마지막 저장 시각
+        self.last_write: dict[tuple[str, str], float] = {}
+        # (thread_id, ns) -> inner 에 쓰는 중인 체크포인트 (비동기로 쓰는 동안에도 조회되도록)
+        self.writing: dict[tuple[str, str], dict] = {}
+
+    def get_next_version(self, current, channel):
+        return self.inner.get_next_version(current, channel)
+
+    @staticmethod
+    def _entry_config(entry: dict) -> RunnableConfig:
+        return {
+            "configurable": {
+                **entry["config"]["configurable"],
+                "checkpoint_id": entry["checkpoint"]["id"],
+            }
+        }
+
+    def _flush_entry(self, entry: dict) -> None:
+        self.inner.put(entry["config"], entry["checkpoint"], entry["metadata"], entry["new_versions"])
+        for task_id, writes, task_path in entry["writes"]:
+            self.inner.put_writes(self._entry_config(entry), writes, task_id, task_path)
+
+    async def _aflush_entry(self, entry: dict) -> None:
+        await self.inner.aput(entry["config"], entry["checkpoint"], entry["metadata"], entry["new_versions"])
+        for task_id, writes, task_path in entry["writes"]:
+            await self.inner.aput_writes(self._entry_config(entry), writes, task_id, task_path)
+
+    def _start_write(self, key: tuple[str, str], entry: dict) -> None:
+        """entry 를 inner 에 쓰기로 함 (self.lock 안에서 호출, 다 쓰면 _end_write)"""
+        self.last_write[key] = time.monotonic()
+        self.writing[key] = entry
+
+    def _end_write(self, key: tuple[str, str], entry: dict) -> None:
+        with self.lock:
+            if self.writing.get(key) is entry:
+                del self.writing[key]
+
+    def _take_pending(self, thread_id: Optional[str]) -> list[tuple[tuple[str, str], dict]]:
+        with self.lock:
+            taken = [
+                (key, self.pending.pop(key))
+                for key in [k for k in self.pending if thread_id is None or k[0] == thread_id]
+            ]
+            for key, entry in taken:
+                self._start_write(key, entry)
+        return taken
+
+    def flush(self, thread_id: Optional[str] = None) -> None:
+        """메모리에 들고 있는 체크포인트를 inner 저장소에 씁니다."""
+        with self.lock:
+            for key, entry in self._take_pending(thread_id):
+                try:
+                    self._flush_entry(entry)
+                finally:
+                    self._end_write(key, entry)
+
+    async def aflush(self, thread_id: Optional[str] = None) -> None:
+        """flush 의 비동기 버전 (inner 의 비동기 메서드로 씀)"""
+        for key, entry in self._take_pending(thread_id):
+            try:
+                await self._aflush_entry(entry)
+            finally:
+                self._end_write(key, entry)
+
+    def _stage(self, key, config, checkpoint, metadata, new_versions) -> list[dict]:
+        """체크포인트를 메모리에 들고 있을지 정하고, 지금 inner 에 써야 할 항목을 순서대로 돌려줌.
+
+        self.lock 안에서 호출하고, 돌려받은 항목을 다 쓰면 _end_write 로 알림
+        """
+        entry = {
+            "config": config,
+            "checkpoint": checkpoint,
+            "metadata": metadata,
+            "new_versions": dict(new_versions),
+            "writes": [],
+            "skipped": 0,
+        }
+        to_write = []
+        previous = self.pending.pop(key, None)
+        if previous is not None:
+            if (
+                get_checkpoint_id(config) == previous["checkpoint"]["id"]
+                and not previous.get("has_sends")
+            ):
+                # 건너뛴 체크포인트를 합침: 부모는 마지막 저장본, 바뀐 채널은 누적
+                entry["config"] = previous["config"]
+                entry["new_versions"] = {
+                    channel: checkpoint["channel_versions"][channel]
+                    for channel in {**previous["new_versions"], **new_versions}
+                    if channel in checkpoint["channel_versions"]
+                }
+                entry["skipped"] = previous["skipped"] + 1
+            else:
+                # 다른 체크포인트에서 갈라졌거나 Send 가 걸려 있으면 합칠 수 없음
+                to_write.append(previous)
+                self._start_write(key, previous)
+
+        event = {
+            "step": metadata.get("step"),
+            "skipped": entry["skipped"],
+            "elapsed": time.monotonic() - self.last_write.get(key, 0.0),
+            "dirty": set(entry["new_versions"]),
+        }
+        if self.is_boundary(key, checkpoint, metadata) or self.policy(event):
+            to_write.append(entry)
+            self._start_write(key, entry)
+        else:
+            self.pending[key] = entry
+        return to_write
+
+    @staticmethod
+    def _key(config: RunnableConfig) -> tuple[str, str]:
+        return config["configurable"]["thread_id"], config["configurable"].get("checkpoint_ns", "")
+
+    @staticmethod
+    def _put_result(key: tuple[str, str], checkpoint: Checkpoint) -> RunnableConfig:
+        return {
+            "configurable": {
+                "thread_id": key[0],
+                "checkpoint_ns": key[1],
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        key = self._key(config)
+        with self.lock:
+            for entry in self._stage(key, config, checkpoint, metadata, new_versions):
+                try:
+                    self._flush_entry(entry)
+                finally:
+                    self._end_write(key, entry)
+        return self._put_result(key, checkpoint)
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        key = self._key(config)
+        with self.lock:
+            held = self._hold_writes(key, config, writes, task_id, task_path)
+            if held is None:
+                self.inner.put_writes(config, writes, task_id, task_path)
+            elif held:
+                self.flush(key[0])
+
+    def _hold_writes(self, key, config, writes, task_id, task_path) -> Optional[bool]:
+        """들고 있는 체크포인트의 write 면 붙여 두고 지금 flush 해야 하는지를, 아니면 None 을 돌려줌"""
+        entry = self.pending.get(key)
+        if entry is None or entry["checkpoint"]["id"] != get_checkpoint_id(config):
+            return None
+        entry["writes"].append((task_id, list(writes), task_path))
+        channels = {channel for channel, _ in writes}
+        if TASKS in channels:
+            # Send 는 다음 체크포인트가 부모의 write 에서 읽어 가므로 합치지 않음
+            entry["has_sends"] = True
+        # 노드 안의 interrupt() 또는 에러로 그래프가 멈추는 지점
+        return bool(channels & {INTERRUPT, ERROR})
+
+    def _pending_tuple(self, entry: dict) -> CheckpointTuple:
+        config = entry["config"]["configurable"]
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": config["thread_id"],
+                    "checkpoint_ns": config.get("checkpoint_ns", ""),
+                    "checkpoint_id": entry["checkpoint"]["id"],
+                }
+            },
+            checkpoint=entry["checkpoint"],
+            metadata=entry["metadata"],
+            parent_config=entry["config"] if get_checkpoint_id(entry["config"]) else None,
+            pending_writes=[
+                (task_id, channel, value)
+                for task_id, writes, _ in entry["writes"]
+                for channel, value in writes
+            ],
+        )
+
+    def _held_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        key = self._key(config)
+        checkpoint_id = get_checkpoint_id(config)
+        with self.lock:
+            # 들고 있는 것이 더 최신이고, 쓰는 중인 것은 inner 에 아직 없을 수 있음
+            for entry in (self.pending.get(key), self.writing.get(key)):
+                if entry is not None and checkpoint_id in (None, entry["checkpoint"]["id"]):
+                    return self._pending_tuple(entry)
+        return None
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return self._held_tuple(config) or self.inner.get_tuple(config)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        held, limit = self._held_list(config, filter, before, limit)
+        yield from held
+        if limit is None or limit > 0:
+            yield from self.inner.list(config, filter=filter, before=before, limit=limit)
+
+    def _held_list(self, config, filter, before, limit) -> tuple:
+        """list 에서 inner 보다 먼저 돌려줄 들고 있는 체크포인트와 남은 limit"""
+        with self.lock:
+            entries = [
+                entry
+                for (thread_id, checkpoint_ns), entry in self.pending.items()
+                if config is None
+                or (
+                    thread_id == config["configurable"]["thread_id"]
+                    and config["configurable"].get("checkpoint_ns") in (None, checkpoint_ns)
+                    and get_checkpoint_id(config) in (None, entry["checkpoint"]["id"])
+                )
+            ]
+        before_id = get_checkpoint_id(before) if before else None
+        held = []
+        for entry in entries:
+            # InMemorySaver.list 처럼 checkpoint_id 가 없는 before 는 무시
+            if before_id and entry["checkpoint"]["id"] >= before_id:
+                continue
+            if filter and not all(entry["metadata"].get(k) == v for k, v in filter.items()):
+                continue
+            if limit is not None:
+                if limit <= 0:
+                    break
+                limit -= 1
+            held.append(self._pending_tuple(entry))
+        return held, limit
+
+    def _forget(self, thread_id: str) -> None:
+        with self.lock:
+            for held in (self.pending, self.writing):
+                for key in [k for k in held if k[0] == thread_id]:
+                    del held[key]
+
+    def delete_thread(self, thread_id: str) -> None:
+        self._forget(thread_id)
+        self.inner.delete_thread(thread_id)
+
+    # 비동기 메서드: 들고 있을지는 잠금 안에서 바로 정하고, inner 저장소는 비동기 메서드로 읽고 씀
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return self._held_tuple(config) or await self.inner.aget_tuple(config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        held, limit = self._held_list(config, filter, before, limit)
+        for item in held:
+            yield item
+        if limit is None or limit > 0:
+            async for item in self.inner.alist(config, filter=filter, before=before, limit=limit):
+                yield item
+
+    async def aput(self, config, checkpoint, metadata, new_versions) -> RunnableConfig:
+        key = self._key(config)
+        with self.lock:
+            entries = self._stage(key, config, checkpoint, metadata, new_versions)
+        for entry in entries:
+            try:
+                await self._aflush_entry(entry)
+            finally:
+                self._end_write(key, entry)
+        return self._put_result(key, checkpoint)
+
+    async def aput_writes(self, config, writes, task_id, task_path="") -> None:
+        key = self._key(config)
+        with self.lock:
+            held = self._hold_writes(key, config, writes, task_id, task_path)
+        if held is None:
+            await self.inner.aput_writes(config, writes, task_id, task_path)
+        elif held:
+            await self.aflush(key[0])
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        self._forget(thread_id)
+        await self.inner.adelete_thread(thread_id)
@@ -1,12 +1,17 @@
 from langgraph.graph import StateGraph, MessagesState, START
-from langchain_openai import ChatOpenAI
+from lazy_imports import lazy_chat_openai
+from langchain_core.globals import set_llm_cache
+from llm_cache import ResponseCache
 
 from dotenv import load_dotenv
 from langgraph.checkpoint.memory import MemorySaver
+from checkpoint_policy import ThrottledSaver, AnyOf, EveryNSteps, EveryTSeconds
 
 load_dotenv()
 
-model = ChatOpenAI(
+set_llm_cache(ResponseCache("llm-cache.db"))
+
+model = lazy_chat_openai(
     base_url="http://localhost:1234/v1",
     model_name="l3-8b-stheno-v3.1-iq-imatrix"
 )
@@ -20,20 +25,14 @@ builder = StateGraph(MessagesState)
 builder.add_node("call_model", call_model)
 builder.add_edge(START, "call_model")
 
-class ConditionalMemorySaver(MemorySaver):
-    def __init__(self, condition_func):
-        super().__init__()
-        self.condition_func = condition_func
-
-    def put(self, config, metadata, values):
-        if self.condition_func(values):
-            super().put(config, metadata, values)
-
-def should_checkpoint(state):
-    # 예: 중요한 변경사항이 있을 때만 체크포인트 생성
-    return len(state['messages']) % 2 == 0  # 5개 메시지마다 체크포인트
-
-condition_memory = ConditionalMemorySaver(should_checkpoint)
+# put() 을 조건에 따라 그냥 버리면 부모 체크포인트 연결이 끊기고 get_state 가
+# 오래된 상태를 돌려주게 됩니다. ThrottledSaver 는 건너뛴 스텝을 메모리에 들고 있다가
+# 다음 저장 때 합쳐서 쓰고, 그래프가 멈추는 지점에서는 항상 저장합니다.
+condition_memory = ThrottledSaver(
+    MemorySaver(),
+    # 예: 2 스텝마다 또는 5초가 지나면 체크포인트 생성
+    AnyOf(EveryNSteps(2), EveryTSeconds(5)),
+)
 graph = builder.compile(checkpointer=condition_memory)
 
 config1 = {"configurable": {"thread_id": "1"}}
@@ -45,3 +44,8 @@ for chunk in graph.stream({"messages": [input_message]}, config=config1, stream_
 input_message = {"type": "user", "content": "내 이름이 뭐야?"}
 for chunk in graph.stream({"messages": [input_message]}, config=config1, stream_mode="values"):
     chunk["messages"][-1].pretty_print()
+
+# 저장을 건너뛴 스텝이 있어도 get_state 는 항상 최신 상태를 돌려줌
+print(graph.get_state(config1).values)
+for checkpoint in graph.get_state_history(config1):
+    print(checkpoint.metadata.get("step"), checkpoint.parent_config)
@@ -0,0 +1,151 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Sequence
+
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage, ToolMessage
+
+# LLM 에 넘기는 대화 기록을 토큰 예산 안으로 줄이는 컨텍스트 관리자
+#
+#   context = ContextWindow(model, max_tokens=2000, keep_last=6)
+#   response = model.invoke(context.view(state["messages"]))
+#
+# 최근 keep_last 개(최대 keep_last + summarize_every - 1 개) 메시지는 그대로 두고, 그보다 오래된
+# 메시지는 요약 하나로 바꿉니다. 요약은 "앞부분 메시지들의 해시 -> 요약" 으로 캐시해서 다음
+# 턴에는 새로 밀려난 메시지만 이전 요약에 덧붙여 갱신합니다 (턴마다 전체를 다시 요약하지 않음).
+# 예산을 넘을 때도 경계는 summarize_every 개 단위로만 움직이므로 요약은 그만큼 메시지가 쌓일 때 한 번씩 하고,
+# 마지막 사람 메시지부터의 현재 턴은 요약하지 않고 항상 그대로 넘깁니다 (그래서 예산을 조금 넘을 수 있음).
+# 스레드 id 가 필요 없으므로 checkpointer 가 없는 그래프에서도 그대로 쓸 수 있습니다.
+
+
+def approx_tokens(messages: Sequence[BaseMessage]) -> int:
+    """토크나이저 없이 어림한 토큰 수 (영문 4글자당 1토큰, 한글 등은 1글자당 1토큰 정도)"""
+    total = 0
+    for message in messages:
+        text = message.content if isinstance(message.content, str) else str(message.content)
+        ascii_chars = sum(1 for ch in text if ch.isascii())
+        total += 4 + ascii_chars // 4 + (len(text) - ascii_chars)
+        for call in getattr(message, "tool_calls", None) or []:
+            total += 8 + len(str(call.get("args", ""))) // 4
+    return total
+
+
+def render(messages: Sequence[BaseMessage]) -> str:
+    """프롬프트 문자열에 넣기 위한 "역할: 내용" 형식"""
+    return "\n".join(f"{message.type}: {message.content}" for message in messages)
+
+
+class ContextWindow:
+    """토큰 예산 안에서 [요약] + 최근 메시지로 이루어진 대화 뷰를 만듦"""
+
+    def __init__(
+        self,
+        summarizer,
+        *,
+        max_tokens: int = 2000,
+        keep_last: int = 6,
+        summarize_every: int = 4,
+        summary_tokens: int = 300,
+        token_counter: Callable[[Sequence[BaseMessage]], int] = approx_tokens,
+        cache_size: int = 1024,
+    ):
+        self.summarizer = summarizer
+        self.max_tokens = max_tokens
+        self.keep_last = keep_last
+        self.summarize_every = summarize_every
+        self.summary_tokens = summary_tokens
+        self.token_counter = token_counter
+        # 앞부분 메시지 해시 -> 요약 (LRU)
+        self.summaries: OrderedDict[str, str] = OrderedDict()
+        self.cache_size = cache_size
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _prefix_hashes(messages: Sequence[BaseMessage], upto: int) -> list[str]:
+        # hashes[i] = messages[:i] 의 해시 (이어서 계산하므로 O(upto))
+        digest = hashlib.sha256()
+        hashes = [digest.hexdigest()]
+        for message in messages[:upto]:
+            digest.update(f"{message.type}\x00{message.content}\x00".encode())
+            for call in getattr(message, "tool_calls", None) or []:
+                digest.update(f"{call.get('name')}{call.get('args')}\x00".encode())
+            hashes.append(digest.copy().hexdigest())
+        return hashes
+
+    def _boundary(self, messages: Sequence[BaseMessage], start: int, budget: int) -> int:
+        # 요약으로 넘길 경계: start 에서 summarize_every 단위로만 움직여서 요약 호출 횟수를 줄임
+        step = self.summarize_every
+        # 현재 턴(마지막 사람 메시지부터)은 넘기지 않음
+        limit = next(
+            (i for i in range(len(messages) - 1, start - 1, -1) if isinstance(messages[i], HumanMessage)),
+            len(messages) - 1,
+        )
+        overflow = len(messages) - start - self.keep_last
+        boundary = start + max(0, overflow) // step * step
+        while boundary > limit:
+            boundary -= step
+        # 최근 메시지가 예산을 넘으면 한 단위씩 더 요약 쪽으로 넘김
+        while boundary + step <= limit and self.token_counter(messages[boundary:]) > budget:
+            boundary += step
+        # ToolMessage 가 짝이 되는 AIMessage(tool_calls) 없이 남지 않도록 경계를 뒤로 미룸
+        while boundary < limit and isinstance(messages[boundary], ToolMessage):
+            boundary += 1
+        return max(boundary, start)
+
+    def _summarize(self, previous: str, messages: Sequence[BaseMessage]) -> str:
+        prompt = (
+            f"지금까지의 대화 요약:\n{previous or '(없음)'}\n\n"
+            f"이어지는 대화:\n{render(messages)}\n\n"
+            f"위 내용을 모두 반영해서 대화 요약을 {self.summary_tokens} 토큰 이내로 갱신하세요. "
+            "이름, 사실, 결정된 내용은 빠뜨리지 마세요. 요약만 출력하세요."
+        )
+        response = self.summarizer.invoke(prompt)
+        return getattr(response, "content", response)
+
+    def summary(self, messages: Sequence[BaseMessage], upto: int) -> str:
+        """messages[:upto] 의 요약 (캐시된 가장 긴 앞부분 요약에서 이어서 갱신)"""
+        if upto == 0:
+            return ""
+        hashes = self._prefix_hashes(messages, upto)
+        with self.lock:
+            for n in range(upto, 0, -1):
+                if hashes[n] in self.summaries:
+                    self.summaries.move_to_end(hashes[n])
+                    previous = self.summaries[hashes[n]]
+                    break
+            else:
+                n, previous = 0, ""
+        if n == upto:
+            return previous
+        summary = self._summarize(previous, messages[n:upto])
+        with self.lock:
+            self.summaries[hashes[upto]] = summary
+            while len(self.summaries) > self.cache_size:
+                self.summaries.popitem(last=False)
+        return summary
+
+    def split(self, messages: Sequence[BaseMessage]) -> tuple[list[BaseMessage], str, list[BaseMessage]]:
+        """(맨 앞 시스템 메시지, 요약, 그대로 넘길 최근 메시지)"""
+        messages = list(messages)
+        head = messages[:1] if messages and isinstance(messages[0], SystemMessage) else []
+        budget = self.max_tokens - self.summary_tokens - self.token_counter(head)
+        boundary = self._boundary(messages, len(head), budget)
+        recent = messages[boundary:]
+        summary = self.summary(messages[len(head):], boundary - len(head))
+        return head, summary, recent
+
+    def view(self, messages: Sequence[BaseMessage]) -> list[BaseMessage]:
+        """LLM 에 그대로 넘길 메시지 목록"""
+        head, summary, recent = self.split(messages)
+        if summary:
+            head = head + [SystemMessage(content=f"이전 대화 요약:\n{summary}")]
+        return head + recent
+
+    def render(self, messages: Sequence[BaseMessage]) -> str:
+        """프롬프트 문자열에 넣을 대화 내용"""
+        head, summary, recent = self.split(messages)
+        parts = [render(head)] if head else []
+        if summary:
+            parts.append(f"이전 대화 요약: {summary}")
+        parts.append(render(recent))
+        return "\n".join(parts)
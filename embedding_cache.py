@@ -0,0 +1,161 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Callable, Sequence
+
+# 본문 해시로 찾는 임베딩 캐시
+#
+#   embed = EmbeddingCache(SentenceTransformerEmbedder(), "embedding-cache")
+#   vectors = embed(["LangGraph란 무엇인가?", ...])   # (n, dim) float32
+#
+# 같은 질문이나 바뀌지 않은 문서 청크를 다시 임베딩하지 않도록
+#   1) 프로세스 내 LRU (float32)
+#   2) 디스크: vectors.f16 (float16 행렬, mmap) + keys.db (sha256(namespace, 본문) -> 행 번호)
+# 순서로 찾고, 둘 다 없는 본문만 모아서 embed 를 한 번 호출합니다.
+# 반환값은 캐시 적중 여부와 상관없이 항상 float16 으로 반올림한 값이라 같은 입력에는 같은 벡터가 나옵니다.
+# 행 번호는 keys.db 트랜잭션 안에서 할당하므로 ingest.py 워커처럼 여러 프로세스가 같은 디렉터리를 써도 됩니다.
+
+VECTORS_FILE = "vectors.f16"
+KEYS_FILE = "keys.db"
+
+
+class EmbeddingCache:
+    def __init__(
+        self,
+        embed: Callable[[list[str]], object],
+        path: str = "embedding-cache",
+        *,
+        namespace: str = "",
+        memory_size: int = 10_000,
+    ):
+        self.embed = embed
+        self.path = path
+        # 모델마다 벡터가 다르므로 키에 모델 이름을 섞음 (기본: embed 의 model_name)
+        self.namespace = namespace or getattr(embed, "model_name", "")
+        self.memory: OrderedDict[bytes, object] = OrderedDict()
+        self.memory_size = memory_size
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "encode_calls": 0}
+        self.dim = None
+        self.matrix = None
+        self.lock = threading.RLock()
+        os.makedirs(path, exist_ok=True)
+        self.conn = sqlite3.connect(
+            os.path.join(path, KEYS_FILE), check_same_thread=False, isolation_level=None, timeout=30
+        )
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key BLOB PRIMARY KEY, row INTEGER)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER)")
+        row = self.conn.execute("SELECT value FROM meta WHERE name = 'dim'").fetchone()
+        if row:
+            self.dim = row[0]
+
+    @property
+    def vectors_path(self) -> str:
+        return os.path.join(self.path, VECTORS_FILE)
+
+    def key(self, text: str) -> bytes:
+        return hashlib.sha256(f"{self.namespace}\x00{text}".encode()).digest()
+
+    # 디스크 행렬
+    def _rows(self, rows: Sequence[int]):
+        import numpy as np
+
+        # 다른 프로세스가 파일을 늘렸으면 다시 매핑
+        needed = max(rows) + 1
+        if self.matrix is None or len(self.matrix) < needed:
+            size = os.path.getsize(self.vectors_path) // (2 * self.dim)
+            self.matrix = np.memmap(self.vectors_path, dtype=np.float16, mode="r+", shape=(size, self.dim))
+        return np.asarray(self.matrix[list(rows)], dtype=np.float32)
+
+    def _append(self, vectors) -> list[int]:
+        """행렬 끝에 벡터를 쓰고 행 번호를 반환 (행 할당은 다른 프로세스와 겹치지 않음)"""
+        import numpy as np
+
+        n = len(vectors)
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                self.conn.execute("INSERT OR IGNORE INTO meta VALUES ('dim', ?)", (self.dim,))
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"캐시의 임베딩 차원({self.dim})과 다릅니다: {vectors.shape[1]}")
+            row = self.conn.execute("SELECT value FROM meta WHERE name = 'rows'").fetchone()
+            start = row[0] if row else 0
+            self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('rows', ?)", (start + n,))
+            # 파일은 두 배씩 늘려서 append 마다 크기를 바꾸지 않음
+            capacity = os.path.getsize(self.vectors_path) // (2 * self.dim) if os.path.exists(self.vectors_path) else 0
+            if start + n > capacity:
+                with open(self.vectors_path, "ab") as f:
+                    f.truncate(max(start + n, capacity * 2, 1024) * 2 * self.dim)
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        if self.matrix is None or len(self.matrix) < start + n:
+            size = os.path.getsize(self.vectors_path) // (2 * self.dim)
+            self.matrix = np.memmap(self.vectors_path, dtype=np.float16, mode="r+", shape=(size, self.dim))
+        self.matrix[start:start + n] = vectors
+        self.matrix.flush()
+        return list(range(start, start + n))
+
+    # 조회
+    def _remember(self, key: bytes, vector) -> None:
+        self.memory[key] = vector
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_size:
+            self.memory.popitem(last=False)
+
+    def __call__(self, texts: list[str]):
+        import numpy as np
+
+        keys = [self.key(text) for text in texts]
+        found: dict[bytes, object] = {}
+        with self.lock:
+            for key in keys:
+                if key in self.memory and key not in found:
+                    self.memory.move_to_end(key)
+                    found[key] = self.memory[key]
+                    self.stats["memory_hits"] += 1
+            lookup = list(dict.fromkeys(key for key in keys if key not in found))
+            for start in range(0, len(lookup), 900):  # SQLite 변수 개수 제한
+                part = lookup[start:start + 900]
+                rows = self.conn.execute(
+                    f"SELECT key, row FROM embeddings WHERE key IN ({','.join('?' * len(part))})", part
+                ).fetchall()
+                if rows:
+                    for (key, _), vector in zip(rows, self._rows([row for _, row in rows])):
+                        found[key] = vector
+                        self._remember(key, vector)
+                    self.stats["disk_hits"] += len(rows)
+
+        # 캐시에 없는 본문만 모아서 한 번에 임베딩
+        missing = {key: text for key, text in zip(keys, texts) if key not in found}
+        if missing:
+            vectors = np.asarray(self.embed(list(missing.values())), dtype=np.float32)
+            vectors16 = vectors.astype(np.float16)
+            with self.lock:
+                rows = self._append(vectors16)
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO embeddings VALUES (?, ?)", list(zip(missing, rows))
+                )
+                for key, vector in zip(missing, vectors16.astype(np.float32)):
+                    found[key] = vector
+                    self._remember(key, vector)
+                self.stats["misses"] += len(missing)
+                self.stats["encode_calls"] += 1
+
+        if not keys:
+            return np.zeros((0, self.dim or 0), dtype=np.float32)
+        return np.stack([found[key] for key in keys])
+
+
+def cached_embedder(
+    model_name: str = "paraphrase-multilingual-MiniLM-L12-v2", path: str = "embedding-cache", **kwargs
+) -> EmbeddingCache:
+    """sentence-transformers 임베딩 함수를 디스크 캐시로 감싼 것"""
+    from llm_cache import SentenceTransformerEmbedder
+
+    return EmbeddingCache(SentenceTransformerEmbedder(model_name), path, namespace=model_name, **kwargs)
@@ -1,13 +1,19 @@
+import asyncio
+
 from langchain_core.messages import AnyMessage
 from langgraph.graph import add_messages
 from langgraph.func import entrypoint, task
-from langgraph.checkpoint.memory import InMemorySaver
-from langchain_openai import ChatOpenAI
+from sqlite_saver import SqliteSaver
+from lazy_imports import lazy_chat_openai
+from langchain_core.globals import set_llm_cache
+from llm_cache import ResponseCache
 from dotenv import load_dotenv
 
 load_dotenv()
 
-model = ChatOpenAI(
+set_llm_cache(ResponseCache("llm-cache.db"))
+
+model = lazy_chat_openai(
     base_url="http://localhost:1234/v1",
     model_name="l3-8b-stheno-v3.1-iq-imatrix"
 )
@@ -17,7 +23,8 @@ def call_model(messages: list[AnyMessage]):
     response = model.invoke(messages)
     return response
 
-checkpointer = InMemorySaver()
+# 대화가 길어져도 턴마다 늘어난 메시지만 저장 (delta 인코딩)
+checkpointer = SqliteSaver("function-api.db")
 
 @entrypoint(checkpointer=checkpointer)
 def workflow(inputs: list[AnyMessage], *, previous: list[AnyMessage]):
@@ -27,6 +34,19 @@ def workflow(inputs: list[AnyMessage], *, previous: list[AnyMessage]):
     response = call_model(inputs).result()
     return entrypoint.final(value=response, save=add_messages(inputs, response))
 
+# 비동기 버전: 이벤트 루프 하나에서 여러 대화를 동시에 돌릴 때 (await 하는 동안 다른 대화가 실행됨)
+@task
+async def acall_model(messages: list[AnyMessage]):
+    return await model.ainvoke(messages)
+
+@entrypoint(checkpointer=checkpointer)
+async def aworkflow(inputs: list[AnyMessage], *, previous: list[AnyMessage]):
+    if previous:
+        inputs = add_messages(previous, inputs)
+
+    response = await acall_model(inputs)
+    return entrypoint.final(value=response, save=add_messages(inputs, response))
+
 config = {
     "configurable": {
         "thread_id": "1"
@@ -45,4 +65,16 @@ for chunk in workflow.stream(
     config,
     stream_mode="values",
 ):
-    chunk.pretty_print()
\ No newline at end of file
+    chunk.pretty_print()
+
+async def chat_concurrently():
+    # 서로 다른 thread_id 의 대화 두 개를 동시에 진행
+    questions = {"2": "hi! I'm alice", "3": "hi! I'm carol"}
+    responses = await asyncio.gather(*(
+        aworkflow.ainvoke([{"role": "user", "content": content}], {"configurable": {"thread_id": thread_id}})
+        for thread_id, content in questions.items()
+    ))
+    for response in responses:
+        response.pretty_print()
+
+asyncio.run(chat_concurrently())
@@ -0,0 +1,153 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Callable
+
+# 컴파일된 그래프 레지스트리
+#
+#   @register("multi-agent")
+#   def build_multi_agent() -> StateGraph:
+#       workflow = StateGraph(...)
+#       ...
+#       return workflow
+#
+#   app = get_app("multi-agent")          # 프로세스마다 한 번만 build + compile
+#   print(draw("multi-agent", "ascii"))   # 디스크에 캐시된 그림 (grandalf 를 불러오지 않음)
+#
+# 그래프 정의(노드, 엣지, 조건부 엣지의 분기 대상, 상태 채널, compile 인자)의 해시를 키로
+# graph-cache/<해시>.json 에 검증 통과 여부와 ASCII/Mermaid 그림을 저장합니다.
+# 정의가 같으면 다음 프로세스에서는 validate() 와 그림 그리기를 건너뛰고, 정의가 바뀌면 해시가
+# 달라지므로 자동으로 다시 검증합니다.
+
+CACHE_DIR = "graph-cache"
+
+
+def _qualname(obj: Any) -> str:
+    obj = getattr(obj, "func", None) or getattr(obj, "afunc", None) or obj
+    return f"{getattr(obj, '__module__', '')}.{getattr(obj, '__qualname__', type(obj).__name__)}"
+
+
+def _channel(channel: Any) -> str:
+    # repr 에는 객체 주소가 들어가므로 채널 종류, 값 타입, reducer 이름으로 나타냄
+    parts = [type(channel).__name__, str(getattr(channel, "typ", ""))]
+    if getattr(channel, "operator", None) is not None:
+        parts.append(_qualname(channel.operator))
+    return ":".join(parts)
+
+
+def definition_hash(builder, **compile_kwargs) -> str:
+    """StateGraph 의 구조(그래프 모양과 상태 채널)와 compile 인자의 해시"""
+    import langgraph.version
+
+    definition = {
+        "langgraph": langgraph.version.__version__,
+        "nodes": sorted(
+            (name, _qualname(spec.runnable), sorted(spec.ends or ()))
+            for name, spec in builder.nodes.items()
+        ),
+        "edges": sorted(builder.edges),
+        "waiting_edges": sorted((list(starts), end) for starts, end in builder.waiting_edges),
+        "branches": sorted(
+            (source, name, sorted((str(k), v) for k, v in (branch.ends or {}).items()), branch.then)
+            for source, branches in builder.branches.items()
+            for name, branch in branches.items()
+        ),
+        "channels": sorted((key, _channel(channel)) for key, channel in builder.channels.items()),
+        "compile": {
+            key: type(value).__name__ if key in ("checkpointer", "store") else value
+            for key, value in sorted(compile_kwargs.items())
+        },
+    }
+    return hashlib.sha256(json.dumps(definition, default=str).encode()).hexdigest()[:16]
+
+
+class GraphRegistry:
+    def __init__(self, cache_dir: str = CACHE_DIR):
+        self.cache_dir = cache_dir
+        # 이름 -> (builder 함수, compile 인자)
+        self.builders: dict[str, tuple[Callable, dict]] = {}
+        # 이름 -> (정의 해시, 컴파일된 그래프)
+        self.compiled: dict[str, tuple[str, Any]] = {}
+        self.stats = {"compiles": 0, "validations_skipped": 0, "render_hits": 0, "render_misses": 0}
+        self.lock = threading.RLock()
+
+    def register(self, name: str, **compile_kwargs):
+        """StateGraph 를 돌려주는 함수를 name 으로 등록하는 데코레이터"""
+
+        def decorator(build: Callable):
+            with self.lock:
+                self.builders[name] = (build, compile_kwargs)
+                self.compiled.pop(name, None)
+            return build
+
+        return decorator
+
+    # 디스크 캐시
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, f"{digest}.json")
+
+    def _load(self, digest: str) -> dict:
+        try:
+            with open(self._path(digest), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _store(self, digest: str, **fields) -> None:
+        entry = {**self._load(digest), **fields}
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp = self._path(digest) + f".{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp, self._path(digest))
+
+    # 조회
+    def get(self, name: str):
+        """컴파일된 그래프 (프로세스 안에서는 처음 한 번만 만듦)"""
+        with self.lock:
+            if name in self.compiled:
+                return self.compiled[name][1]
+            build, compile_kwargs = self.builders[name]
+            builder = build()
+            digest = definition_hash(builder, **compile_kwargs)
+            skip_validation = bool(self._load(digest).get("validated"))
+            if skip_validation:
+                # 같은 정의가 이미 검증을 통과했으므로 compile() 안의 validate() 를 건너뜀
+                def validated(interrupt=None):
+                    builder.compiled = True
+                    return builder
+
+                builder.validate = validated
+                self.stats["validations_skipped"] += 1
+            app = builder.compile(**compile_kwargs)
+            self.stats["compiles"] += 1
+            if not skip_validation:
+                self._store(digest, name=name, validated=True)
+            self.compiled[name] = (digest, app)
+            return app
+
+    def definition(self, name: str) -> str:
+        """등록된 그래프의 정의 해시"""
+        self.get(name)
+        return self.compiled[name][0]
+
+    def draw(self, name: str, kind: str = "ascii") -> str:
+        """get_graph().draw_ascii() / draw_mermaid() 결과 (정의가 같으면 디스크 캐시에서 읽음)"""
+        app = self.get(name)
+        digest = self.compiled[name][0]
+        cached = self._load(digest).get(kind)
+        if cached is not None:
+            self.stats["render_hits"] += 1
+            return cached
+        self.stats["render_misses"] += 1
+        graph = app.get_graph()
+        drawing = graph.draw_ascii() if kind == "ascii" else graph.draw_mermaid()
+        self._store(digest, **{kind: drawing})
+        return drawing
+
+
+REGISTRY = GraphRegistry()
+register = REGISTRY.register
+get_app = REGISTRY.get
+draw = REGISTRY.draw
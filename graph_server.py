@@ -0,0 +1,233 @@
+import argparse
+import asyncio
+import json
+import threading
+import uuid
+from typing import Any, Optional
+
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+from scheduler import priority
+
+# 컴파일된 그래프를 HTTP 로 열어 두고 LLM 토큰과 노드 업데이트를 SSE 로 흘려보내는 서버
+#
+#   python graph_server.py --port 8000 --base-url http://localhost:1234/v1
+#   curl -N -X POST localhost:8000/graphs/chat/stream \
+#        -d '{"thread_id": "1", "input": {"messages": [{"role": "user", "content": "안녕"}]}}'
+#
+#   GET  /graphs                   등록된 그래프 이름
+#   POST /graphs/<name>/stream     {"input": ..., "thread_id": ...} -> text/event-stream
+#        event: token   {"node": ..., "content": ...}   LLM 이 만든 토큰 (노드 안의 model.invoke 도 그대로 스트리밍됨)
+#        event: update  {"node": ..., "update": ...}    노드가 끝날 때마다 그 노드가 쓴 상태
+#        event: end     {"thread_id": ...}
+#        event: error   {"error": ...}
+#
+# 이벤트마다 writer.drain() 을 기다리므로 느린 클라이언트는 자기 그래프 실행만 늦추고(연결별 배압),
+# 클라이언트가 연결을 끊으면 실행 중인 그래프를 취소합니다. 비동기 노드는 LLM 요청까지 함께 취소되지만
+# 동기 노드는 스레드에서 끝까지 돌고 결과만 버려집니다.
+
+
+def _jsonable(value: Any):
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    return str(value)
+
+
+class GraphServer:
+    def __init__(self, graphs: dict[str, Any], *, stream_mode: tuple = ("messages", "updates"), priority: str = "interactive"):
+        self.graphs = graphs
+        self.stream_mode = list(stream_mode)
+        self.priority = priority
+        self.active = 0
+        self.cancelled = 0
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            # keep-alive 연결에서 요청을 차례로 처리 (스트리밍 응답 뒤에는 연결을 닫음)
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode().split(" ", 2)
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    key, _, value = line.decode().partition(":")
+                    headers[key.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                keep_alive = await self.route(method, path.split("?")[0], body, reader, writer)
+                if not keep_alive or headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            # 클라이언트가 끊었거나 서버를 멈추는 중
+            pass
+        finally:
+            writer.close()
+
+    async def route(self, method, path, body, reader, writer) -> bool:
+        parts = path.strip("/").split("/")
+        if method == "GET" and parts == ["graphs"]:
+            await self.send_json(writer, {"graphs": sorted(self.graphs)})
+        elif method == "POST" and len(parts) == 3 and parts[0] == "graphs" and parts[2] == "stream":
+            if parts[1] not in self.graphs:
+                await self.send_json(writer, {"error": f"unknown graph {parts[1]!r}"}, status="404 Not Found")
+                return True
+            try:
+                payload = json.loads(body or b"{}")
+            except ValueError:
+                await self.send_json(writer, {"error": "invalid JSON"}, status="400 Bad Request")
+                return True
+            await self.stream(self.graphs[parts[1]], payload, reader, writer)
+            return False
+        else:
+            await self.send_json(writer, {"error": "not found"}, status="404 Not Found")
+        return True
+
+    async def stream(self, graph, payload: dict, reader, writer) -> None:
+        thread_id = str(payload.get("thread_id") or uuid.uuid4())
+        config = {**payload.get("config", {}), "configurable": {"thread_id": thread_id}}
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+            b"Cache-Control: no-cache\r\nConnection: close\r\n\r\n"
+        )
+        await writer.drain()
+
+        async def send(event: str, data: dict) -> None:
+            writer.write(f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=_jsonable)}\n\n".encode())
+            await writer.drain()
+
+        async def run() -> None:
+            # 사람이 기다리는 요청이므로 같은 LLM 서버를 쓰는 배치 작업보다 먼저 자리를 받음
+            with priority(self.priority):
+                async for mode, chunk in graph.astream(payload.get("input"), config, stream_mode=self.stream_mode):
+                    if mode == "messages":
+                        message, metadata = chunk
+                        # 사람 메시지나 도구 결과가 아니라 모델이 만든 내용만 토큰으로 보냄
+                        if isinstance(message, (AIMessageChunk, AIMessage)) and message.content:
+                            await send("token", {"node": metadata.get("langgraph_node"), "content": message.content})
+                    elif mode == "updates":
+                        for node, update in chunk.items():
+                            await send("update", {"node": node, "update": update})
+                    else:
+                        await send(mode, {"data": chunk})
+            await send("end", {"thread_id": thread_id})
+
+        async def disconnected() -> None:
+            # 스트리밍 중에는 클라이언트가 더 보낼 것이 없으므로 EOF 가 오면 연결이 끊긴 것
+            while await reader.read(1024):
+                pass
+
+        self.active += 1
+        runner = asyncio.create_task(run())
+        watcher = asyncio.create_task(disconnected())
+        try:
+            await asyncio.wait({runner, watcher}, return_when=asyncio.FIRST_COMPLETED)
+            if not runner.done():
+                self.cancelled += 1
+                runner.cancel()
+            try:
+                await runner
+            except asyncio.CancelledError:
+                pass
+            except ConnectionError:
+                self.cancelled += 1
+            except Exception as e:
+                try:
+                    await send("error", {"error": f"{type(e).__name__}: {e}"})
+                except ConnectionError:
+                    pass
+        finally:
+            watcher.cancel()
+            self.active -= 1
+
+    async def send_json(self, writer: asyncio.StreamWriter, payload: dict, status: str = "200 OK") -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode()
+        writer.write(
+            f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n".encode()
+            + body
+        )
+        await writer.drain()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8000, started=None) -> None:
+        server = await asyncio.start_server(self.handle, host, port, backlog=4096)
+        if started is not None:
+            started(server.sockets[0].getsockname()[1])
+        async with server:
+            await server.serve_forever()
+
+
+def start_in_thread(graphs: dict[str, Any], port: int = 0, **kwargs):
+    """백그라운드 스레드에서 서버를 띄우고 (base_url, stop 함수, 서버 객체)를 반환"""
+    server = GraphServer(graphs, **kwargs)
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+    bound = {}
+
+    def started(actual_port):
+        bound["port"] = actual_port
+        ready.set()
+
+    def run():
+        asyncio.set_event_loop(loop)
+        task = loop.create_task(server.serve(port=port, started=started))
+        try:
+            loop.run_until_complete(task)
+        except asyncio.CancelledError:
+            pass
+        # 취소된 나머지 태스크(끊긴 연결의 그래프 실행 등)가 정리될 기회를 준 뒤 루프를 닫음
+        loop.run_until_complete(asyncio.gather(*asyncio.all_tasks(loop), return_exceptions=True))
+        loop.close()
+
+    thread = threading.Thread(target=run, name="graph-server", daemon=True)
+    thread.start()
+    ready.wait()
+
+    def stop():
+        for task in asyncio.all_tasks(loop):
+            loop.call_soon_threadsafe(task.cancel)
+        thread.join(timeout=5)
+
+    return f"http://127.0.0.1:{bound['port']}", stop, server
+
+
+def build_chat_graph(base_url: str, model_name: str, checkpointer=None, *, max_concurrency: Optional[int] = None, **model_kwargs):
+    """checkpoint.py 와 같은 대화 그래프 (call_model 은 비동기라서 연결이 끊기면 LLM 요청도 취소됨)
+
+    모델은 llm_clients 의 공유 연결 풀을 쓰므로 동시 요청이 max_concurrency 를 넘으면 연결 풀 앞의 대기열에서 기다림
+    """
+    from langgraph.graph import StateGraph, MessagesState, START
+    from llm_clients import chat_model, configure
+
+    if max_concurrency is not None:
+        configure(base_url, max_concurrency=max_concurrency)
+    model = chat_model(base_url=base_url, model_name=model_name, api_key="not-needed", **model_kwargs)
+
+    async def call_model(state: MessagesState):
+        return {"messages": await model.ainvoke(state["messages"])}
+
+    builder = StateGraph(MessagesState)
+    builder.add_node("call_model", call_model)
+    builder.add_edge(START, "call_model")
+    return builder.compile(checkpointer=checkpointer)
+
+
+if __name__ == "__main__":
+    from sqlite_saver import SqliteSaver
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--base-url", default="http://localhost:1234/v1")
+    parser.add_argument("--model", default="l3-8b-stheno-v3.1-iq-imatrix")
+    parser.add_argument("--db", default="graph-server.db")
+    parser.add_argument("--max-concurrency", type=int, default=8, help="LLM 서버로 동시에 보내는 요청 수")
+    args = parser.parse_args()
+
+    graphs = {"chat": build_chat_graph(args.base_url, args.model, SqliteSaver(args.db), max_concurrency=args.max_concurrency)}
+    print(f"http://{args.host}:{args.port}/graphs/<name>/stream 에서 대기 중: {', '.join(graphs)}")
+    try:
+        asyncio.run(GraphServer(graphs).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        from llm_clients import report
+
+        print(report())
@@ -0,0 +1,41 @@
+import json
+import os
+import warnings
+
+# LangChain Hub 프롬프트를 저장소 안의 prompts/ 에서 읽는 캐시
+#
+#   prompt = load_prompt("hwchase17/react")
+#
+# prompts/<owner>__<repo>.json (langchain_core.load.dumpd 형식) 이 있으면 네트워크 없이 바로 읽고,
+# 없을 때만 langchain.hub 를 불러와 hub.pull 한 뒤 같은 위치에 저장합니다.
+# 허브의 프롬프트를 새 버전으로 받으려면 refresh=True 로 부릅니다.
+
+PROMPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "prompts")
+
+
+def prompt_path(name: str, prompts_dir: str = PROMPTS_DIR) -> str:
+    return os.path.join(prompts_dir, name.replace("/", "__").replace(":", "@") + ".json")
+
+
+def load_prompt(name: str, *, prompts_dir: str = PROMPTS_DIR, refresh: bool = False):
+    """name("owner/repo" 또는 "owner/repo:커밋") 프롬프트를 저장된 사본에서 읽거나, 없으면 허브에서 받아 저장"""
+    from langchain_core.load import dumpd, load
+
+    path = prompt_path(name, prompts_dir)
+    if not refresh and os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            serialized = json.load(f)
+        with warnings.catch_warnings():
+            # langchain_core.load 는 beta 경고를 띄우지만 직접 저장한 프롬프트만 읽으므로 무시
+            warnings.simplefilter("ignore")
+            return load(serialized)
+
+    from langchain import hub
+
+    prompt = hub.pull(name)
+    os.makedirs(prompts_dir, exist_ok=True)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(dumpd(prompt), f, ensure_ascii=False, indent=2)
+        f.write("\n")
+    os.replace(path + ".tmp", path)
+    return prompt
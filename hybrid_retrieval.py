@@ -0,0 +1,336 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from array import array
+from collections import Counter, OrderedDict
+from typing import Callable, Iterable, Iterator, Optional, Sequence
+
+from vector_index import VectorIndex
+
+# BM25(어휘) + FAISS(의미) 하이브리드 검색
+#
+#   retriever = HybridRetriever(open_index("rag-index"), reranker=CrossEncoderReranker())
+#   retriever.search("LangGraph 조건부 엣지", k=3)
+#   retriever.timings()          # 단계별 평균 시간 (embed, dense, bm25, fuse, fetch, rerank)
+#
+# 두 검색 결과를 reciprocal-rank fusion(RRF, 점수 = sum 1 / (rrf_k + 순위))으로 합치고, reranker 가 있으면
+# 상위 후보를 cross-encoder 로 다시 정렬합니다. (질문, 청크) 점수는 LRU 로 캐시해서 같은 질문이 다시
+# 오면 모델을 돌리지 않습니다.
+#
+# BM25 역색인은 인덱스 디렉터리의 bm25/ 에 CSR 형태의 numpy 배열로 저장되고 mmap 으로 읽습니다.
+#   offsets[t]:offsets[t + 1]  단어 t 의 posting 범위
+#   doc_ids, tfs               posting (청크 id, 단어 빈도)
+#   doc_len                    청크별 토큰 수
+# chunks.db 의 청크 수가 저장된 역색인과 다르면 처음 검색할 때 다시 만듭니다.
+
+BM25_DIR = "bm25"
+_TOKEN = re.compile(r"[0-9a-z]+|[가-힣]+")
+
+
+def tokenize(text: str) -> list[str]:
+    """영문/숫자는 단어 단위, 한글은 조사가 붙어도 맞도록 음절 bigram 단위로 나눔"""
+    tokens = []
+    for token in _TOKEN.findall(text.lower()):
+        if token[0].isascii() or len(token) == 1:
+            tokens.append(token[:32])
+        else:
+            tokens.extend(token[i:i + 2] for i in range(len(token) - 1))
+    return tokens
+
+
+class BM25Index:
+    """배열 기반 posting list 로 된 BM25 역색인"""
+
+    def __init__(self, vocab: dict[str, int], offsets, doc_ids, tfs, doc_len, *, k1: float = 1.2, b: float = 0.75):
+        self.vocab = vocab
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.tfs = tfs
+        self.doc_len = doc_len
+        self.k1 = k1
+        self.b = b
+        self.avg_len = float(doc_len.mean()) if len(doc_len) else 0.0
+
+    def __len__(self) -> int:
+        return len(self.doc_len)
+
+    @classmethod
+    def build(cls, texts: Iterable[tuple[int, str]], n_docs: int, **kwargs) -> "BM25Index":
+        """(청크 id, 본문) 목록으로 색인 생성. posting 은 파이썬 객체가 아닌 array 에 모은 뒤 한 번에 정렬"""
+        import numpy as np
+
+        vocab: dict[str, int] = {}
+        terms, docs, freqs = array("i"), array("i"), array("i")
+        doc_len = np.zeros(n_docs, dtype=np.float32)
+        for doc, text in texts:
+            counts = Counter(tokenize(text))
+            doc_len[doc] = sum(counts.values())
+            for token, tf in counts.items():
+                terms.append(vocab.setdefault(token, len(vocab)))
+                docs.append(doc)
+                freqs.append(tf)
+        terms = np.frombuffer(terms, dtype=np.int32)
+        order = np.argsort(terms, kind="stable")
+        offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(terms, minlength=len(vocab)), out=offsets[1:])
+        doc_ids = np.frombuffer(docs, dtype=np.int32)[order]
+        tfs = np.minimum(np.frombuffer(freqs, dtype=np.int32)[order], 65535).astype(np.uint16)
+        return cls(vocab, offsets, doc_ids, tfs, doc_len, **kwargs)
+
+    def save(self, path: str) -> None:
+        import numpy as np
+
+        os.makedirs(path, exist_ok=True)
+        arrays = {"offsets": self.offsets, "doc_ids": self.doc_ids, "tfs": self.tfs, "doc_len": self.doc_len}
+        for name, values in arrays.items():
+            with open(os.path.join(path, name + ".npy.tmp"), "wb") as f:
+                np.save(f, values)
+            os.replace(os.path.join(path, name + ".npy.tmp"), os.path.join(path, name + ".npy"))
+        # meta.json 을 마지막에 쓰므로, 쓰다가 중단되면 배열 길이가 맞지 않아 다음에 다시 만들어짐
+        meta = {"n_docs": len(self), "n_postings": len(self.doc_ids), "vocab": self.vocab}
+        with open(os.path.join(path, "meta.json.tmp"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(os.path.join(path, "meta.json.tmp"), os.path.join(path, "meta.json"))
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> Optional["BM25Index"]:
+        """저장된 색인을 mmap 으로 열고, 없거나 깨졌으면 None"""
+        import numpy as np
+
+        try:
+            with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+                meta = json.load(f)
+            arrays = {
+                name: np.load(os.path.join(path, name + ".npy"), mmap_mode="r")
+                for name in ("offsets", "doc_ids", "tfs", "doc_len")
+            }
+        except (OSError, ValueError):
+            return None
+        if (
+            len(arrays["doc_len"]) != meta["n_docs"]
+            or len(arrays["doc_ids"]) != meta["n_postings"]
+            or len(arrays["offsets"]) != len(meta["vocab"]) + 1
+        ):
+            return None
+        return cls(meta["vocab"], **arrays, **kwargs)
+
+    def search(self, query: str, k: int = 20):
+        """(점수, 청크 id) 배열. 질문의 단어가 하나도 없는 청크는 나오지 않음"""
+        import numpy as np
+
+        scores = None
+        n = len(self)
+        for token in set(tokenize(query)):
+            term = self.vocab.get(token)
+            if term is None:
+                continue
+            start, end = self.offsets[term], self.offsets[term + 1]
+            docs = self.doc_ids[start:end]
+            tf = self.tfs[start:end].astype(np.float32)
+            idf = np.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * self.doc_len[docs] / self.avg_len)
+            if scores is None:
+                scores = np.zeros(n, dtype=np.float32)
+            # 한 단어의 posting 안에서 청크 id 는 겹치지 않으므로 fancy index 로 바로 더할 수 있음
+            scores[docs] += idf * tf * (self.k1 + 1) / (tf + norm)
+        if scores is None:
+            return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.int64)
+        hits = np.flatnonzero(scores)
+        if len(hits) > k:
+            hits = hits[np.argpartition(-scores[hits], k - 1)[:k]]
+        hits = hits[np.argsort(-scores[hits], kind="stable")]
+        return scores[hits], hits.astype(np.int64)
+
+
+class CrossEncoderReranker:
+    """sentence-transformers CrossEncoder 를 처음 쓸 때 불러오는 (질문, 본문) 점수 함수"""
+
+    def __init__(self, model_name: str = "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1"):
+        self.model_name = model_name
+        self.model = None
+        self.lock = threading.Lock()
+
+    def __call__(self, query: str, texts: list[str]) -> list[float]:
+        with self.lock:
+            if self.model is None:
+                from sentence_transformers import CrossEncoder
+
+                self.model = CrossEncoder(self.model_name)
+        return [float(score) for score in self.model.predict([(query, text) for text in texts])]
+
+
+class HybridRetriever:
+    def __init__(
+        self,
+        index: VectorIndex,
+        *,
+        candidates: int = 20,
+        rrf_k: int = 60,
+        reranker: Optional[Callable[[str, list[str]], Sequence[float]]] = None,
+        rerank_top: int = 20,
+        rerank_cache_size: int = 4096,
+        bm25_path: Optional[str] = None,
+    ):
+        self.index = index
+        self.candidates = candidates
+        self.rrf_k = rrf_k
+        self.reranker = reranker
+        self.rerank_top = rerank_top
+        self.bm25_path = bm25_path or os.path.join(index.path, BM25_DIR)
+        self.bm25: Optional[BM25Index] = None
+        # sha256(질문 \x00 본문) -> cross-encoder 점수
+        self.rerank_cache: OrderedDict[str, float] = OrderedDict()
+        self.rerank_cache_size = rerank_cache_size
+        self.stats = {"queries": 0, "rerank_hits": 0, "rerank_misses": 0}
+        self.stage_seconds: Counter = Counter()
+        self.lock = threading.RLock()
+
+    # BM25 색인
+    def _chunk_count(self) -> int:
+        with self.index.lock:
+            return self.index.conn.execute("SELECT coalesce(max(id) + 1, 0) FROM chunks").fetchone()[0]
+
+    def _iter_chunks(self) -> Iterator[tuple[int, str]]:
+        # 한 번에 다 읽지 않고 id 범위로 나눠서 읽음 (청크 수가 많아도 메모리가 일정)
+        last = -1
+        while True:
+            with self.index.lock:
+                rows = self.index.conn.execute(
+                    "SELECT id, text FROM chunks WHERE id > ? ORDER BY id LIMIT 10000", (last,)
+                ).fetchall()
+            if not rows:
+                return
+            yield from rows
+            last = rows[-1][0]
+
+    def load_bm25(self) -> BM25Index:
+        """저장된 BM25 색인을 열고, 청크 수가 달라졌으면 다시 만들어 저장"""
+        with self.lock:
+            n_docs = self._chunk_count()
+            if self.bm25 is not None and len(self.bm25) == n_docs:
+                return self.bm25
+            bm25 = BM25Index.load(self.bm25_path)
+            if bm25 is None or len(bm25) != n_docs:
+                bm25 = BM25Index.build(self._iter_chunks(), n_docs)
+                bm25.save(self.bm25_path)
+            self.bm25 = bm25
+            return bm25
+
+    # 검색
+    def _rerank_scores(self, query: str, texts: list[str]) -> list[float]:
+        keys = [hashlib.sha256(f"{query}\x00{text}".encode()).hexdigest() for text in texts]
+        scores: dict[int, float] = {}
+        with self.lock:
+            for i, key in enumerate(keys):
+                if key in self.rerank_cache:
+                    self.rerank_cache.move_to_end(key)
+                    scores[i] = self.rerank_cache[key]
+        misses = [i for i in range(len(texts)) if i not in scores]
+        if misses:
+            # 캐시에 없는 후보만 모아서 모델을 한 번 호출
+            for i, score in zip(misses, self.reranker(query, [texts[i] for i in misses])):
+                scores[i] = float(score)
+        with self.lock:
+            self.stats["rerank_hits"] += len(texts) - len(misses)
+            self.stats["rerank_misses"] += len(misses)
+            for i in misses:
+                self.rerank_cache[keys[i]] = scores[i]
+            while len(self.rerank_cache) > self.rerank_cache_size:
+                self.rerank_cache.popitem(last=False)
+        return [scores[i] for i in range(len(texts))]
+
+    def search(self, query: str, k: int = 4, *, min_score: Optional[float] = None, timings: Optional[dict] = None) -> list[dict]:
+        """질문과 가까운 청크 k 개.
+
+        min_score 는 의미 검색 쪽에만 적용되는 코사인 유사도 하한이고, 어휘가 일치한 청크는 항상 후보가 됩니다.
+        결과의 score 는 reranker 가 있으면 cross-encoder 점수, 없으면 RRF 점수입니다.
+        timings 에 dict 를 넘기면 이번 검색의 단계별 시간(초)을 채워 줍니다.
+        """
+        spent = {}
+        n = max(k, self.candidates)
+
+        t = time.perf_counter()
+        vector = self.index.embed([query])
+        spent["embed"] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        dense_scores, dense_ids = self.index.search_vectors(vector, n)
+        dense = {
+            int(i): float(score)
+            for score, i in zip(dense_scores[0], dense_ids[0])
+            if i >= 0 and (min_score is None or score >= min_score)
+        }
+        spent["dense"] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        bm25_scores, bm25_ids = self.load_bm25().search(query, n)
+        lexical = {int(i): float(score) for score, i in zip(bm25_scores, bm25_ids)}
+        spent["bm25"] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        fused: Counter = Counter()
+        for ranking in (dense, lexical):
+            for rank, i in enumerate(ranking):  # dict 는 점수 내림차순으로 만들어져 있음
+                fused[i] += 1 / (self.rrf_k + rank + 1)
+        ranked = [i for i, _ in fused.most_common(self.rerank_top if self.reranker else k)]
+        spent["fuse"] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        rows = self.index.fetch(ranked)
+        ranked = [i for i in ranked if i in rows]
+        spent["fetch"] = time.perf_counter() - t
+
+        scores = {i: fused[i] for i in ranked}
+        if self.reranker is not None and ranked:
+            t = time.perf_counter()
+            reranked = self._rerank_scores(query, [rows[i][0] for i in ranked])
+            scores = dict(zip(ranked, reranked))
+            ranked = sorted(ranked, key=scores.get, reverse=True)
+            spent["rerank"] = time.perf_counter() - t
+
+        with self.lock:
+            self.stats["queries"] += 1
+            self.stage_seconds.update(spent)
+        if timings is not None:
+            timings.update(spent)
+
+        results = []
+        for i in ranked[:k]:
+            text, source, page = rows[i]
+            results.append({
+                "id": i, "text": text, "source": source, "page": page, "score": scores[i],
+                "dense_score": dense.get(i), "bm25_score": lexical.get(i),
+            })
+        return results
+
+    def timings(self) -> dict[str, float]:
+        """지금까지 검색의 단계별 평균 시간 (ms)"""
+        with self.lock:
+            queries = max(1, self.stats["queries"])
+            return {stage: seconds * 1000 / queries for stage, seconds in self.stage_seconds.items()}
+
+
+def hybrid_retrieval_node(
+    retriever: HybridRetriever,
+    *,
+    k: int = 4,
+    min_score: Optional[float] = None,
+    query_key: str = "query",
+    output_key: str = "documents",
+    timings_key: Optional[str] = None,
+):
+    """retrieval_node 의 하이브리드 버전. timings_key 를 주면 단계별 시간도 상태에 넣음"""
+    retriever.index.load_async()
+
+    def retrieve(state: dict) -> dict:
+        timings: dict = {}
+        results = retriever.search(state[query_key], k=k, min_score=min_score, timings=timings)
+        update = {output_key: [result["text"] for result in results]}
+        if timings_key:
+            update[timings_key] = timings
+        return update
+
+    return retrieve
@@ -0,0 +1,228 @@
+import argparse
+import multiprocessing
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Iterable, Iterator, Optional
+
+from vector_index import VectorIndex
+
+# PDF 를 페이지 단위로 읽어서 청크로 나누고, 프로세스 풀에서 임베딩한 뒤 벡터 인덱스에 이어 붙이는 CLI
+# 사용법: python ingest.py docs/ extra.pdf --index rag-index --workers 4
+#
+# - 작업 단위는 "PDF 하나의 연속된 페이지 몇 장" 이고, 동시에 처리 중인 작업은 workers * 2 개로 제한
+#   (코퍼스 전체를 메모리에 올리지 않음)
+# - 어떤 페이지까지 인덱스에 들어갔는지는 chunks.db 의 ingested_pages 테이블에 기록하고
+#   --save-every 청크마다 인덱스를 저장하므로, 중간에 죽어도 다시 실행하면 마지막 저장 이후부터 이어서 처리
+# - 각 워커는 sentence-transformers 모델을 한 번만 불러오고 torch 스레드를 나눠 씀
+# - 임베딩은 --embedding-cache 디렉터리에 본문 해시로 캐시되므로 바뀌지 않은 문서를 다시 넣을 때는 모델을 돌리지 않음
+# - 예제 스크립트의 open_index 가 예시 문서로 만든 인덱스에는 이어 붙이지 않음 (--fresh 로 지우거나 다른 --index 사용)
+
+
+def iter_pdfs(paths: Iterable[str]) -> Iterator[str]:
+    """파일과 디렉터리(하위 포함)에서 PDF 경로를 정렬된 순서로 나열"""
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.lower().endswith(".pdf"):
+                        yield os.path.abspath(os.path.join(root, name))
+        else:
+            yield os.path.abspath(path)
+
+
+def iter_chunks(text: str, chunk_size: int = 800, overlap: int = 100) -> Iterator[str]:
+    """공백을 정리한 본문을 chunk_size 글자 안팎의 청크로 자름 (가능하면 단어 경계에서, overlap 글자씩 겹치게)"""
+    text = " ".join(text.split())
+    start = 0
+    while start < len(text):
+        end = min(len(text), start + chunk_size)
+        if end < len(text):
+            cut = text.rfind(" ", start + chunk_size // 2, end)
+            if cut != -1:
+                end = cut
+        yield text[start:end]
+        if end >= len(text):
+            return
+        start = max(end - overlap, start + 1)
+        # 다음 청크가 단어 중간에서 시작하지 않도록
+        space = text.find(" ", start, end)
+        if space != -1:
+            start = space + 1
+
+
+def iter_tasks(pdfs: Iterable[str], done: set, pages_per_task: int) -> Iterator[tuple[str, list[int]]]:
+    """(PDF 경로, 아직 처리하지 않은 페이지 번호 목록) 을 pages_per_task 장씩 나열 (페이지는 0부터)"""
+    from pypdf import PdfReader
+
+    for path in pdfs:
+        try:
+            total = len(PdfReader(path).pages)
+        except Exception as e:
+            print(f"건너뜀: {path} ({e})", file=sys.stderr)
+            continue
+        pages = [page for page in range(total) if (path, page) not in done]
+        for start in range(0, len(pages), pages_per_task):
+            yield path, pages[start:start + pages_per_task]
+
+
+# 워커 프로세스 쪽
+_worker: dict = {}
+
+
+def _init_worker(model_name: str, threads: int, cache_path: Optional[str]) -> None:
+    try:
+        import torch
+
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    from embedding_cache import cached_embedder
+    from llm_cache import SentenceTransformerEmbedder
+
+    _worker["embed"] = cached_embedder(model_name, cache_path) if cache_path else SentenceTransformerEmbedder(model_name)
+
+
+def _embed_pages(path: str, pages: list[int], chunk_size: int, overlap: int):
+    from pypdf import PdfReader
+
+    # 같은 PDF 의 다음 작업이 같은 워커로 오면 다시 파싱하지 않도록 마지막 PDF 를 기억
+    if _worker.get("path") != path:
+        _worker["path"], _worker["reader"] = path, PdfReader(path)
+    reader = _worker["reader"]
+    records = []
+    for page in pages:
+        try:
+            text = reader.pages[page].extract_text() or ""
+        except Exception as e:
+            print(f"{path} {page + 1}쪽 추출 실패: {e}", file=sys.stderr)
+            text = ""
+        records.extend((page, chunk) for chunk in iter_chunks(text, chunk_size, overlap))
+    vectors = _worker["embed"]([chunk for _, chunk in records]) if records else None
+    return path, pages, records, vectors
+
+
+# 메인 프로세스 쪽
+def _open_ledger(index: VectorIndex) -> set:
+    """처리한 페이지 목록을 읽음. 마지막 저장 이후에 기록된 페이지는 인덱스에 없으므로 지움"""
+    index.open_for_write()
+    index.conn.execute(
+        "CREATE TABLE IF NOT EXISTS ingested_pages ("
+        "source TEXT, page INTEGER, chunk_end INTEGER, PRIMARY KEY (source, page))"
+    )
+    index.conn.execute("DELETE FROM ingested_pages WHERE chunk_end > ?", (index.count(),))
+    return {tuple(row) for row in index.conn.execute("SELECT source, page FROM ingested_pages")}
+
+
+def ingest(
+    paths: Iterable[str],
+    index: VectorIndex,
+    *,
+    workers: int = 4,
+    model_name: str = "paraphrase-multilingual-MiniLM-L12-v2",
+    embedding_cache: Optional[str] = "embedding-cache",
+    chunk_size: int = 800,
+    overlap: int = 100,
+    pages_per_task: int = 16,
+    save_every: int = 20_000,
+) -> dict:
+    done = _open_ledger(index)
+    # open_index 가 예시 문서 8개로 만든 인덱스는 전수 검색(Flat)으로 굳어 있으므로
+    # 여기에 코퍼스를 이어 붙이면 IVF/HNSW 를 쓰지 못하고 예시 문서도 섞임
+    if index.conn.execute("SELECT 1 FROM chunks WHERE source = 'example' LIMIT 1").fetchone():
+        raise ValueError(
+            f"{index.path} 는 예시 문서로 만든 인덱스입니다. --fresh 로 새로 만들거나 다른 --index 를 지정하세요"
+        )
+    tasks = iter_tasks(iter_pdfs(paths), done, pages_per_task)
+    stats = {"pages": 0, "chunks": 0, "skipped_pages": len(done)}
+    unsaved = 0
+    start = last_report = time.perf_counter()
+
+    # faiss/torch 의 OpenMP 스레드가 있는 프로세스를 fork 하면 멈출 수 있으므로 spawn 사용
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    with ProcessPoolExecutor(
+        workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(model_name, threads, embedding_cache),
+    ) as pool:
+        pending = set()
+        while True:
+            # 처리 중인 작업이 workers * 2 개가 되도록 채움 (결과가 쌓여 메모리가 늘지 않게)
+            for task in tasks:
+                pending.add(pool.submit(_embed_pages, *task, chunk_size, overlap))
+                if len(pending) >= workers * 2:
+                    break
+            if not pending:
+                break
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                path, pages, records, vectors = future.result()
+                if records:
+                    index.add_vectors(
+                        vectors,
+                        [chunk for _, chunk in records],
+                        [{"source": path, "page": page + 1} for page, _ in records],
+                    )
+                index.conn.executemany(
+                    "INSERT OR REPLACE INTO ingested_pages VALUES (?, ?, ?)",
+                    [(path, page, index.count()) for page in pages],
+                )
+                stats["pages"] += len(pages)
+                stats["chunks"] += len(records)
+                unsaved += len(records)
+            if unsaved >= save_every:
+                index.save(train=False)
+                unsaved = 0
+            now = time.perf_counter()
+            if now - last_report >= 5:
+                last_report = now
+                elapsed = now - start
+                print(
+                    f"{stats['pages']}쪽, {stats['chunks']}청크 "
+                    f"({stats['pages'] / elapsed:.1f}쪽/s, {stats['chunks'] / elapsed:.1f}청크/s)"
+                )
+    index.save()
+    stats["seconds"] = time.perf_counter() - start
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("paths", nargs="+", help="PDF 파일 또는 PDF 가 들어 있는 디렉터리")
+    parser.add_argument("--index", default="rag-index")
+    parser.add_argument("--kind", default="ivf", choices=["ivf", "hnsw"])
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) - 1))
+    parser.add_argument("--model", default="paraphrase-multilingual-MiniLM-L12-v2")
+    parser.add_argument("--embedding-cache", default="embedding-cache", help="임베딩 캐시 디렉터리 (빈 문자열이면 캐시 안 함)")
+    parser.add_argument("--chunk-size", type=int, default=800)
+    parser.add_argument("--overlap", type=int, default=100)
+    parser.add_argument("--pages-per-task", type=int, default=16)
+    parser.add_argument("--save-every", type=int, default=20_000, help="이만큼 청크를 추가할 때마다 인덱스 저장")
+    parser.add_argument("--fresh", action="store_true", help="기존 인덱스(예시 문서 포함)를 지우고 새로 만듦")
+    args = parser.parse_args()
+
+    if args.fresh and os.path.isdir(args.index):
+        shutil.rmtree(args.index)
+    index = VectorIndex(args.index, embed=lambda texts: None, kind=args.kind, writable=True)
+    try:
+        stats = ingest(
+            args.paths,
+            index,
+            workers=args.workers,
+            model_name=args.model,
+            embedding_cache=args.embedding_cache or None,
+            chunk_size=args.chunk_size,
+            overlap=args.overlap,
+            pages_per_task=args.pages_per_task,
+            save_every=args.save_every,
+        )
+    except ValueError as e:
+        sys.exit(str(e))
+    print(
+        f"완료: {stats['pages']}쪽, {stats['chunks']}청크, {stats['seconds']:.1f}s "
+        f"(이전 실행에서 처리한 {stats['skipped_pages']}쪽은 건너뜀), 인덱스 전체 {index.count()}청크"
+    )
@@ -1,6 +1,7 @@
 from typing_extensions import TypedDict
 from langgraph.graph import StateGraph, START, END
-from langgraph.checkpoint.memory import MemorySaver
+from sqlite_saver import SqliteSaver
+from write_behind import WriteBehindSaver
 
 
 class State(TypedDict):
@@ -35,7 +36,7 @@ builder.add_edge("step_1", "step_2")
 builder.add_edge("step_2", "step_3")
 builder.add_edge("step_3", END)
 
-memory = MemorySaver()
+memory = WriteBehindSaver(SqliteSaver("interrupt.db"), interrupt_before=['step_2']) # 저장은 백그라운드에서, 그래프가 멈추면 즉시 저장
 
 graph = builder.compile(checkpointer=memory, interrupt_before=['step_2'])
 
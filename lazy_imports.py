@@ -0,0 +1,85 @@
+import importlib
+import importlib.util
+import sys
+import threading
+from typing import Any, Callable
+
+# 무거운 모듈과 객체를 처음 쓸 때까지 미루는 도구
+#
+#   langchain_openai = lazy_import("langchain_openai")      # 속성에 처음 접근할 때 실제로 import
+#   llm = LazyObject(lambda: langchain_openai.ChatOpenAI(...))  # 속성에 처음 접근할 때 생성
+#
+# 그래프를 만들고 컴파일하는 동안에는 LLM 클라이언트나 그림 라이브러리가 필요 없으므로
+# 첫 노드가 실행될 때까지 import 비용을 뒤로 미룰 수 있습니다.
+
+
+def lazy_import(name: str):
+    """importlib.util.LazyLoader 로 모듈을 등록만 해 두고, 속성에 처음 접근할 때 실행"""
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+class LazyObject:
+    """factory() 의 결과를 처음 필요할 때(속성 접근, 호출 등) 만들어서 속성 접근을 그대로 넘기는 프록시"""
+
+    def __init__(self, factory: Callable[[], Any]):
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_target", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    def _resolve(self):
+        target = object.__getattribute__(self, "_target")
+        if target is None:
+            with object.__getattribute__(self, "_lock"):
+                target = object.__getattribute__(self, "_target")
+                if target is None:
+                    target = object.__getattribute__(self, "_factory")()
+                    object.__setattr__(self, "_target", target)
+        return target
+
+    @property
+    def loaded(self) -> bool:
+        return object.__getattribute__(self, "_target") is not None
+
+    def __getattr__(self, name: str):
+        # 특수 속성(copy/pickle/inspect 가 살펴보는 __deepcopy__, __self__ 등)은 만들기 전이면 없는 것으로 취급.
+        # 일반 속성은 처음 접근할 때 만들어서 실제 값을 돌려줌 (프록시를 돌려주면 `if llm.attr` 나
+        # getattr(llm, "x", None) is None 같은 검사가 틀어짐)
+        if name.startswith("__") and not self.loaded:
+            raise AttributeError(name)
+        return getattr(self._resolve(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self._resolve(), name, value)
+
+    def __call__(self, *args, **kwargs):
+        return self._resolve()(*args, **kwargs)
+
+    def __repr__(self) -> str:
+        return repr(self._resolve())
+
+    def __str__(self) -> str:
+        return str(self._resolve())
+
+
+def lazy_chat_openai(**kwargs) -> LazyObject:
+    """ChatOpenAI(**kwargs) 를 처음 쓸 때 만듦 (langchain_openai import 도 그때 함).
+
+    llm_clients.chat_model 로 만들기 때문에 같은 base_url 을 쓰는 모델은 연결 풀과 동시 요청 제한을 함께 씀
+    """
+
+    def create():
+        from llm_clients import chat_model
+
+        return chat_model(**kwargs)
+
+    return LazyObject(create)
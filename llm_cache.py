@@ -0,0 +1,267 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import warnings
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+
+# ChatOpenAI 응답 캐시
+#
+#   from langchain_core.globals import set_llm_cache
+#   set_llm_cache(ResponseCache("llm-cache.db"))                  # 정확히 같은 프롬프트만
+#   set_llm_cache(ResponseCache("llm-cache.db", semantic=True))   # 거의 같은 프롬프트까지
+#
+# 1단계: (모델 설정, 프롬프트) 의 sha256 이 같으면 저장된 응답을 그대로 반환
+# 2단계(semantic=True): 프롬프트 문장을 sentence-transformers 로 임베딩해서 같은 모델 설정의
+#         faiss 인덱스에서 가장 가까운 항목을 찾고, 코사인 유사도가 threshold 이상이면 그 응답을 반환
+# 모델 설정(llm_string 에 model_name, temperature, bind_tools 로 붙인 도구 등이 들어 있음)이
+# 다르면 어느 단계에서도 적중하지 않습니다. 항목은 SQLite 파일에 남아서 재시작 후에도
+# 쓰이고, ttl 이 지나거나 max_entries 를 넘으면 오래 쓰지 않은 것부터 지웁니다 (항목 수는 evict_every 번
+# 저장할 때마다 한 번 세므로 그 사이에는 최대 evict_every 개까지 넘을 수 있음).
+
+
+def prompt_text(prompt: str) -> str:
+    """langchain 이 직렬화한 메시지 목록에서 역할과 본문만 뽑아 임베딩용 문장으로 만듦"""
+    try:
+        messages = json.loads(prompt)
+    except ValueError:
+        return prompt
+    if not isinstance(messages, list):
+        return prompt
+    lines = []
+    for message in messages:
+        kwargs = message.get("kwargs", {}) if isinstance(message, dict) else {}
+        content = kwargs.get("content", "")
+        if isinstance(content, list):
+            content = " ".join(
+                part.get("text", "") if isinstance(part, dict) else str(part) for part in content
+            )
+        lines.append(f"{kwargs.get('type', 'message')}: {content}")
+    return "\n".join(lines)
+
+
+class SentenceTransformerEmbedder:
+    """sentence-transformers 모델을 처음 쓸 때 불러오는 임베딩 함수 (정규화된 벡터 반환)"""
+
+    def __init__(self, model_name: str = "paraphrase-multilingual-MiniLM-L12-v2"):
+        self.model_name = model_name
+        self.model = None
+        self.lock = threading.Lock()
+
+    def __call__(self, texts: list[str]):
+        with self.lock:
+            if self.model is None:
+                from sentence_transformers import SentenceTransformer
+
+                self.model = SentenceTransformer(self.model_name)
+        return self.model.encode(texts, normalize_embeddings=True, convert_to_numpy=True)
+
+
+class ResponseCache(BaseCache):
+    """SQLite 에 저장되는 LLM 응답 캐시 (정확 일치 + 선택적 의미 유사도 단계)"""
+
+    def __init__(
+        self,
+        path: str = "llm-cache.db",
+        *,
+        ttl: Optional[float] = 7 * 24 * 3600,
+        max_entries: int = 50_000,
+        evict_every: Optional[int] = None,
+        semantic: bool = False,
+        threshold: float = 0.95,
+        embed: Optional[Callable[[list[str]], Any]] = None,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # COUNT(*) 는 테이블 전체를 훑으므로 저장할 때마다 세지 않음 (기본: max_entries 의 1%)
+        self.evict_every = evict_every or max(1, max_entries // 100)
+        self.writes = 0
+        self.semantic = semantic
+        self.threshold = threshold
+        self.embed = embed or (SentenceTransformerEmbedder() if semantic else None)
+        # 모델 설정(llm_hash)마다 faiss 인덱스를 따로 둠 (다른 모델의 항목이 상위 k 개를 차지하지 않도록).
+        # 그 설정으로 의미 단계를 처음 쓸 때 DB 에 저장된 임베딩으로 다시 만듦
+        self.indexes: dict[str, Any] = {}
+        # lookup 에서 계산한 임베딩을 바로 이어지는 update 에서 재사용
+        self.pending_vectors: OrderedDict[str, Any] = OrderedDict()
+        self.stats = {"exact_hits": 0, "semantic_hits": 0, "misses": 0, "evictions": 0}
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.lock = threading.RLock()
+        with self.lock:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.execute("PRAGMA busy_timeout=5000")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "id INTEGER PRIMARY KEY, key TEXT UNIQUE, llm_hash TEXT, value TEXT, "
+                "embedding BLOB, created_at REAL, last_used REAL)"
+            )
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS llm_cache_last_used ON llm_cache (last_used)"
+            )
+
+    @staticmethod
+    def _hash(*parts: str) -> str:
+        return hashlib.sha256("\x00".join(parts).encode()).hexdigest()
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl is not None and created_at + self.ttl < now
+
+    def _vector(self, prompt: str):
+        import numpy as np
+
+        return np.asarray(self.embed([prompt_text(prompt)]), dtype=np.float32).reshape(1, -1)
+
+    def _load_index(self, llm_hash: str, dim: int):
+        index = self.indexes.get(llm_hash)
+        if index is not None:
+            return index
+        import faiss
+        import numpy as np
+
+        # 정규화된 벡터의 내적 = 코사인 유사도, 항목 삭제를 위해 DB id 를 붙여 둠
+        index = self.indexes[llm_hash] = faiss.IndexIDMap2(faiss.IndexFlatIP(dim))
+        rows = self.conn.execute(
+            "SELECT id, embedding FROM llm_cache WHERE llm_hash = ? AND embedding IS NOT NULL",
+            (llm_hash,),
+        ).fetchall()
+        if rows:
+            index.add_with_ids(
+                np.stack([np.frombuffer(row[1], dtype=np.float32) for row in rows]),
+                np.array([row[0] for row in rows], dtype=np.int64),
+            )
+        return index
+
+    def _delete(self, ids: list[int]) -> None:
+        if not ids:
+            return
+        self.conn.executemany("DELETE FROM llm_cache WHERE id = ?", [(i,) for i in ids])
+        if self.indexes:
+            import numpy as np
+
+            # 없는 id 는 무시되므로 어느 인덱스에 있는지 찾지 않고 모두에서 지움
+            for index in self.indexes.values():
+                index.remove_ids(np.array(ids, dtype=np.int64))
+
+    def _hit(self, row_id: int, value: str, now: float) -> RETURN_VAL_TYPE:
+        self.conn.execute("UPDATE llm_cache SET last_used = ? WHERE id = ?", (now, row_id))
+        # langchain_core.load.loads 의 beta 경고는 적중할 때마다 뜨므로 숨김
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            return [loads(generation) for generation in json.loads(value)]
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        key = self._hash(llm_string, prompt)
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT id, value, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                if not self._expired(row[2], now):
+                    self.stats["exact_hits"] += 1
+                    return self._hit(row[0], row[1], now)
+                self._delete([row[0]])
+        if not self.semantic:
+            with self.lock:
+                self.stats["misses"] += 1
+            return None
+
+        # 임베딩 계산은 잠금 밖에서
+        vector = self._vector(prompt)
+        llm_hash = self._hash(llm_string)
+        with self.lock:
+            index = self._load_index(llm_hash, vector.shape[1])
+            if index.ntotal:
+                scores, ids = index.search(vector, min(8, index.ntotal))
+                for score, row_id in zip(scores[0], ids[0]):
+                    if row_id < 0 or score < self.threshold:
+                        break
+                    row = self.conn.execute(
+                        "SELECT value, created_at FROM llm_cache WHERE id = ?", (int(row_id),)
+                    ).fetchone()
+                    if row is not None and not self._expired(row[1], now):
+                        self.stats["semantic_hits"] += 1
+                        return self._hit(int(row_id), row[0], now)
+            self.stats["misses"] += 1
+            self.pending_vectors[key] = vector
+            while len(self.pending_vectors) > 1024:
+                self.pending_vectors.popitem(last=False)
+        return None
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        key = self._hash(llm_string, prompt)
+        value = json.dumps([dumps(generation) for generation in return_val])
+        vector = None
+        if self.semantic:
+            with self.lock:
+                vector = self.pending_vectors.pop(key, None)
+            if vector is None:
+                vector = self._vector(prompt)
+        llm_hash = self._hash(llm_string)
+        now = time.time()
+        with self.lock:
+            # 같은 key 면 id 를 유지해서 faiss 인덱스의 id 와 어긋나지 않게 함
+            row_id = self.conn.execute(
+                "INSERT INTO llm_cache (key, llm_hash, value, embedding, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(key) DO UPDATE SET "
+                "value = excluded.value, embedding = COALESCE(excluded.embedding, embedding), "
+                "created_at = excluded.created_at, "
+                "last_used = excluded.last_used RETURNING id",
+                (
+                    key,
+                    llm_hash,
+                    value,
+                    None if vector is None else vector.tobytes(),
+                    now,
+                    now,
+                ),
+            ).fetchone()[0]
+            index = self.indexes.get(llm_hash)
+            if vector is not None and index is not None:
+                import numpy as np
+
+                index.remove_ids(np.array([row_id], dtype=np.int64))
+                index.add_with_ids(vector, np.array([row_id], dtype=np.int64))
+            self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        self.writes += 1
+        if self.writes < self.evict_every:
+            return
+        self.writes = 0
+        count = self.conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        if count <= self.max_entries:
+            return
+        # 만료된 항목을 먼저 지우고, 그래도 넘치면 오래 쓰지 않은 순서로 삭제
+        ids = []
+        if self.ttl is not None:
+            ids += [
+                row[0]
+                for row in self.conn.execute(
+                    "SELECT id FROM llm_cache WHERE created_at < ?", (now - self.ttl,)
+                )
+            ]
+        overflow = count - len(ids) - self.max_entries
+        if overflow > 0:
+            expired = set(ids)
+            for (row_id,) in self.conn.execute(
+                "SELECT id FROM llm_cache ORDER BY last_used LIMIT ?", (overflow + len(ids),)
+            ):
+                if row_id not in expired and overflow > 0:
+                    ids.append(row_id)
+                    overflow -= 1
+        self._delete(ids)
+        self.stats["evictions"] += len(ids)
+
+    def clear(self, **kwargs: Any) -> None:
+        with self.lock:
+            self.conn.execute("DELETE FROM llm_cache")
+            self.indexes.clear()
+            self.pending_vectors.clear()
@@ -0,0 +1,417 @@
+import asyncio
+import itertools
+import json
+import threading
+import time
+import weakref
+from typing import Any, Optional
+
+import httpx
+
+from scheduler import WAIT_BUCKETS, Scheduler, is_overload
+
+# 프로세스 전체에서 LLM 서버(base_url)마다 하나씩 두는 공유 HTTP 클라이언트
+#
+#   from llm_clients import chat_model, configure, report
+#   configure("http://localhost:1234/v1", max_concurrency=4, rate=10)   # 동시 요청 최대 4개, 초당 10개
+#   llm = chat_model(base_url="http://localhost:1234/v1", model_name="l3-8b-stheno-v3.1-iq-imatrix")
+#   ...
+#   print(report())
+#
+# lazy_imports.lazy_chat_openai 도 여기서 모델을 만들므로 스크립트마다, 노드마다 ChatOpenAI 를 따로 만들어도
+#   - 같은 base_url 의 요청은 keep-alive 연결 풀 하나를 함께 쓰고 (같은 인자의 chat_model 은 객체 자체를 공유)
+#   - 서버로 동시에 나가는 요청은 scheduler.Scheduler 가 정함: 우선순위 대기열, 초당 요청 수(rate), 지연 시간과
+#     과부하 응답(429/503 등)에 따라 1~max_concurrency 사이에서 조절되는 동시 요청 수, 지터를 넣은 지수 백오프 재시도.
+#     대기는 연결 풀에 들어가기 전에 함 (httpcore 연결 풀 안에서 기다리면 깨어날 때마다 연결 전체를 훑어서
+#     대기 요청이 많을수록 CPU 를 많이 씀). ChatOpenAI 자체 재시도는 끄고 여기서만 재시도합니다.
+#   - 스트리밍이 아닌 요청 중 본문(모델, 메시지, 파라미터)과 헤더(인증 등)가 똑같은 요청이 이미 진행 중이면
+#     새로 보내지 않고 그 응답을 나눠 받습니다(single-flight). 끝난 요청의 재사용은 llm_cache.ResponseCache 가 맡습니다.
+#
+# stats() / report() / to_prometheus() 로 대기열 길이, 대기 시간, 사용률(바쁜 슬롯 시간 / (max_concurrency x 경과 시간))을
+# 봅니다. 대기 시간이 길면 서버가 감당하는 것보다 많이 보내고 있고, 사용률이 낮으면 서버가 놀고 있다는 뜻입니다.
+
+# 다시 보내 볼 만한 응답 (서버가 밀렸거나 잠깐 내려감)
+RETRY_STATUS = (408, 429, 500, 502, 503, 504)
+
+# single-flight 키에서 빼는 헤더: 본문에서 정해지거나 시도마다 바뀔 뿐 응답 내용과는 상관없음
+# (openai SDK 는 재시도 횟수, 타임아웃, 동기/비동기 여부를 헤더로 보냄)
+UNKEYED_HEADERS = frozenset(
+    {"content-length", "x-stainless-retry-count", "x-stainless-read-timeout", "x-stainless-timeout", "x-stainless-async"}
+)
+
+
+class _ReleasingStream(httpx.SyncByteStream, httpx.AsyncByteStream):
+    """응답 본문을 다 읽고 닫을 때 슬롯을 반납 (스트리밍 응답은 마지막 토큰까지 슬롯을 차지)"""
+
+    def __init__(self, stream, release):
+        self.stream = stream
+        self.release = release
+
+    def _release_once(self) -> None:
+        release, self.release = self.release, None
+        if release is not None:
+            release()
+
+    def __iter__(self):
+        yield from self.stream
+
+    async def __aiter__(self):
+        async for chunk in self.stream:
+            yield chunk
+
+    def close(self) -> None:
+        try:
+            self.stream.close()
+        finally:
+            self._release_once()
+
+    async def aclose(self) -> None:
+        try:
+            await self.stream.aclose()
+        finally:
+            self._release_once()
+
+
+class _SyncTransport(httpx.BaseTransport):
+    def __init__(self, endpoint: "Endpoint"):
+        self.endpoint = endpoint
+        self.pool = httpx.HTTPTransport(verify=endpoint.ssl_context, limits=endpoint.limits)
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        return self.endpoint.send(request, self.pool)
+
+    def close(self) -> None:
+        self.pool.close()
+
+
+class _AsyncTransport(httpx.AsyncBaseTransport):
+    # httpcore 의 비동기 연결은 만든 이벤트 루프에 묶이므로 루프마다 연결 풀을 따로 둠
+    # (asyncio.run 을 여러 번 불러도 같은 AsyncClient 를 그대로 쓸 수 있음)
+    def __init__(self, endpoint: "Endpoint"):
+        self.endpoint = endpoint
+        self.pools: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        loop = asyncio.get_running_loop()
+        pool = self.pools.get(loop)
+        if pool is None:
+            pool = self.pools[loop] = httpx.AsyncHTTPTransport(
+                verify=self.endpoint.ssl_context, limits=self.endpoint.limits
+            )
+        return await self.endpoint.asend(request, pool)
+
+    async def aclose(self) -> None:
+        pool = self.pools.pop(asyncio.get_running_loop(), None)
+        if pool is not None:
+            await pool.aclose()
+
+
+class _Flight:
+    """진행 중인 요청 하나와 그 응답을 기다리는 호출 수"""
+
+    def __init__(self, task: Optional[asyncio.Task] = None):
+        self.task = task
+        self.done = threading.Event()
+        self.result: Optional[tuple] = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 1
+
+
+class Endpoint:
+    """base_url 하나에 대한 연결 풀, 동시 요청 제한, single-flight, 측정값"""
+
+    def __init__(
+        self,
+        base_url: str,
+        *,
+        max_concurrency: int = 8,
+        max_connections: Optional[int] = None,
+        coalesce: bool = True,
+        timeout: float = 600.0,
+        **scheduler_settings,
+    ) -> None:
+        """scheduler_settings 는 scheduler.Scheduler 의 인자 (rate, burst, adaptive, target_latency, max_attempts 등)"""
+        self.base_url = base_url
+        self.coalesce = coalesce
+        self.scheduler = Scheduler(base_url, max_concurrency=max_concurrency, **scheduler_settings)
+        connections = max_connections or max_concurrency
+        self.limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+        # 인증서 묶음을 읽는 데 수십 ms 가 걸리므로 루프마다 연결 풀을 만들 때 재사용
+        self.ssl_context = httpx.create_ssl_context()
+        self.lock = threading.Lock()
+        self.flights: dict[tuple, _Flight] = {}
+        self.async_flights: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self.client = httpx.Client(transport=_SyncTransport(self), timeout=timeout)
+        self.async_client = httpx.AsyncClient(transport=_AsyncTransport(self), timeout=timeout)
+        self.coalesced = 0
+
+    @property
+    def max_concurrency(self) -> int:
+        return self.scheduler.max_concurrency
+
+    @max_concurrency.setter
+    def max_concurrency(self, limit: int) -> None:
+        self.scheduler.max_concurrency = limit
+
+    def _key(self, request: httpx.Request) -> Optional[tuple]:
+        if not self.coalesce or request.method != "POST":
+            return None
+        try:
+            body = request.content
+            stream = json.loads(body).get("stream")
+        except (httpx.RequestNotRead, ValueError, AttributeError):
+            return None
+        # 스트리밍 응답은 호출마다 토큰을 받아야 하므로 합치지 않음
+        if stream:
+            return None
+        # 인증 등 헤더가 다른 요청은 서버가 다르게 처리할 수 있으므로 합치지 않음
+        headers = tuple(sorted(
+            (name, value) for name, value in request.headers.multi_items() if name not in UNKEYED_HEADERS
+        ))
+        return str(request.url), body, headers
+
+    def _wrap(self, response: httpx.Response, started: float, overloaded: bool = False) -> httpx.Response:
+        release = lambda: self.scheduler.release(started, overloaded=overloaded)
+        return httpx.Response(
+            response.status_code,
+            headers=response.headers,
+            stream=_ReleasingStream(response.stream, release),
+            extensions=response.extensions,
+        )
+
+    @staticmethod
+    def _replay(result: tuple) -> httpx.Response:
+        status, headers, content, extensions = result
+        return httpx.Response(status, headers=headers, content=content, extensions=extensions)
+
+    # 동기 경로 (invoke, 스레드에서 도는 노드)
+    def _send(self, request: httpx.Request, pool: httpx.HTTPTransport) -> httpx.Response:
+        for attempt in itertools.count():
+            started = self.scheduler.acquire()
+            try:
+                response = pool.handle_request(request)
+            except Exception as e:
+                overloaded = is_overload(e)
+                self.scheduler.release(started, overloaded=overloaded)
+                delay = self.scheduler.backoff(attempt, e) if overloaded else None
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                continue
+            except BaseException:
+                self.scheduler.release(started)
+                raise
+            if response.status_code not in RETRY_STATUS:
+                return self._wrap(response, started)
+            delay = self.scheduler.backoff(attempt, response)
+            if delay is None:
+                # 마지막 시도: 오류 응답을 그대로 돌려줌 (openai 클라이언트가 예외로 바꿈)
+                return self._wrap(response, started, overloaded=True)
+            response.close()
+            self.scheduler.release(started, overloaded=True)
+            time.sleep(delay)
+
+    def send(self, request: httpx.Request, pool: httpx.HTTPTransport) -> httpx.Response:
+        key = self._key(request)
+        if key is None:
+            return self._send(request, pool)
+        with self.lock:
+            flight = self.flights.get(key)
+            if flight is None:
+                flight = self.flights[key] = _Flight()
+                leader = True
+            else:
+                self.coalesced += 1
+                leader = False
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return self._replay(flight.result)
+        try:
+            response = self._send(request, pool)
+            try:
+                content = response.read()
+            finally:
+                response.close()
+            flight.result = (response.status_code, response.headers, content, response.extensions)
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.flights[key]
+            flight.done.set()
+        return self._replay(flight.result)
+
+    # 비동기 경로 (ainvoke, astream)
+    async def _asend(self, request: httpx.Request, pool: httpx.AsyncHTTPTransport) -> httpx.Response:
+        for attempt in itertools.count():
+            started = await self.scheduler.aacquire()
+            try:
+                response = await pool.handle_async_request(request)
+            except Exception as e:
+                overloaded = is_overload(e)
+                self.scheduler.release(started, overloaded=overloaded)
+                delay = self.scheduler.backoff(attempt, e) if overloaded else None
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                self.scheduler.release(started)
+                raise
+            if response.status_code not in RETRY_STATUS:
+                return self._wrap(response, started)
+            delay = self.scheduler.backoff(attempt, response)
+            if delay is None:
+                return self._wrap(response, started, overloaded=True)
+            await response.aclose()
+            self.scheduler.release(started, overloaded=True)
+            await asyncio.sleep(delay)
+
+    async def _afetch(self, request: httpx.Request, pool: httpx.AsyncHTTPTransport) -> tuple:
+        response = await self._asend(request, pool)
+        try:
+            content = await response.aread()
+        finally:
+            await response.aclose()
+        return response.status_code, response.headers, content, response.extensions
+
+    async def asend(self, request: httpx.Request, pool: httpx.AsyncHTTPTransport) -> httpx.Response:
+        key = self._key(request)
+        if key is None:
+            return await self._asend(request, pool)
+        loop = asyncio.get_running_loop()
+        with self.lock:
+            flights = self.async_flights.setdefault(loop, {})
+            flight = flights.get(key)
+            if flight is None:
+                # 요청은 별도 태스크에서 보내고, 기다리는 호출이 모두 취소됐을 때만 취소
+                flight = flights[key] = _Flight(loop.create_task(self._afetch(request, pool)))
+                flight.task.add_done_callback(
+                    lambda _, flight=flight: flights.pop(key) if flights.get(key) is flight else None
+                )
+            else:
+                self.coalesced += 1
+                flight.waiters += 1
+        try:
+            return self._replay(await asyncio.shield(flight.task))
+        except asyncio.CancelledError:
+            if not flight.task.done():
+                with self.lock:
+                    flight.waiters -= 1
+                    if flight.waiters == 0:
+                        flight.task.cancel()
+            raise
+
+    def stats(self) -> dict[str, Any]:
+        stats = self.scheduler.stats()
+        with self.lock:
+            coalesced = self.coalesced
+        return {"base_url": self.base_url, "requests": stats.pop("calls"), "coalesced": coalesced, **stats}
+
+    def close(self) -> None:
+        self.client.close()
+
+
+_lock = threading.Lock()
+_endpoints: dict[str, Endpoint] = {}
+_models: dict[tuple, Any] = {}
+
+
+def configure(base_url: str, **settings) -> Endpoint:
+    """base_url 의 설정을 정함 (Endpoint 인자). 이미 쓰고 있는 endpoint 는 max_concurrency / coalesce 만 바꿀 수 있음"""
+    base_url = base_url.rstrip("/")
+    with _lock:
+        endpoint = _endpoints.get(base_url)
+        if endpoint is None:
+            endpoint = _endpoints[base_url] = Endpoint(base_url, **settings)
+            return endpoint
+    unsupported = set(settings) - {"max_concurrency", "coalesce"}
+    if unsupported:
+        raise ValueError(f"{base_url} 는 이미 사용 중이라 {sorted(unsupported)} 를 바꿀 수 없습니다")
+    for name, value in settings.items():
+        setattr(endpoint, name, value)
+    return endpoint
+
+
+def endpoint(base_url: str) -> Endpoint:
+    """base_url 의 공유 endpoint (없으면 기본 설정으로 만듦)"""
+    base_url = base_url.rstrip("/")
+    with _lock:
+        if base_url not in _endpoints:
+            _endpoints[base_url] = Endpoint(base_url)
+        return _endpoints[base_url]
+
+
+def chat_model(*, base_url: str, **kwargs):
+    """공유 연결 풀을 쓰는 ChatOpenAI. 같은 인자로 다시 부르면 같은 객체를 돌려줌"""
+    from langchain_openai import ChatOpenAI
+
+    shared = endpoint(base_url)
+    # 재시도는 endpoint 의 스케줄러가 하므로 openai 클라이언트의 재시도는 끔 (겹치면 시도 횟수가 곱해짐)
+    kwargs.setdefault("max_retries", 0)
+    key = (shared.base_url, json.dumps(kwargs, sort_keys=True, default=repr))
+    with _lock:
+        model = _models.get(key)
+        if model is None:
+            model = _models[key] = ChatOpenAI(
+                base_url=base_url,
+                http_client=shared.client,
+                http_async_client=shared.async_client,
+                **kwargs,
+            )
+        return model
+
+
+def stats() -> list[dict[str, Any]]:
+    with _lock:
+        endpoints = list(_endpoints.values())
+    return [endpoint.stats() for endpoint in endpoints]
+
+
+def report() -> str:
+    lines = [f"{'endpoint':<32} {'limit':>7} {'요청':>7} {'합침':>6} {'재시도':>6} {'대기열':>6} {'최대':>5} {'평균 대기':>9} {'최대 대기':>9} {'사용률':>6}"]
+    for s in stats():
+        lines.append(
+            f"{s['base_url'][:32]:<32} {s['limit']:>3}/{s['max_concurrency']:<3} {s['requests']:>7} {s['coalesced']:>6} {s['retries']:>6} "
+            f"{s['queued']:>6} {s['max_queued']:>5} {s['wait_seconds_avg'] * 1000:>7.1f}ms "
+            f"{s['wait_seconds_max'] * 1000:>7.0f}ms {s['utilization']:>6.0%}"
+        )
+    return "\n".join(lines)
+
+
+def to_prometheus() -> str:
+    """Prometheus 텍스트 형식 (node_metrics.NodeMetrics.to_prometheus 와 같은 파일에 이어 붙여도 됨)"""
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(samples)
+
+    with _lock:
+        endpoints = list(_endpoints.values())
+    snapshots = [(f'endpoint="{e.base_url}"', e, e.stats()) for e in endpoints]
+    for field, name, kind, help_text in (
+        ("requests", "llm_endpoint_requests_total", "counter", "서버로 보낸 요청 수"),
+        ("coalesced", "llm_endpoint_coalesced_total", "counter", "진행 중인 같은 요청에 합쳐진 호출 수"),
+        ("in_flight", "llm_endpoint_in_flight", "gauge", "서버에서 처리 중인 요청 수"),
+        ("queued", "llm_endpoint_queue_depth", "gauge", "슬롯을 기다리는 요청 수"),
+        ("retries", "llm_endpoint_retries_total", "counter", "백오프 후 다시 보낸 요청 수"),
+        ("overloads", "llm_endpoint_overloads_total", "counter", "과부하 응답/오류 수"),
+        ("limit", "llm_endpoint_concurrency_limit", "gauge", "AIMD 가 정한 현재 동시 요청 제한"),
+        ("max_concurrency", "llm_endpoint_max_concurrency", "gauge", "동시 요청 제한 상한"),
+        ("busy_seconds", "llm_endpoint_busy_seconds_total", "counter", "요청이 슬롯을 차지한 시간 합계"),
+    ):
+        metric(name, kind, help_text, [f"{name}{{{label}}} {s[field]}" for label, _, s in snapshots])
+    histogram = []
+    for label, _, s in snapshots:
+        for bound, count in zip(WAIT_BUCKETS, s["wait_buckets"]):
+            histogram.append(f'llm_endpoint_wait_seconds_bucket{{{label},le="{bound}"}} {count}')
+        histogram.append(f'llm_endpoint_wait_seconds_bucket{{{label},le="+Inf"}} {s["requests"]}')
+        histogram.append(f"llm_endpoint_wait_seconds_sum{{{label}}} {s['wait_seconds_total']:.6f}")
+        histogram.append(f"llm_endpoint_wait_seconds_count{{{label}}} {s['requests']}")
+    metric("llm_endpoint_wait_seconds", "histogram", "슬롯을 얻기까지 기다린 시간", histogram)
+    return "\n".join(lines) + "\n"
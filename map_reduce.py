@@ -0,0 +1,184 @@
+import asyncio
+import threading
+import time
+import weakref
+from typing import Annotated, Callable, List, Optional, TypedDict
+
+from langgraph.graph import StateGraph
+from langgraph.types import RetryPolicy, Send
+from langgraph.utils.runnable import RunnableCallable
+
+from scheduler import is_overload, priority
+
+# 검색된 문서 N개를 문서(또는 배치)마다 따로 요약한 뒤 부분 요약을 단계적으로 합치는 map-reduce 요약
+#
+#   workflow = StateGraph(MapReduceState)
+#   workflow.add_node("searcher", search_documents)
+#   final = add_map_reduce(workflow, "searcher", LLMSummarizer(llm, max_concurrency=8), fanin=8)
+#   workflow.set_finish_point(final)
+#   app = workflow.compile().with_config(max_concurrency=8)   # 동기 실행 스레드 수 (기본은 CPU 수 + 4)
+#   for update in app.stream(state, stream_mode="updates"): ...   # 부분 요약이 끝나는 대로 나옴
+#
+# map: source 노드 다음에 Send 로 배치마다 map_summary 태스크를 만들어 한 슈퍼스텝에서 동시에 실행
+# reduce: 부분 요약이 fanin 개보다 많으면 fanin 개씩 묶어 다시 Send 로 합치기를 반복하고,
+#         fanin 개 이하가 되면 finalize 가 마지막으로 한 번 합쳐서 summary 에 씀
+# 동시에 LLM 을 부르는 수는 LLMSummarizer 의 세마포어가 제한하므로(프로세스 전체에서 공유)
+# 서버가 밀리면 남은 태스크는 자리가 날 때까지 기다리고, 과부하 오류(429/503/시간 초과)는 재시도합니다.
+# 부분 요약은 (level, index) 순서로 합치므로 완료 순서와 상관없이 결과가 같습니다.
+# 체크포인터로 같은 스레드에서 다시 실행할 때는 source 노드가 {"partials": None} 을 반환해서 지난 부분 요약을 비웁니다.
+
+
+def add_partials(left: list, right: Optional[list]) -> list:
+    # None 이 들어오면 비움 (operator.add 로는 지울 수 없음)
+    return [] if right is None else (left or []) + right
+
+
+class MapReduceState(TypedDict):
+    query: str
+    documents: List[str]
+    # {"level": 0(문서 요약) / 1.., "index": 같은 level 안의 순서, "text": 요약}
+    partials: Annotated[list, add_partials]
+    summary: str
+
+
+def _top_level(partials: list) -> list[dict]:
+    if not partials:
+        return []
+    level = max(item["level"] for item in partials)
+    return sorted((item for item in partials if item["level"] == level), key=lambda item: item["index"])
+
+
+class LLMSummarizer:
+    """LLM 으로 문서/부분 요약 목록을 요약 (동시 호출 수를 max_concurrency 로 제한).
+
+    LLM 호출은 run_as 우선순위(기본 batch)로 나가므로 같은 서버를 쓰는 대화 요청이 먼저 처리됨
+    """
+
+    PROMPT = "다음은 '{query}' 에 대한 자료입니다. 질문에 필요한 내용만 간결하게 요약하세요.\n\n{texts}"
+
+    def __init__(self, llm, *, max_concurrency: int = 8, prompt: Optional[str] = None, run_as: str = "batch"):
+        self.llm = llm
+        self.run_as = run_as
+        self.max_concurrency = max_concurrency
+        self.prompt = prompt or self.PROMPT
+        self.semaphore = threading.BoundedSemaphore(max_concurrency)
+        self.async_semaphores: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.waiting = 0
+        self.wait_time = 0.0
+
+    def _messages(self, query: str, texts: list[str]) -> str:
+        return self.prompt.format(query=query, texts="\n\n---\n\n".join(texts))
+
+    def _enter(self) -> float:
+        with self.lock:
+            self.waiting += 1
+        return time.perf_counter()
+
+    def _entered(self, start: float) -> None:
+        with self.lock:
+            self.waiting -= 1
+            self.in_flight += 1
+            self.wait_time += time.perf_counter() - start
+
+    def _exit(self) -> None:
+        with self.lock:
+            self.in_flight -= 1
+
+    def __call__(self, query: str, texts: list[str]) -> str:
+        start = self._enter()
+        with self.semaphore:
+            self._entered(start)
+            try:
+                with priority(self.run_as):
+                    return self.llm.invoke(self._messages(query, texts)).content
+            finally:
+                self._exit()
+
+    async def acall(self, query: str, texts: list[str]) -> str:
+        # asyncio.Semaphore 는 처음 사용한 이벤트 루프에 묶이므로 루프마다 따로 생성
+        loop = asyncio.get_running_loop()
+        with self.lock:
+            semaphore = self.async_semaphores.setdefault(loop, asyncio.Semaphore(self.max_concurrency))
+        start = self._enter()
+        async with semaphore:
+            self._entered(start)
+            try:
+                with priority(self.run_as):
+                    return (await self.llm.ainvoke(self._messages(query, texts))).content
+            finally:
+                self._exit()
+
+
+def add_map_reduce(
+    workflow: StateGraph,
+    source: str,
+    summarize: Callable[[str, list[str]], str],
+    *,
+    batch_size: int = 1,
+    fanin: int = 8,
+    retry: Optional[RetryPolicy] = None,
+) -> str:
+    """source 노드 뒤에 map-reduce 요약 노드들을 붙이고 마지막 노드 이름을 반환.
+
+    summarize(query, texts) -> 요약 문자열. acall 메서드가 있으면(LLMSummarizer) ainvoke 에서 그것을 씀.
+    """
+    if fanin < 2:
+        raise ValueError("fanin 은 2 이상이어야 합니다")
+    retry = retry or RetryPolicy(max_attempts=4, initial_interval=0.5, retry_on=is_overload)
+    asummarize = getattr(summarize, "acall", None)
+
+    def map_summary(task: dict) -> dict:
+        text = summarize(task["query"], task["texts"])
+        return {"partials": [{"level": task["level"], "index": task["index"], "text": text}]}
+
+    async def amap_summary(task: dict) -> dict:
+        if asummarize is None:
+            return await asyncio.to_thread(map_summary, task)
+        text = await asummarize(task["query"], task["texts"])
+        return {"partials": [{"level": task["level"], "index": task["index"], "text": text}]}
+
+    def fan_out(state: dict):
+        documents = state.get("documents") or []
+        if not documents:
+            return "finalize"
+        return [
+            Send("map_summary", {"query": state["query"], "level": 0, "index": i // batch_size,
+                                 "texts": documents[i:i + batch_size]})
+            for i in range(0, len(documents), batch_size)
+        ]
+
+    def collect(state: dict) -> dict:
+        return {}
+
+    def reduce_or_finish(state: dict):
+        items = _top_level(state.get("partials"))
+        if len(items) <= fanin:
+            return "finalize"
+        level = items[0]["level"] + 1
+        return [
+            Send("map_summary", {"query": state["query"], "level": level, "index": i // fanin,
+                                 "texts": [item["text"] for item in items[i:i + fanin]]})
+            for i in range(0, len(items), fanin)
+        ]
+
+    def finalize(state: dict) -> dict:
+        texts = [item["text"] for item in _top_level(state.get("partials"))]
+        if len(texts) > 1:
+            return {"summary": summarize(state["query"], texts)}
+        return {"summary": texts[0] if texts else ""}
+
+    async def afinalize(state: dict) -> dict:
+        texts = [item["text"] for item in _top_level(state.get("partials"))]
+        if len(texts) > 1 and asummarize is not None:
+            return {"summary": await asummarize(state["query"], texts)}
+        return await asyncio.to_thread(finalize, state)
+
+    workflow.add_node("map_summary", RunnableCallable(map_summary, amap_summary, name="map_summary"), retry=retry)
+    workflow.add_node("collect", collect)
+    workflow.add_node("finalize", RunnableCallable(finalize, afinalize, name="finalize"), retry=retry)
+    workflow.add_conditional_edges(source, fan_out, ["map_summary", "finalize"])
+    workflow.add_edge("map_summary", "collect")
+    workflow.add_conditional_edges("collect", reduce_or_finish, ["map_summary", "finalize"])
+    return "finalize"
@@ -0,0 +1,184 @@
+import asyncio
+import queue
+import threading
+import time
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Optional
+
+from langchain_core.runnables import Runnable
+
+
+class MicroBatcher:
+    """여러 그래프 실행에서 동시에 들어오는 호출을 모아 한 번의 batch 호출로 보내는 래퍼.
+
+    첫 요청이 들어온 뒤 window 초 동안(또는 max_batch 개가 찰 때까지) 기다렸다가 묶어서
+    보내고(batch_as_completed / abatch_as_completed), 결과는 끝나는 대로 각 호출자에게
+    돌려줍니다. 다른 호출이 진행 중이지 않으면 기다리지 않고 바로 보냅니다(세션이 하나일 때).
+    호출자의 config(콜백, 태그, stream_mode="messages" 토큰 스트리밍)는 호출마다 그대로 넘기고,
+    config 없이 들어온 요청끼리는 한 묶음 안에서 입력이 똑같으면 한 번만 보냅니다.
+    한 요청이 실패해도 같은 묶음의 다른 요청에는 영향이 없습니다.
+
+        router = MicroBatcher(supervisor_llm, window=0.02, max_batch=16)
+        response = router.invoke(prompt, config)          # 동기 노드
+        response = await router.ainvoke(prompt, config)   # 비동기 노드
+    """
+
+    def __init__(
+        self,
+        runnable: Runnable,
+        *,
+        window: float = 0.02,
+        max_batch: int = 16,
+        max_inflight_batches: int = 16,
+    ):
+        self.runnable = runnable
+        self.window = window
+        self.max_batch = max_batch
+        self.stats = {"calls": 0, "batches": 0, "sent": 0, "direct": 0}
+        self.lock = threading.Lock()
+        self.outstanding = 0  # 결과를 기다리는 호출 수 (동기 + 비동기)
+        # 동기 경로: 수집 스레드가 큐에서 묶음을 만들고 풀에서 batch 를 실행
+        self.queue: queue.Queue = queue.Queue()
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_inflight_batches, thread_name_prefix="micro-batch"
+        )
+        self.collector: Optional[threading.Thread] = None
+        # 비동기 경로: 이벤트 루프마다 대기 목록과 타이머
+        self.pending: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    def _dedupe(self, batch: list) -> tuple[list, list, list[int]]:
+        # config 없는 같은 입력은 한 번만 보내고 결과를 나눠 줌
+        # (config 가 있으면 콜백/run id 가 호출자마다 다르므로 합치지 않음)
+        unique: dict[Any, int] = {}
+        order = []
+        for i, (item, config, _) in enumerate(batch):
+            if config is not None:
+                key: Any = ("config", i)
+            else:
+                key = item if isinstance(item, str) else repr(item)
+            order.append(unique.setdefault(key, len(unique)))
+        distinct = [None] * len(unique)
+        configs: list = [None] * len(unique)
+        for (item, config, _), slot in zip(batch, order):
+            distinct[slot] = item
+            configs[slot] = {**(config or {}), "max_concurrency": len(unique)}
+        with self.lock:
+            self.stats["batches"] += 1
+            self.stats["sent"] += len(distinct)
+        return distinct, configs, order
+
+    @staticmethod
+    def _waiters(batch: list, order: list[int]) -> dict[int, list]:
+        waiters: dict[int, list] = {}
+        for (_, _, future), slot in zip(batch, order):
+            waiters.setdefault(slot, []).append(future)
+        return waiters
+
+    @staticmethod
+    def _resolve(futures: list, result: Any) -> None:
+        for future in futures:
+            if future.done():  # 호출자가 취소한 경우
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def _dispatch(self, batch: list[tuple[Any, Optional[dict], Future]]) -> None:
+        distinct, configs, order = self._dedupe(batch)
+        waiters = self._waiters(batch, order)
+        try:
+            # 묶음 전체가 끝날 때까지 기다리지 않고 끝난 요청부터 결과를 돌려줌
+            # max_concurrency 를 주지 않으면 langchain 기본 스레드 풀(CPU 수 + 4)만큼씩 나눠 보냄
+            for slot, result in self.runnable.batch_as_completed(
+                distinct, configs, return_exceptions=True
+            ):
+                self._resolve(waiters.pop(slot), result)
+        except Exception as e:
+            for futures in waiters.values():
+                self._resolve(futures, e)
+
+    def _collect(self) -> None:
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self.executor.submit(self._dispatch, batch)
+
+    def _enter(self) -> bool:
+        """호출 시작. 다른 호출이 하나도 진행 중이 아니면 True (묶을 상대가 없으므로 바로 보냄)"""
+        with self.lock:
+            self.stats["calls"] += 1
+            self.outstanding += 1
+            alone = self.outstanding == 1
+            if alone:
+                self.stats["direct"] += 1
+            return alone
+
+    def _exit(self) -> None:
+        with self.lock:
+            self.outstanding -= 1
+
+    def invoke(self, input: Any, config: Optional[dict] = None) -> Any:
+        try:
+            if self._enter():
+                return self.runnable.invoke(input, config)
+            with self.lock:
+                if self.collector is None:
+                    self.collector = threading.Thread(
+                        target=self._collect, name="micro-batch-collector", daemon=True
+                    )
+                    self.collector.start()
+            future: Future = Future()
+            self.queue.put((input, config, future))
+            return future.result()
+        finally:
+            self._exit()
+
+    async def _adispatch(self, batch: list[tuple[Any, Optional[dict], asyncio.Future]]) -> None:
+        distinct, configs, order = self._dedupe(batch)
+        waiters = self._waiters(batch, order)
+        try:
+            async for slot, result in self.runnable.abatch_as_completed(
+                distinct, configs, return_exceptions=True
+            ):
+                self._resolve(waiters.pop(slot), result)
+        except Exception as e:
+            for futures in waiters.values():
+                self._resolve(futures, e)
+
+    def _aflush(self, loop: asyncio.AbstractEventLoop) -> None:
+        state = self.pending.get(loop)
+        if not state or not state["batch"]:
+            return
+        batch, state["batch"] = state["batch"], []
+        if state["timer"] is not None:
+            state["timer"].cancel()
+            state["timer"] = None
+        task = loop.create_task(self._adispatch(batch))
+        state["tasks"].add(task)
+        task.add_done_callback(state["tasks"].discard)
+
+    async def ainvoke(self, input: Any, config: Optional[dict] = None) -> Any:
+        try:
+            if self._enter():
+                return await self.runnable.ainvoke(input, config)
+            loop = asyncio.get_running_loop()
+            state = self.pending.setdefault(loop, {"batch": [], "timer": None, "tasks": set()})
+            future = loop.create_future()
+            state["batch"].append((input, config, future))
+            if len(state["batch"]) >= self.max_batch:
+                self._aflush(loop)
+            elif state["timer"] is None:
+                state["timer"] = loop.call_later(self.window, self._aflush, loop)
+            return await future
+        finally:
+            self._exit()
@@ -1,12 +1,17 @@
 from langgraph.graph import StateGraph, MessagesState, START
-from langchain_openai import ChatOpenAI
+from lazy_imports import lazy_chat_openai
+from langchain_core.globals import set_llm_cache
+from llm_cache import ResponseCache
 
 from dotenv import load_dotenv
-from langgraph.checkpoint.memory import MemorySaver
+from sqlite_saver import SqliteSaver
+from write_behind import WriteBehindSaver
 
 load_dotenv()
 
-model = ChatOpenAI(
+set_llm_cache(ResponseCache("llm-cache.db"))
+
+model = lazy_chat_openai(
     base_url="http://localhost:1234/v1",
     model_name="l3-8b-stheno-v3.1-iq-imatrix"
 )
@@ -20,7 +25,7 @@ builder = StateGraph(MessagesState)
 builder.add_node("call_model", call_model)
 builder.add_edge(START, "call_model")
 
-memory = MemorySaver()
+memory = WriteBehindSaver(SqliteSaver("noconfig-checkpoint.db")) # 저장은 백그라운드에서, 그래프가 멈추면 즉시 저장
 graph = builder.compile(checkpointer=memory)
 
 config = {"configurable": {"thread_id": "1"}}
@@ -0,0 +1,319 @@
+import argparse
+import contextvars
+import json
+import os
+import runpy
+import sys
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from typing import Any, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.tracers.context import register_configure_hook
+
+# 노드/조건부 엣지 단위 지연 시간과 자원 사용량 측정
+#
+#   metrics = NodeMetrics(jsonl_path="metrics/nodes.jsonl")
+#   app = instrument(workflow, metrics, graph="rag").compile()
+#   ...
+#   metrics.write_prometheus("metrics/nodes.prom")
+#   print(metrics.report())
+#
+# 스크립트를 고치지 않고 모든 그래프를 측정하려면
+#   python node_metrics.py --out metrics 8.multi-agent.py
+# 처럼 실행합니다 (StateGraph.compile 을 바꿔 끼워서 compile 되는 모든 그래프를 감쌈).
+#
+# 호출마다 기록하는 값: 경과 시간(wall), CPU 시간, 노드 안에서 호출한 LLM 의 입력/출력 토큰 수.
+# 측정 비용이 큰 두 값은 켤 때만 기록합니다:
+# - trace_memory=True (--tracemalloc): tracemalloc 으로 잰 호출 전후 메모리 변화(alloc_bytes, 음수일 수 있음).
+#   Prometheus 로는 늘어난 양과 줄어든 양을 따로 합친 두 카운터(alloc/freed)로 내보냄
+# - measure_state=True (--state-size): 입력/출력 상태 크기 (체크포인터가 쓰는 직렬화 기준 바이트, 호출마다 상태 전체를 직렬화)
+# 토큰은 노드를 실행하는 스레드/태스크의 콜백으로 세므로 MicroBatcher 처럼 다른 스레드에서 LLM 을
+# 부르는 경우에는 노드가 반환한 메시지의 usage_metadata 로 대신 셉니다.
+# CPU 시간은 동기 노드는 스레드 CPU 시간이고, 비동기 노드는 같은 루프의 다른 태스크가 섞인 프로세스 CPU 시간입니다.
+
+WALL_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _TokenCounter(BaseCallbackHandler):
+    def __init__(self):
+        self.input = 0
+        self.output = 0
+
+    def on_llm_end(self, response, **kwargs) -> None:
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    self.input += usage.get("input_tokens", 0)
+                    self.output += usage.get("output_tokens", 0)
+
+
+# 이 변수가 설정된 컨텍스트에서 실행되는 LLM 호출에는 카운터 콜백이 자동으로 붙음
+_token_counter: contextvars.ContextVar[Optional[_TokenCounter]] = contextvars.ContextVar(
+    "node_metrics_token_counter", default=None
+)
+register_configure_hook(_token_counter, inheritable=True)
+
+
+def _message_tokens(output: Any) -> tuple[int, int]:
+    # 노드가 반환한 메시지에 붙은 usage_metadata 합계
+    tokens_in = tokens_out = 0
+    values = output.values() if isinstance(output, dict) else []
+    for value in values:
+        for message in value if isinstance(value, (list, tuple)) else [value]:
+            usage = getattr(message, "usage_metadata", None)
+            if usage:
+                tokens_in += usage.get("input_tokens", 0)
+                tokens_out += usage.get("output_tokens", 0)
+    return tokens_in, tokens_out
+
+
+class NodeMetrics:
+    def __init__(self, *, jsonl_path: Optional[str] = None, trace_memory: bool = False, measure_state: bool = False):
+        from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+        self.jsonl_path = jsonl_path
+        self.trace_memory = trace_memory
+        self.measure_state = measure_state
+        self.serde = JsonPlusSerializer()
+        # (graph, kind, name) -> 합계
+        self.totals: dict[tuple, dict[str, float]] = defaultdict(
+            lambda: {
+                "calls": 0, "errors": 0, "wall": 0.0, "cpu": 0.0, "alloc_bytes": 0, "freed_bytes": 0,
+                "state_in_bytes": 0, "state_out_bytes": 0, "tokens_in": 0, "tokens_out": 0,
+                "buckets": [0] * len(WALL_BUCKETS),
+            }
+        )
+        self.lock = threading.Lock()
+        self.jsonl = None
+        if jsonl_path:
+            os.makedirs(os.path.dirname(jsonl_path) or ".", exist_ok=True)
+            self.jsonl = open(jsonl_path, "a", encoding="utf-8")
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def _size(self, value: Any) -> Optional[int]:
+        if not self.measure_state:
+            return None
+        try:
+            return len(self.serde.dumps_typed(value)[1])
+        except Exception:
+            return None
+
+    def record(self, graph: str, kind: str, name: str, **fields) -> None:
+        entry = {"ts": time.time(), "graph": graph, "kind": kind, "name": name, **fields}
+        with self.lock:
+            totals = self.totals[(graph, kind, name)]
+            totals["calls"] += 1
+            totals["errors"] += 1 if fields.get("error") else 0
+            for key in ("wall", "cpu", "state_in_bytes", "state_out_bytes", "tokens_in", "tokens_out"):
+                totals[key] += fields.get(key) or 0
+            # 카운터는 줄어들면 안 되므로 메모리 변화는 늘어난 양과 줄어든 양으로 나눠서 합침
+            alloc = fields.get("alloc_bytes") or 0
+            totals["alloc_bytes"] += max(alloc, 0)
+            totals["freed_bytes"] += max(-alloc, 0)
+            for i, bound in enumerate(WALL_BUCKETS):
+                if fields["wall"] <= bound:
+                    totals["buckets"][i] += 1
+            if self.jsonl is not None:
+                self.jsonl.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+                self.jsonl.flush()
+
+    # 측정
+    def _start(self, input: Any, asynchronous: bool) -> dict:
+        return {
+            "state_in": self._size(input),
+            "alloc": tracemalloc.get_traced_memory()[0] if self.trace_memory and tracemalloc.is_tracing() else None,
+            "cpu": time.process_time() if asynchronous else time.thread_time(),
+            "wall": time.perf_counter(),
+            "counter": _TokenCounter(),
+        }
+
+    def _finish(self, graph, kind, name, started, output, error, asynchronous) -> None:
+        wall = time.perf_counter() - started["wall"]
+        cpu = (time.process_time() if asynchronous else time.thread_time()) - started["cpu"]
+        alloc = None
+        if started["alloc"] is not None and tracemalloc.is_tracing():
+            alloc = tracemalloc.get_traced_memory()[0] - started["alloc"]
+        counter = started["counter"]
+        tokens_in, tokens_out = counter.input, counter.output
+        if not tokens_in and not tokens_out and error is None:
+            tokens_in, tokens_out = _message_tokens(output)
+        self.record(
+            graph, kind, name, wall=wall, cpu=cpu, alloc_bytes=alloc,
+            state_in_bytes=started["state_in"],
+            state_out_bytes=self._size(output) if error is None and kind == "node" else None,
+            tokens_in=tokens_in, tokens_out=tokens_out,
+            error=None if error is None else f"{type(error).__name__}: {error}",
+        )
+
+    def wrap(self, runnable, graph: str, kind: str, name: str):
+        """runnable 을 같은 이름의 RunnableCallable 로 감쌈 (config 를 그대로 넘기므로 주입 인자도 유지)"""
+        from langgraph.utils.runnable import RunnableCallable
+
+        def call(input, config):
+            started = self._start(input, False)
+            token = _token_counter.set(started["counter"])
+            output = error = None
+            try:
+                output = runnable.invoke(input, config)
+                return output
+            except BaseException as e:
+                error = e
+                raise
+            finally:
+                _token_counter.reset(token)
+                self._finish(graph, kind, name, started, output, error, False)
+
+        async def acall(input, config):
+            started = self._start(input, True)
+            token = _token_counter.set(started["counter"])
+            output = error = None
+            try:
+                output = await runnable.ainvoke(input, config)
+                return output
+            except BaseException as e:
+                error = e
+                raise
+            finally:
+                _token_counter.reset(token)
+                self._finish(graph, kind, name, started, output, error, True)
+
+        return RunnableCallable(call, acall, name=getattr(runnable, "name", None) or name, trace=False, recurse=False)
+
+    # 내보내기
+    def to_prometheus(self) -> str:
+        """Prometheus 텍스트 형식 (node_exporter textfile collector 로 수집 가능)"""
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(samples)
+
+        with self.lock:
+            items = sorted(self.totals.items())
+            labels = {key: f'graph="{key[0]}",kind="{key[1]}",name="{key[2]}"' for key, _ in items}
+            metric("langgraph_node_calls_total", "counter", "노드/엣지 호출 수",
+                   [f"langgraph_node_calls_total{{{labels[k]}}} {t['calls']}" for k, t in items])
+            metric("langgraph_node_errors_total", "counter", "예외로 끝난 호출 수",
+                   [f"langgraph_node_errors_total{{{labels[k]}}} {t['errors']}" for k, t in items])
+            histogram = []
+            for key, t in items:
+                for bound, count in zip(WALL_BUCKETS, t["buckets"]):
+                    histogram.append(f'langgraph_node_wall_seconds_bucket{{{labels[key]},le="{bound}"}} {count}')
+                histogram.append(f'langgraph_node_wall_seconds_bucket{{{labels[key]},le="+Inf"}} {t["calls"]}')
+                histogram.append(f"langgraph_node_wall_seconds_sum{{{labels[key]}}} {t['wall']:.6f}")
+                histogram.append(f"langgraph_node_wall_seconds_count{{{labels[key]}}} {t['calls']}")
+            metric("langgraph_node_wall_seconds", "histogram", "호출당 경과 시간", histogram)
+            counters = [("cpu", "langgraph_node_cpu_seconds_total", "CPU 시간 합계")]
+            # 측정하지 않은 값은 0 으로 내보내지 않고 생략
+            if self.trace_memory:
+                counters += [
+                    ("alloc_bytes", "langgraph_node_alloc_bytes_total", "호출 전후 tracemalloc 메모리가 늘어난 양의 합계"),
+                    ("freed_bytes", "langgraph_node_freed_bytes_total", "호출 전후 tracemalloc 메모리가 줄어든 양의 합계"),
+                ]
+            if self.measure_state:
+                counters += [
+                    ("state_in_bytes", "langgraph_node_state_in_bytes_total", "입력 상태 크기 합계"),
+                    ("state_out_bytes", "langgraph_node_state_out_bytes_total", "출력(업데이트) 크기 합계"),
+                ]
+            for field, name, help_text in counters:
+                metric(name, "counter", help_text, [f"{name}{{{labels[k]}}} {t[field]}" for k, t in items])
+            tokens = []
+            for key, t in items:
+                tokens.append(f'langgraph_node_tokens_total{{{labels[key]},type="input"}} {t["tokens_in"]}')
+                tokens.append(f'langgraph_node_tokens_total{{{labels[key]},type="output"}} {t["tokens_out"]}')
+            metric("langgraph_node_tokens_total", "counter", "LLM 토큰 수", tokens)
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+        os.replace(path + ".tmp", path)
+
+    def report(self) -> str:
+        """경과 시간 합계가 큰 순서로 정리한 표"""
+        with self.lock:
+            items = sorted(self.totals.items(), key=lambda item: -item[1]["wall"])
+        lines = [f"{'graph':<20} {'kind':<5} {'name':<24} {'calls':>6} {'err':>4} {'wall 합':>9} {'평균':>8} {'cpu 합':>8} {'alloc':>9} {'tokens':>9}"]
+        for (graph, kind, name), t in items:
+            lines.append(
+                f"{graph[:20]:<20} {kind:<5} {name[:24]:<24} {t['calls']:>6} {t['errors']:>4} {t['wall']:>8.3f}s "
+                f"{t['wall'] / t['calls'] * 1000:>6.1f}ms {t['cpu']:>7.3f}s {t['alloc_bytes'] / 1024:>7.0f}KB "
+                f"{t['tokens_in'] + t['tokens_out']:>9}"
+            )
+        return "\n".join(lines)
+
+    def close(self) -> None:
+        with self.lock:
+            if self.jsonl is not None:
+                self.jsonl.close()
+                self.jsonl = None
+
+
+def instrument(builder, metrics: NodeMetrics, graph: Optional[str] = None):
+    """compile 전에 StateGraph 의 모든 노드와 조건부 엣지 함수를 측정 래퍼로 바꿈 (builder 를 그대로 반환)"""
+    from langgraph.pregel import Pregel
+
+    graph = graph or type(builder).__name__
+    for name, spec in list(builder.nodes.items()):
+        # 서브그래프는 감싸면 langgraph 가 서브그래프로 인식하지 못하므로 그대로 둠
+        if isinstance(spec.runnable, Pregel) or getattr(spec.runnable, "_node_metrics", False):
+            continue
+        wrapped = metrics.wrap(spec.runnable, graph, "node", name)
+        wrapped._node_metrics = True
+        builder.nodes[name] = spec._replace(runnable=wrapped)
+    for source, branches in builder.branches.items():
+        for name, branch in list(branches.items()):
+            if getattr(branch.path, "_node_metrics", False):
+                continue
+            wrapped = metrics.wrap(branch.path, graph, "edge", f"{source}->{name}")
+            wrapped._node_metrics = True
+            branches[name] = branch._replace(path=wrapped)
+    return builder
+
+
+def install(metrics: NodeMetrics, graph: Optional[str] = None) -> None:
+    """이후에 compile 되는 모든 StateGraph 를 자동으로 instrument"""
+    from langgraph.graph.state import StateGraph
+
+    original = StateGraph.compile
+    if getattr(original, "_node_metrics", False):
+        return
+
+    def compile(self, *args, **kwargs):
+        instrument(self, metrics, kwargs.get("name") or graph)
+        return original(self, *args, **kwargs)
+
+    compile._node_metrics = True
+    StateGraph.compile = compile
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="스크립트의 모든 그래프를 노드 단위로 측정")
+    parser.add_argument("--out", default="node-metrics", help="nodes.jsonl 과 nodes.prom 을 쓸 디렉터리")
+    parser.add_argument("--tracemalloc", action="store_true", help="호출 전후 메모리 변화 측정 (모든 할당을 추적하므로 느려짐)")
+    parser.add_argument("--state-size", action="store_true", help="입력/출력 상태 크기 측정 (호출마다 상태 전체를 직렬화)")
+    parser.add_argument("script")
+    parser.add_argument("args", nargs=argparse.REMAINDER)
+    args = parser.parse_args()
+
+    metrics = NodeMetrics(
+        jsonl_path=os.path.join(args.out, "nodes.jsonl"),
+        trace_memory=args.tracemalloc,
+        measure_state=args.state_size,
+    )
+    install(metrics, graph=os.path.basename(args.script))
+    sys.argv = [args.script, *args.args]
+    sys.path.insert(0, os.path.dirname(os.path.abspath(args.script)))
+    try:
+        runpy.run_path(args.script, run_name="__main__")
+    finally:
+        metrics.close()
+        metrics.write_prometheus(os.path.join(args.out, "nodes.prom"))
+        print("\n" + metrics.report(), file=sys.stderr)
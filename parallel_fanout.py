@@ -0,0 +1,161 @@
+import asyncio
+import multiprocessing
+import os
+import pickle
+import threading
+import weakref
+from collections import defaultdict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Optional
+
+from langgraph.utils.runnable import RunnableCallable
+
+# edge0.py 처럼 한 노드에서 여러 갈래로 퍼졌다가 합류하는 그래프의 갈래 노드를 병렬로 실행
+#
+#   graph = compile_parallel(builder, executor="process", max_workers=16, state_keys=["text"])
+#
+#   thread   langgraph 의 스레드 풀 크기를 max_workers 로 맞춤 (블로킹 I/O 노드, 노드는 그대로)
+#   process  갈래 노드를 프로세스 풀에서 실행 (GIL 때문에 스레드로는 빨라지지 않는 CPU 작업)
+#   async    동기 갈래 노드를 전용 스레드 풀에서 실행하는 비동기 노드로 바꿈 (ainvoke / astream 용)
+#
+# 갈래 노드는 nodes 로 지정하거나, 지정하지 않으면 나가는 엣지가 둘 이상인 노드의 목적지들로 정합니다.
+# process 에서는 노드 함수가 pickle 로 전달되므로 모듈 최상위 함수(또는 그 functools.partial)여야 하고,
+# 상태 중 state_keys 만 보내며 같은 슈퍼스텝의 갈래들이 같은 상태를 읽으면 한 번만 직렬화합니다.
+#
+# operator.add 같은 리듀서에 들어가는 갈래들의 결과는 완료 순서와 상관없이 langgraph 가 태스크 경로(노드 이름)
+# 순서로 적용하므로 항상 같은 순서로 합쳐집니다. 노드 이름 순서가 곧 합쳐지는 순서이므로
+# 갈래가 10개를 넘으면 b01, b02 ... 처럼 자릿수를 맞춰 이름을 붙입니다.
+#
+# process / async 가 만든 작업자 풀은 그 갈래 노드를 쓰는 그래프(with_config 복사본 포함)와 builder 가 모두
+# 수거되거나 인터프리터가 끝날 때 닫히고, close_parallel(graph) 로 바로 닫을 수도 있습니다. 그래프를 여러 번 compile 하면 pool= 로 같은 풀을 넘겨서 함께 쓰세요 (이때 닫는 것은 호출자 몫).
+
+EXECUTORS = ("thread", "process", "async")
+
+
+def fanout_targets(builder) -> list[str]:
+    """나가는 일반 엣지가 둘 이상인 노드의 목적지들"""
+    targets = defaultdict(list)
+    for start, end in builder.edges:
+        targets[start].append(end)
+    return sorted({end for ends in targets.values() if len(ends) > 1 for end in ends if end in builder.nodes})
+
+
+def _call_in_worker(func, payload: bytes):
+    return func(pickle.loads(payload))
+
+
+def _warm_up() -> None:
+    pass
+
+
+class _Payloads:
+    """같은 값들로 이루어진 상태는 한 번만 pickle (한 슈퍼스텝의 갈래들은 같은 채널 값을 읽음)"""
+
+    def __init__(self, keys: Optional[list[str]]):
+        self.keys = keys
+        self.lock = threading.Lock()
+        self.last: Optional[tuple] = None  # (값들, 직렬화 결과) - 값을 잡아 둬야 id 가 재사용되지 않음
+
+    def dumps(self, state: dict) -> bytes:
+        keys = self.keys if self.keys is not None else list(state)
+        subset = {key: state[key] for key in keys if key in state}
+        values = tuple(subset.values())
+        with self.lock:
+            if self.last is not None and len(self.last[0]) == len(values) and all(
+                a is b for a, b in zip(self.last[0], values)
+            ):
+                return self.last[1]
+            payload = pickle.dumps(subset, protocol=pickle.HIGHEST_PROTOCOL)
+            self.last = (values, payload)
+            return payload
+
+
+class _Workers:
+    """갈래 노드들이 함께 쓰는 풀. 노드들이 모두 수거되면 이 객체도 수거되면서 직접 만든 풀을 닫음"""
+
+    def __init__(self, pool: Executor, owned: bool):
+        self.pool = pool
+        # 노드 안에서 수거될 수도 있으므로 작업자를 기다리지 않음
+        self.close = weakref.finalize(self, pool.shutdown, wait=False) if owned else (lambda: None)
+
+
+def _plain_function(name: str, runnable, executor: str):
+    func = getattr(runnable, "func", None)
+    if (
+        not isinstance(runnable, RunnableCallable) or func is None
+        or runnable.func_accepts_config or runnable.func_accepts
+    ):
+        raise ValueError(f"'{name}' 노드는 상태 하나만 받는 동기 함수여야 {executor} 실행기로 옮길 수 있습니다")
+    return func
+
+
+def compile_parallel(
+    builder,
+    *,
+    executor: str = "thread",
+    max_workers: Optional[int] = None,
+    nodes: Optional[list[str]] = None,
+    state_keys: Optional[list[str]] = None,
+    mp_context: Optional[str] = None,
+    pool: Optional[Executor] = None,
+    **compile_kwargs: Any,
+):
+    """갈래 노드를 executor 방식으로 병렬 실행하도록 builder 를 compile (builder 의 노드가 바뀜)"""
+    if executor not in EXECUTORS:
+        raise ValueError(f"executor 는 {EXECUTORS} 중 하나여야 합니다: {executor!r}")
+    max_workers = max_workers or os.cpu_count() or 4
+    nodes = fanout_targets(builder) if nodes is None else nodes
+
+    if executor == "process":
+        owned = pool is None
+        if owned:
+            context = multiprocessing.get_context(mp_context)
+            pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=context)
+            # fork 방식은 첫 submit 때 작업 프로세스를 모두 만듦: 그래프 실행 스레드가 생기기 전에 미리 띄워 둠
+            pool.submit(_warm_up).result()
+        workers = _Workers(pool, owned)
+        payloads = _Payloads(state_keys)
+        for name in nodes:
+            func = _plain_function(name, builder.nodes[name].runnable, executor)
+
+            def run(state, func=func):
+                return workers.pool.submit(_call_in_worker, func, payloads.dumps(state)).result()
+
+            async def arun(state, func=func):
+                return await asyncio.wrap_future(workers.pool.submit(_call_in_worker, func, payloads.dumps(state)))
+
+            _replace_node(builder, name, RunnableCallable(run, arun, name=name), workers)
+    elif executor == "async":
+        owned = pool is None
+        if owned:
+            pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fanout")
+        workers = _Workers(pool, owned)
+        for name in nodes:
+            runnable = builder.nodes[name].runnable
+            # 이미 비동기 함수가 있는 노드는 이벤트 루프에서 그대로 동시에 실행됨
+            if getattr(runnable, "afunc", None) is not None and not getattr(runnable, "func", None):
+                continue
+            func = _plain_function(name, runnable, executor)
+
+            async def arun(state, func=func):
+                return await asyncio.get_running_loop().run_in_executor(workers.pool, func, state)
+
+            _replace_node(builder, name, RunnableCallable(func, arun, name=name), workers)
+
+    graph = builder.compile(**compile_kwargs)
+    # langgraph 는 한 슈퍼스텝의 태스크를 max_concurrency 만큼 동시에 실행함
+    return graph.with_config(max_concurrency=max_workers)
+
+
+def _replace_node(builder, name: str, runnable: RunnableCallable, workers: _Workers) -> None:
+    # 그래프는 __dict__ 로 복사되므로 그래프가 아닌 노드에 풀을 붙여 둠 (복사본과 builder 도 같은 노드를 씀)
+    runnable.fanout_workers = workers
+    builder.nodes[name] = builder.nodes[name]._replace(runnable=runnable)
+
+
+def close_parallel(graph) -> None:
+    """compile_parallel 이 만든 작업자 풀을 닫음 (pool= 로 넘긴 풀은 닫지 않음)"""
+    for node in graph.nodes.values():
+        workers = getattr(node.bound, "fanout_workers", None)
+        if workers is not None:
+            workers.close()
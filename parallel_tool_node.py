@@ -0,0 +1,132 @@
+import asyncio
+import contextvars
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Optional
+
+from langchain_core.messages import ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables.config import get_config_list
+from langgraph.prebuilt import ToolNode
+from langgraph.store.base import BaseStore
+
+
+def _shutdown_executors(executors: dict[str, ThreadPoolExecutor], lock: threading.Lock) -> None:
+    with lock:
+        pools = list(executors.values())
+        executors.clear()
+    for pool in pools:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+class ParallelToolNode(ToolNode):
+    """AIMessage 하나에 담긴 tool_calls 를 동시에 실행하는 ToolNode.
+
+    - 도구마다 동시 실행 수 제한 (max_concurrency={"search_web": 2}, 나머지는 default_concurrency)
+    - 호출 시작 후 timeout 초가 지나면 실패 ToolMessage 로 대체하고 호출을 취소
+    - 결과 ToolMessage 는 완료 순서와 상관없이 tool_calls 순서대로 반환
+
+    동기 실행에서는 도구마다 제한 크기만큼의 스레드 풀을 두고, 비동기 실행(ainvoke /
+    astream)에서는 이벤트 루프마다 도구별 세마포어를 둡니다. 제한은 노드를 공유하는
+    모든 세션에 함께 적용되므로, 한 턴의 비용은 가장 느린 도구 호출 하나로 줄어듭니다.
+    이미 실행 중인 동기 도구 스레드는 강제로 멈출 수 없으므로 결과만 버려집니다.
+    스레드 풀은 close() 를 부르거나 노드가 수거될 때 닫힙니다.
+
+        tool_node = ParallelToolNode([search_web, get_weather], timeout=10)
+        ...
+        tool_node.close()
+    """
+
+    def __init__(
+        self,
+        tools,
+        *,
+        max_concurrency: Optional[dict[str, int]] = None,
+        default_concurrency: int = 4,
+        timeout: Optional[float] = 30.0,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(tools, **kwargs)
+        self.max_concurrency = max_concurrency or {}
+        self.default_concurrency = default_concurrency
+        self.timeout = timeout
+        self.executors: dict[str, ThreadPoolExecutor] = {}
+        self.semaphores: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self.lock = threading.Lock()
+        # 노드 안에서 수거될 수도 있으므로 도구 스레드를 기다리지 않음
+        self.close = weakref.finalize(self, _shutdown_executors, self.executors, self.lock)
+
+    def _limit(self, name: str) -> int:
+        return self.max_concurrency.get(name, self.default_concurrency)
+
+    def _executor(self, name: str) -> ThreadPoolExecutor:
+        with self.lock:
+            if not self.close.alive:
+                raise RuntimeError("닫힌 ParallelToolNode 입니다")
+            if name not in self.executors:
+                self.executors[name] = ThreadPoolExecutor(
+                    max_workers=self._limit(name), thread_name_prefix=f"tool-{name}"
+                )
+            return self.executors[name]
+
+    def _semaphore(self, name: str) -> asyncio.Semaphore:
+        # asyncio.Semaphore 는 처음 사용한 이벤트 루프에 묶이므로 루프마다 따로 생성
+        loop = asyncio.get_running_loop()
+        with self.lock:
+            per_loop = self.semaphores.setdefault(loop, {})
+            if name not in per_loop:
+                per_loop[name] = asyncio.Semaphore(self._limit(name))
+            return per_loop[name]
+
+    def _timeout_message(self, call) -> ToolMessage:
+        return ToolMessage(
+            content=f"Error: {call['name']} timed out after {self.timeout}s",
+            name=call["name"],
+            tool_call_id=call["id"],
+            status="error",
+        )
+
+    def _func(self, input, config: RunnableConfig, *, store: Optional[BaseStore]) -> Any:
+        tool_calls, input_type = self._parse_input(input, store)
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        # ToolNode 처럼 호출마다 config 를 따로 만듦 (run_id 등이 호출끼리 겹치지 않게)
+        futures = [
+            self._executor(call["name"]).submit(
+                contextvars.copy_context().run, self._run_one, call, input_type, call_config
+            )
+            for call, call_config in zip(tool_calls, get_config_list(config, len(tool_calls)))
+        ]
+        outputs = []
+        for call, future in zip(tool_calls, futures):
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                outputs.append(future.result(timeout=remaining))
+            except FutureTimeoutError:
+                # 아직 시작하지 않은 호출은 취소되고, 실행 중인 호출은 결과만 버림
+                future.cancel()
+                outputs.append(self._timeout_message(call))
+        return self._combine_tool_outputs(outputs, input_type)
+
+    async def _afunc(self, input, config: RunnableConfig, *, store: Optional[BaseStore]) -> Any:
+        tool_calls, input_type = self._parse_input(input, store)
+        loop = asyncio.get_running_loop()
+        deadline = None if self.timeout is None else loop.time() + self.timeout
+
+        async def run_one(call, call_config):
+            try:
+                async with asyncio.timeout_at(deadline):
+                    async with self._semaphore(call["name"]):
+                        return await self._arun_one(call, input_type, call_config)
+            except TimeoutError:
+                return self._timeout_message(call)
+
+        # gather 는 입력 순서대로 결과를 돌려주며, 노드가 취소되면 남은 호출도 함께 취소됨
+        outputs = await asyncio.gather(
+            *(
+                run_one(call, call_config)
+                for call, call_config in zip(tool_calls, get_config_list(config, len(tool_calls)))
+            )
+        )
+        return self._combine_tool_outputs(outputs, input_type)
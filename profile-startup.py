@@ -0,0 +1,180 @@
+import argparse
+import importlib
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# 예제 스크립트별 시작 비용 측정: import 시간(-X importtime)과 첫 노드가 실행되기까지 걸린 시간
+# 사용법: python profile-startup.py [스크립트 ...] [--runs 3] [--baseline HEAD~1]
+#
+# 각 스크립트를 python -X importtime 으로 실행하고, 첫 노드(langgraph 노드/태스크 또는 LangChain
+# 체인)가 호출되는 순간의 시각을 기록한 뒤 바로 종료시킵니다. LLM 서버나 사용자 입력이 없어도 측정할
+# 수 있고, 노드 실행 이후의 시간은 포함되지 않습니다.
+# --baseline 으로 git 리비전을 주면 그 시점의 트리를 임시 디렉터리에 풀어서 같은 방법으로 측정하고 나란히 보여 줍니다.
+
+ENTRY_POINTS = [
+    "1.graph.py", "2.acc-state.py", "2.condition-edge.py", "3.loop-graph.py", "5.agent.py",
+    "7.chat-agent.py", "8.multi-agent.py", "9.hitl0.py", "9.hitl1.py", "agent-graph.py",
+    "checkpoint.py", "condition-checkpoint.py", "edge0.py", "edge1.py", "function-api.py",
+    "interrupt.py", "noconfig-checkpoint.py",
+]
+# "import time:       self [us] |  cumulative | imported package"
+IMPORT_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)")
+# 이 줄 앞의 import 는 측정 도구 자신의 것이므로 집계에서 뺌
+SCRIPT_START = "import time: -- script start --"
+
+
+def _child(script: str) -> None:
+    """첫 노드 호출 시각을 STARTUP_PROFILE_OUT 에 쓰고 즉시 종료하도록 훅을 건 뒤 스크립트 실행"""
+    import runpy
+
+    out = os.environ["STARTUP_PROFILE_OUT"]
+
+    def first_node(name):
+        with open(out, "w") as f:
+            json.dump({"first_node": time.time(), "node": name}, f)
+        sys.stderr.flush()
+        os._exit(0)
+
+    def hook(cls, method):
+        original = getattr(cls, method)
+
+        def wrapper(self, *args, **kwargs):
+            first_node(getattr(self, "name", None) or type(self).__name__)
+            return original(self, *args, **kwargs)
+
+        setattr(cls, method, wrapper)
+
+    print(SCRIPT_START, file=sys.stderr, flush=True)
+    # 쓰지는 않지만 일부러 불러옴: 모든 예제가 import 하는 langgraph.graph 비용을 훅을 걸기 전에
+    # 치르게 해서, 이 비용이 스크립트의 import 시간(SCRIPT_START 뒤)에 집계되도록 함
+    importlib.import_module("langgraph.graph")
+    from langgraph.utils.runnable import RunnableCallable
+    from langchain_core.runnables.base import RunnableSequence
+
+    for method in ("invoke", "ainvoke"):
+        hook(RunnableCallable, method)
+    for method in ("invoke", "ainvoke", "stream", "astream"):
+        hook(RunnableSequence, method)
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(script)))
+    sys.argv = [script]
+    runpy.run_path(script, run_name="__main__")
+
+
+def parse_importtime(stderr: str) -> tuple[float, list[tuple[str, float]]]:
+    """(최상위 import 들의 누적 시간 합(초), 무거운 최상위 import 목록)"""
+    top = []
+    lines = stderr.splitlines()
+    if SCRIPT_START in lines:
+        lines = lines[lines.index(SCRIPT_START) + 1:]
+    for line in lines:
+        match = IMPORT_LINE.match(line)
+        # 들여쓰기가 없는 줄이 최상위 import (다른 모듈이 불러온 것은 그 안에 포함됨)
+        if match and len(match.group(3)) == 1:
+            top.append((match.group(4), int(match.group(2)) / 1e6))
+    return sum(seconds for _, seconds in top), sorted(top, key=lambda item: -item[1])
+
+
+def profile(script_path: str, workdir: str, timeout: float) -> dict:
+    out = os.path.join(workdir, "first-node.json")
+    if os.path.exists(out):
+        os.remove(out)
+    start = time.time()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", os.path.abspath(__file__), "--child", script_path],
+        cwd=workdir, env={**os.environ, "STARTUP_PROFILE_OUT": out},
+        stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+        text=True, timeout=timeout,
+    )
+    imports, top = parse_importtime(proc.stderr)
+    result = {"imports": imports, "top": top[:5], "first_node": None, "node": None, "error": None}
+    if os.path.exists(out):
+        with open(out) as f:
+            marker = json.load(f)
+        result["first_node"] = marker["first_node"] - start
+        result["node"] = marker["node"]
+    else:
+        errors = [line for line in proc.stderr.splitlines() if not line.startswith("import time:")]
+        result["error"] = (errors[-1] if errors else f"exit {proc.returncode}")[:80]
+    return result
+
+
+def profile_tree(root: str, scripts: list[str], runs: int, timeout: float) -> dict:
+    results = {}
+    for script in scripts:
+        path = os.path.join(root, script)
+        if not os.path.exists(path):
+            continue
+        samples = []
+        # 스크립트가 만드는 db/인덱스 파일은 임시 디렉터리에 두고, 첫 실행(.pyc 생성, 캐시 채우기)은 버림
+        with tempfile.TemporaryDirectory() as workdir:
+            for run in range(runs + 1):
+                try:
+                    sample = profile(path, workdir, timeout)
+                except subprocess.TimeoutExpired:
+                    sample = {"imports": 0.0, "top": [], "first_node": None, "node": None, "error": "timeout"}
+                if run:
+                    samples.append(sample)
+        ok = [s for s in samples if s["first_node"] is not None]
+        results[script] = {
+            "imports": statistics.median(s["imports"] for s in samples),
+            "first_node": statistics.median(s["first_node"] for s in ok) if ok else None,
+            "node": ok[0]["node"] if ok else None,
+            "top": samples[-1]["top"],
+            "error": None if ok else samples[-1]["error"],
+        }
+    return results
+
+
+def export_revision(revision: str, dest: str) -> None:
+    archive = subprocess.run(["git", "archive", revision], check=True, capture_output=True).stdout
+    subprocess.run(["tar", "-x", "-C", dest], input=archive, check=True)
+
+
+def fmt(seconds) -> str:
+    return "-" if seconds is None else f"{seconds * 1000:.0f}ms"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("scripts", nargs="*", default=ENTRY_POINTS)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--baseline", default=None, help="비교할 git 리비전 (예: HEAD~1)")
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--json", default=None, help="결과를 저장할 JSON 파일")
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args.child)
+        sys.exit(0)
+
+    root = os.path.dirname(os.path.abspath(__file__))
+    current = profile_tree(root, args.scripts, args.runs, args.timeout)
+    baseline = {}
+    if args.baseline:
+        with tempfile.TemporaryDirectory() as tree:
+            export_revision(args.baseline, tree)
+            baseline = profile_tree(tree, args.scripts, args.runs, args.timeout)
+
+    for script, result in current.items():
+        before = baseline.get(script)
+        line = f"{script:<26} import {fmt(result['imports']):>7}  첫 노드 {fmt(result['first_node']):>7}"
+        if before:
+            line = (f"{script:<26} import {fmt(before['imports']):>7} -> {fmt(result['imports']):>7}  "
+                    f"첫 노드 {fmt(before['first_node']):>7} -> {fmt(result['first_node']):>7}")
+            if before["error"]:
+                line += f"  (이전: {before['error']})"
+        if result["error"]:
+            line += f"  ({result['error']})"
+        print(line)
+        print("    " + ", ".join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in result["top"]))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"current": current, "baseline": baseline}, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,424 @@
+import argparse
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterator, Sequence
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+)
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.checkpoint.serde.types import TASKS
+
+from sqlite_saver import SqliteSaver
+
+# 오래 살아 있는 스레드의 체크포인트 정리
+# - compact_thread : 최신 keep_last 개만 남기고 그 이전 기록을 가장 오래된 체크포인트
+#                    하나(스냅샷)로 접어 넣음
+# - idle_threads   : 마지막 체크포인트 이후 ttl 초 이상 사용되지 않은 스레드 목록
+# - thread_bytes   : 스레드가 차지하는 직렬화된 바이트 수
+# - RetentionSaver : 위 정책을 put 시점에 자동으로 적용하는 체크포인터 래퍼
+# 오프라인 정리: python retention.py checkpoint.db --keep-last 10 --ttl-days 7
+
+
+def unwrap(saver: BaseCheckpointSaver) -> BaseCheckpointSaver:
+    """ThrottledSaver / WriteBehindSaver 같은 래퍼를 flush 하고 실제 저장소를 꺼냅니다."""
+    while hasattr(saver, "inner"):
+        if hasattr(saver, "flush"):
+            saver.flush()
+        saver = saver.inner
+    return saver
+
+
+def _namespaces(saver, thread_id: str) -> list[str]:
+    if isinstance(saver, SqliteSaver):
+        rows = saver.conn.execute(
+            "SELECT DISTINCT checkpoint_ns FROM checkpoints WHERE thread_id = ?", (thread_id,)
+        ).fetchall()
+        return [row[0] for row in rows]
+    return list(saver.storage.get(thread_id, {}))
+
+
+def _compact_sqlite(saver: SqliteSaver, thread_id: str, checkpoint_ns: str, keep_last: int) -> int:
+    conn = saver.conn
+    rows = conn.execute(
+        "SELECT checkpoint_id, parent_checkpoint_id, type, checkpoint FROM checkpoints "
+        "WHERE thread_id = ? AND checkpoint_ns = ? ORDER BY checkpoint_id DESC",
+        (thread_id, checkpoint_ns),
+    ).fetchall()
+    if len(rows) <= keep_last:
+        return 0
+    kept, dropped = rows[:keep_last], rows[keep_last:]
+    # 가장 오래 남는 체크포인트의 부모가 남긴 Send 는 pending_sends 복원에 필요
+    oldest_parent = kept[-1][1]
+    referenced = set()
+    for _, _, type_, checkpoint_b in kept:
+        checkpoint = saver.serde.loads_typed((type_, checkpoint_b))
+        referenced.update((c, str(v)) for c, v in checkpoint["channel_versions"].items())
+
+    with saver.transaction():
+        blobs = conn.execute(
+            "SELECT channel, version, base_version FROM blobs "
+            "WHERE thread_id = ? AND checkpoint_ns = ?",
+            (thread_id, checkpoint_ns),
+        ).fetchall()
+        # 남는 delta 중 기준값이 지워질 것은 전체 값으로 다시 써서 스냅샷으로 만듦
+        for channel, version, base_version in blobs:
+            if (
+                (channel, version) in referenced
+                and base_version is not None
+                and (channel, base_version) not in referenced
+            ):
+                value = saver._load_blob(thread_id, checkpoint_ns, channel, version)
+                type_, blob = saver.serde.dumps_typed(value)
+                conn.execute(
+                    "UPDATE blobs SET type = ?, blob = ?, base_version = NULL, depth = 0 "
+                    "WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?",
+                    (type_, blob, thread_id, checkpoint_ns, channel, version),
+                )
+        conn.executemany(
+            "DELETE FROM blobs WHERE thread_id = ? AND checkpoint_ns = ? "
+            "AND channel = ? AND version = ?",
+            [
+                (thread_id, checkpoint_ns, channel, version)
+                for channel, version, _ in blobs
+                if (channel, version) not in referenced
+            ],
+        )
+        for checkpoint_id, *_ in dropped:
+            conn.execute(
+                "DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                "AND checkpoint_id = ?",
+                (thread_id, checkpoint_ns, checkpoint_id),
+            )
+            conn.execute(
+                "DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ? "
+                "AND checkpoint_id = ? AND NOT (checkpoint_id IS ? AND channel = ?)",
+                (thread_id, checkpoint_ns, checkpoint_id, oldest_parent, TASKS),
+            )
+        # 지워진 버전을 delta 기준으로 쓰지 않도록 캐시 정리 (다음 put 은 전체 값으로 저장)
+        for cache in (saver.last_values, saver.staged, saver.decoded):
+            for key in [k for k in cache if k[0] == thread_id and k[1] == checkpoint_ns]:
+                del cache[key]
+    return len(dropped)
+
+
+def _compact_memory(saver: InMemorySaver, thread_id: str, checkpoint_ns: str, keep_last: int) -> int:
+    checkpoints = saver.storage[thread_id][checkpoint_ns]
+    ids = sorted(checkpoints, reverse=True)
+    if len(ids) <= keep_last:
+        return 0
+    kept, dropped = ids[:keep_last], ids[keep_last:]
+    oldest_parent = checkpoints[kept[-1]][2]
+    referenced = set()
+    for checkpoint_id in kept:
+        checkpoint = saver.serde.loads_typed(checkpoints[checkpoint_id][0])
+        referenced.update(checkpoint["channel_versions"].items())
+    for checkpoint_id in dropped:
+        del checkpoints[checkpoint_id]
+        writes = saver.writes.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+        if checkpoint_id == oldest_parent and writes:
+            saver.writes[(thread_id, checkpoint_ns, checkpoint_id)] = {
+                k: w for k, w in writes.items() if w[1] == TASKS
+            }
+    for key in [
+        k
+        for k in saver.blobs
+        if k[0] == thread_id and k[1] == checkpoint_ns and (k[2], k[3]) not in referenced
+    ]:
+        del saver.blobs[key]
+    return len(dropped)
+
+
+def compact_thread(saver: BaseCheckpointSaver, thread_id: str, keep_last: int = 1) -> int:
+    """최신 keep_last 개 체크포인트만 남기고 나머지를 접어 넣습니다. 지운 개수를 반환."""
+    saver = unwrap(saver)
+    removed = 0
+    if isinstance(saver, SqliteSaver):
+        with saver.lock:
+            for checkpoint_ns in _namespaces(saver, thread_id):
+                removed += _compact_sqlite(saver, thread_id, checkpoint_ns, keep_last)
+    elif isinstance(saver, InMemorySaver):
+        for checkpoint_ns in _namespaces(saver, thread_id):
+            removed += _compact_memory(saver, thread_id, checkpoint_ns, keep_last)
+    else:
+        raise TypeError(f"compaction is not supported for {type(saver).__name__}")
+    return removed
+
+
+def thread_bytes(saver: BaseCheckpointSaver, thread_id: str) -> int:
+    """스레드의 체크포인트 / 채널 값 / write 가 차지하는 직렬화된 바이트 수"""
+    saver = unwrap(saver)
+    if isinstance(saver, SqliteSaver):
+        with saver.lock:
+            return sum(
+                saver.conn.execute(
+                    f"SELECT COALESCE(SUM(LENGTH({column})), 0) FROM {table} WHERE thread_id = ?",
+                    (thread_id,),
+                ).fetchone()[0]
+                for table, column in (
+                    ("checkpoints", "checkpoint"),
+                    ("blobs", "blob"),
+                    ("writes", "blob"),
+                )
+            )
+    if isinstance(saver, InMemorySaver):
+        total = 0
+        for checkpoint_ns, checkpoints in list(saver.storage.get(thread_id, {}).items()):
+            for checkpoint_id, (checkpoint, metadata, _) in list(checkpoints.items()):
+                total += len(checkpoint[1]) + len(metadata[1])
+                for write in saver.writes.get((thread_id, checkpoint_ns, checkpoint_id), {}).values():
+                    total += len(write[2][1])
+                for channel, version in saver.serde.loads_typed(checkpoint)["channel_versions"].items():
+                    if blob := saver.blobs.get((thread_id, checkpoint_ns, channel, version)):
+                        total += len(blob[1])
+        return total
+    raise TypeError(f"size accounting is not supported for {type(saver).__name__}")
+
+
+def idle_threads(saver: BaseCheckpointSaver, ttl: float) -> list[str]:
+    """마지막 체크포인트가 ttl 초보다 오래된 스레드 ID 목록"""
+    saver = unwrap(saver)
+    now = datetime.now(timezone.utc)
+    latest: dict[str, str] = {}
+    if isinstance(saver, SqliteSaver):
+        with saver.lock:
+            rows = saver.conn.execute(
+                "SELECT c.thread_id, c.type, c.checkpoint FROM checkpoints c JOIN ("
+                "SELECT thread_id, MAX(checkpoint_id) AS checkpoint_id FROM checkpoints "
+                "GROUP BY thread_id) m USING (thread_id, checkpoint_id)"
+            ).fetchall()
+        for thread_id, type_, checkpoint_b in rows:
+            latest[thread_id] = saver.serde.loads_typed((type_, checkpoint_b))["ts"]
+    elif isinstance(saver, InMemorySaver):
+        # 그래프가 다른 스레드에서 쓰는 중일 수 있으므로 복사해서 훑음
+        for thread_id, namespaces in list(saver.storage.items()):
+            for checkpoints in list(namespaces.values()):
+                if checkpoints:
+                    checkpoint = saver.serde.loads_typed(checkpoints[max(checkpoints)][0])
+                    latest[thread_id] = max(latest.get(thread_id, ""), checkpoint["ts"])
+    else:
+        raise TypeError(f"idle detection is not supported for {type(saver).__name__}")
+    return [
+        thread_id
+        for thread_id, ts in latest.items()
+        if (now - datetime.fromisoformat(ts)).total_seconds() > ttl
+    ]
+
+
+class RetentionSaver(BaseCheckpointSaver):
+    """체크포인트 보존 정책을 자동으로 적용하는 체크포인터 래퍼.
+
+    - keep_last: 스레드마다 최신 N 개 체크포인트만 유지 (N 번 put 할 때마다 한 번씩 정리)
+    - ttl: 마지막 체크포인트(저장된 ts) 이후 ttl 초가 지난 스레드 삭제. 시작 전부터 DB 에 있던 스레드도
+      대상이고, 이 프로세스에서 조회한 스레드는 조회 시각도 사용으로 침
+    - max_bytes: 전체 스레드 크기 합이 예산을 넘으면 가장 오래 사용하지 않은 스레드부터 삭제.
+      크기는 이 프로세스에서 put 한 스레드만 셈 (시작 전부터 DB 에 있던 스레드는 예산에 들어가지 않으므로
+      그런 스레드는 ttl 이나 python retention.py 로 정리)
+
+    keep_last / max_bytes 정리는 put 호출 안에서 그 스레드만 보고 이루어집니다. ttl 정리는 저장소의
+    모든 스레드를 읽어야 하므로 put 이 아니라 백그라운드 스레드가 sweep_interval 초마다(시작할 때 한 번)
+    합니다. get_state / get_state_history 로 조회한 스레드도 최근 사용한 것으로 기록됩니다.
+
+        RetentionSaver(SqliteSaver("checkpoint.db"), keep_last=20, ttl=7 * 24 * 3600)
+    """
+
+    def __init__(
+        self,
+        inner: BaseCheckpointSaver,
+        *,
+        keep_last: Optional[int] = None,
+        ttl: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        sweep_interval: float = 60.0,
+    ) -> None:
+        super().__init__(serde=inner.serde)
+        self.inner = inner
+        self.keep_last = keep_last
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.sweep_interval = sweep_interval
+        self.lock = threading.RLock()
+        # thread_id -> [마지막 사용 시각, 크기(바이트), 마지막 정리 이후 put 횟수], 오래된 순서
+        self.threads: OrderedDict[str, list] = OrderedDict()
+        self.total_bytes = 0
+        self.sweep_error: Optional[BaseException] = None
+        self.stopped = threading.Event()
+        self.sweeper = None
+        if ttl:
+            # 시작하자마자 한 번 정리 (재시작 전부터 방치된 스레드)
+            self.sweeper = threading.Thread(target=self._sweep_loop, name="checkpoint-retention", daemon=True)
+            self.sweeper.start()
+
+    def get_next_version(self, current, channel):
+        return self.inner.get_next_version(current, channel)
+
+    def _touch(self, thread_id: str) -> list:
+        entry = self.threads.get(thread_id)
+        if entry is None:
+            entry = self.threads[thread_id] = [0.0, 0, 0]
+        entry[0] = time.monotonic()
+        self.threads.move_to_end(thread_id)
+        return entry
+
+    def _resize(self, thread_id: str, entry: list) -> None:
+        size = thread_bytes(self.inner, thread_id)
+        self.total_bytes += size - entry[1]
+        entry[1] = size
+
+    def _evict(self, thread_id: str) -> None:
+        entry = self.threads.pop(thread_id, None)
+        if entry is not None:
+            self.total_bytes -= entry[1]
+        self.inner.delete_thread(thread_id)
+
+    def sweep(self) -> list[str]:
+        """ttl 이 지난 스레드를 지우고 그 ID 목록을 반환 (백그라운드 스레드가 주기적으로 부름)"""
+        try:
+            # 저장소 전체를 읽는 부분은 잠금 밖에서 (그동안 put 이 막히지 않도록)
+            stored = idle_threads(self.inner, self.ttl)
+        except TypeError:
+            # 체크포인트 시각을 읽을 수 없는 저장소: 이 프로세스에서 본 사용 시각으로만 판단
+            with self.lock:
+                stored = list(self.threads)
+        evicted = []
+        with self.lock:
+            now = time.monotonic()
+            for thread_id in stored:
+                # 읽는 동안 다시 쓰인 스레드는 남김
+                if thread_id not in self.threads or now - self.threads[thread_id][0] >= self.ttl:
+                    self._evict(thread_id)
+                    evicted.append(thread_id)
+        return evicted
+
+    def _sweep_loop(self) -> None:
+        while not self.stopped.is_set():
+            try:
+                self.sweep()
+            except Exception as e:
+                # 다음 주기에 다시 시도 (마지막 오류는 sweep_error 로 확인)
+                self.sweep_error = e
+            self.stopped.wait(self.sweep_interval)
+
+    def close(self) -> None:
+        """백그라운드 ttl 정리를 멈춥니다."""
+        self.stopped.set()
+        if self.sweeper is not None:
+            self.sweeper.join()
+
+    def __enter__(self) -> "RetentionSaver":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _enforce(self, thread_id: str) -> None:
+        entry = self._touch(thread_id)
+        entry[2] += 1
+        if self.keep_last and entry[2] >= self.keep_last:
+            compact_thread(self.inner, thread_id, self.keep_last)
+            entry[2] = 0
+            if self.max_bytes:
+                self._resize(thread_id, entry)
+        elif self.max_bytes and (entry[2] == 1 or not self.keep_last):
+            self._resize(thread_id, entry)
+        if self.max_bytes:
+            # 예산을 넘으면 LRU 순서로 삭제 (방금 쓴 스레드는 남김)
+            while self.total_bytes > self.max_bytes and len(self.threads) > 1:
+                self._evict(next(iter(self.threads)))
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        result = self.inner.put(config, checkpoint, metadata, new_versions)
+        self._enforce_locked(config["configurable"]["thread_id"])
+        return result
+
+    def _enforce_locked(self, thread_id: str) -> None:
+        with self.lock:
+            self._enforce(thread_id)
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        self.inner.put_writes(config, writes, task_id, task_path)
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        with self.lock:
+            if config["configurable"]["thread_id"] in self.threads:
+                self._touch(config["configurable"]["thread_id"])
+        return self.inner.get_tuple(config)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        yield from self.inner.list(config, filter=filter, before=before, limit=limit)
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self.lock:
+            self._evict(thread_id)
+
+    # 비동기 메서드: 정리(compact_thread, 삭제)는 inner 를 동기로 부르므로 스레드에서 실행
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        with self.lock:
+            if config["configurable"]["thread_id"] in self.threads:
+                self._touch(config["configurable"]["thread_id"])
+        return await self.inner.aget_tuple(config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        async for item in self.inner.alist(config, filter=filter, before=before, limit=limit):
+            yield item
+
+    async def aput(self, config, checkpoint, metadata, new_versions) -> RunnableConfig:
+        result = await self.inner.aput(config, checkpoint, metadata, new_versions)
+        await asyncio.to_thread(self._enforce_locked, config["configurable"]["thread_id"])
+        return result
+
+    async def aput_writes(self, config, writes, task_id, task_path="") -> None:
+        await self.inner.aput_writes(config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+
+if __name__ == "__main__":
+    # 오프라인 정리: 서비스가 멈춰 있을 때 DB 파일 전체를 압축
+    parser = argparse.ArgumentParser()
+    parser.add_argument("path")
+    parser.add_argument("--keep-last", type=int, default=1)
+    parser.add_argument("--ttl-days", type=float, default=None)
+    args = parser.parse_args()
+
+    with SqliteSaver(args.path) as saver:
+        if args.ttl_days is not None:
+            idle = idle_threads(saver, args.ttl_days * 24 * 3600)
+            for thread_id in idle:
+                saver.delete_thread(thread_id)
+            print(f"유휴 스레드 {len(idle)}개 삭제")
+        thread_ids = [
+            row[0] for row in saver.conn.execute("SELECT DISTINCT thread_id FROM checkpoints")
+        ]
+        removed = sum(compact_thread(saver, thread_id, args.keep_last) for thread_id in thread_ids)
+        print(f"스레드 {len(thread_ids)}개에서 체크포인트 {removed}개를 접어 넣음")
+        saver.conn.execute("VACUUM")
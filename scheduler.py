@@ -0,0 +1,420 @@
+import asyncio
+import contextvars
+import functools
+import heapq
+import itertools
+import random
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Optional
+
+# 노드와 LLM/도구 클라이언트 사이에서 호출 순서와 속도를 정하는 스케줄러
+#
+#   search = Scheduler("search_web", max_concurrency=4, rate=2.0)   # 초당 2회, 동시에 최대 4개
+#
+#   @tool
+#   @search.wrap                      # 과부하 오류는 지터를 넣은 지수 백오프로 다시 시도
+#   def search_web(query: str) -> str: ...
+#
+#   with priority("batch"):           # 대화(interactive) 요청이 기다리고 있으면 그쪽이 먼저 자리를 받음
+#       app.invoke(...)
+#
+# - 우선순위: interactive > default > batch. 같은 등급 안에서는 먼저 온 순서. contextvar 라서
+#   그래프가 노드를 실행하는 스레드/태스크까지 그대로 전달됩니다.
+# - 토큰 버킷(rate, burst): 초당 호출 수 제한. 자리를 받은 뒤 토큰이 모자라면 기다림
+# - AIMD: 동시 실행 수를 min~max 사이에서 조절. 성공이 limit 번 쌓일 때마다 +1,
+#   과부하 오류(429/503/시간 초과 등)가 나면 decrease 배로 줄임.
+#   target_latency 를 주면 호출 시간(스트리밍이면 스트림이 닫힐 때까지)의 EWMA 가 그보다 길 때도 줄임.
+#   응답 길이에 따라 호출 시간이 크게 달라지므로 기본으로는 지연 시간을 혼잡 신호로 쓰지 않음
+# - 재시도: retry_on 이 참인 오류만, max_attempts 번까지 0~min(max_interval, initial_interval x 2^n) 초 사이
+#   무작위로 기다렸다가 다시 시도 (Retry-After 헤더가 있으면 그만큼은 기다림). 기다리는 동안에는 자리를 반납
+#
+# llm_clients.Endpoint 가 LLM 서버마다 하나씩 이 스케줄러를 씁니다.
+
+PRIORITIES = {"interactive": 0, "default": 1, "batch": 2}
+WAIT_BUCKETS = (0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_priority: contextvars.ContextVar[str] = contextvars.ContextVar("scheduler_priority", default="default")
+
+
+@contextmanager
+def priority(name: str):
+    """이 블록 안에서(그리고 여기서 시작한 노드/태스크에서) 나가는 호출의 우선순위"""
+    if name not in PRIORITIES:
+        raise ValueError(f"unknown priority {name!r}, expected one of {list(PRIORITIES)}")
+    token = _priority.set(name)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> str:
+    return _priority.get()
+
+
+def is_overload(error: BaseException) -> bool:
+    """서버가 밀려서 난 오류인지 (다시 시도할 만한지)"""
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    if status in (408, 429, 500, 502, 503, 504):
+        return True
+    return type(error).__name__ in (
+        "APITimeoutError", "APIConnectionError", "RateLimitError", "TimeoutError",
+        "ConnectError", "ConnectTimeout", "ReadTimeout", "RemoteProtocolError",
+    )
+
+
+def retry_after(error_or_response) -> Optional[float]:
+    """Retry-After 헤더(초 또는 HTTP 날짜)를 초로 바꿈"""
+    response = getattr(error_or_response, "response", error_or_response)
+    value = getattr(response, "headers", {}).get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+class _Waiter:
+    __slots__ = ("wake", "granted", "cancelled")
+
+    def __init__(self, wake):
+        self.wake = wake
+        self.granted = False
+        self.cancelled = False
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class PriorityGate:
+    """스레드와 이벤트 루프를 가리지 않고 동시 실행 수를 limit 개로 제한하는 세마포어 (우선순위, 같은 등급은 FIFO)"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.lock = threading.Lock()
+        self.active = 0
+        self.heap: list[tuple[int, int, _Waiter]] = []
+        self.sequence = itertools.count()
+        self.waiting = dict.fromkeys(PRIORITIES, 0)
+        self.max_waiting = 0
+
+    def _admit(self, waiter: _Waiter, name: str) -> bool:
+        # self.lock 을 잡은 상태에서 호출. 자리가 있고 기다리는 호출이 없으면 바로 들어가고, 아니면 줄을 섬
+        if self.active < self.limit and not self.heap:
+            self.active += 1
+            return True
+        heapq.heappush(self.heap, (PRIORITIES[name], next(self.sequence), waiter))
+        self.waiting[name] += 1
+        self.max_waiting = max(self.max_waiting, sum(self.waiting.values()))
+        return False
+
+    def acquire(self, name: str = "default") -> None:
+        event = threading.Event()
+        with self.lock:
+            if self._admit(_Waiter(event.set), name):
+                return
+        event.wait()
+
+    async def aacquire(self, name: str = "default") -> None:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        waiter = _Waiter(lambda: loop.call_soon_threadsafe(_resolve, future))
+        with self.lock:
+            if self._admit(waiter, name):
+                return
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self.lock:
+                if not waiter.granted:
+                    # 힙에서 바로 빼지 않고 표시만 해 두었다가 차례가 오면 건너뜀
+                    waiter.cancelled = True
+                    self.waiting[name] -= 1
+                    raise
+            # 자리를 넘겨받은 직후에 취소됨: 다음 대기자에게 넘김
+            self.release()
+            raise
+
+    def _wake_next(self) -> bool:
+        while self.heap:
+            rank, _, waiter = heapq.heappop(self.heap)
+            if waiter.cancelled:
+                continue
+            self.waiting[next(name for name, r in PRIORITIES.items() if r == rank)] -= 1
+            waiter.granted = True
+            try:
+                waiter.wake()
+                return True
+            except RuntimeError:
+                # 대기자의 이벤트 루프가 이미 닫힘
+                continue
+        return False
+
+    def release(self) -> None:
+        with self.lock:
+            # limit 를 줄인 직후에는 넘치는 만큼 자리를 넘기지 않고 줄임
+            if self.active > self.limit or not self._wake_next():
+                self.active -= 1
+
+    def resize(self, limit: int) -> None:
+        with self.lock:
+            self.limit = limit
+            while self.active < self.limit and self._wake_next():
+                self.active += 1
+
+
+class TokenBucket:
+    """초당 rate 개씩 채워지고 최대 burst 개까지 쌓이는 토큰. reserve() 는 토큰을 미리 잡고 기다릴 시간을 돌려줌"""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self) -> float:
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+class AIMD:
+    """성공하면 조금씩 늘리고(additive increase) 밀리면 크게 줄이는(multiplicative decrease) 동시 실행 수"""
+
+    def __init__(
+        self,
+        gate: PriorityGate,
+        *,
+        min_limit: int = 1,
+        max_limit: int,
+        target_latency: Optional[float] = None,
+        decrease: float = 0.5,
+    ):
+        self.gate = gate
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_latency = target_latency
+        self.decrease = decrease
+        self.lock = threading.Lock()
+        self.latency: Optional[float] = None  # 최근 지연 시간 EWMA
+        self.successes = 0
+        self.last_decrease = 0.0
+        self.decreases = 0
+
+    def on_success(self, latency: float) -> None:
+        with self.lock:
+            self.latency = latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+            if self.target_latency is not None and self.latency > self.target_latency:
+                self._decrease()
+                return
+            self.successes += 1
+            if self.successes >= self.gate.limit and self.gate.limit < self.max_limit:
+                self.successes = 0
+                self.gate.resize(self.gate.limit + 1)
+
+    def on_overload(self) -> None:
+        with self.lock:
+            self._decrease()
+
+    def _decrease(self) -> None:
+        # 한 번 줄인 뒤 지연 시간 하나만큼은 다시 줄이지 않음 (같은 혼잡으로 여러 번 줄어드는 것 방지)
+        now = time.monotonic()
+        if now - self.last_decrease < (self.latency or 1.0):
+            return
+        self.last_decrease = now
+        self.successes = 0
+        self.decreases += 1
+        self.gate.resize(max(self.min_limit, int(self.gate.limit * self.decrease)))
+
+
+class Scheduler:
+    """우선순위 대기열 + 토큰 버킷 + AIMD 동시 실행 수 + 지터 백오프 재시도"""
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        max_concurrency: int = 8,
+        min_concurrency: int = 1,
+        adaptive: bool = True,
+        target_latency: Optional[float] = None,
+        rate: Optional[float] = None,
+        burst: Optional[float] = None,
+        max_attempts: int = 4,
+        initial_interval: float = 0.5,
+        max_interval: float = 30.0,
+        retry_on: Callable[[BaseException], bool] = is_overload,
+    ):
+        self.name = name
+        self.gate = PriorityGate(max_concurrency)
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.aimd = (
+            AIMD(self.gate, min_limit=min_concurrency, max_limit=max_concurrency, target_latency=target_latency)
+            if adaptive else None
+        )
+        self.max_attempts = max_attempts
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.retry_on = retry_on
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.retries = 0
+        self.overloads = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.wait_buckets = [0] * len(WAIT_BUCKETS)
+        self.busy = 0.0
+        self.first_call: Optional[float] = None
+
+    @property
+    def max_concurrency(self) -> int:
+        return self.aimd.max_limit if self.aimd else self.gate.limit
+
+    @max_concurrency.setter
+    def max_concurrency(self, limit: int) -> None:
+        if self.aimd:
+            self.aimd.max_limit = limit
+        self.gate.resize(limit)
+
+    def _admitted(self, start: float) -> float:
+        now = time.perf_counter()
+        waited = now - start
+        with self.lock:
+            self.calls += 1
+            if self.first_call is None:
+                self.first_call = start
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+            for i, bound in enumerate(WAIT_BUCKETS):
+                if waited <= bound:
+                    self.wait_buckets[i] += 1
+        return now
+
+    def acquire(self) -> float:
+        """자리(와 토큰)를 받을 때까지 기다리고 시작 시각을 돌려줌. 끝나면 release(시작 시각) 를 불러야 함"""
+        start = time.perf_counter()
+        self.gate.acquire(current_priority())
+        if self.bucket is not None:
+            time.sleep(self.bucket.reserve())
+        return self._admitted(start)
+
+    async def aacquire(self) -> float:
+        start = time.perf_counter()
+        await self.gate.aacquire(current_priority())
+        if self.bucket is not None:
+            try:
+                await asyncio.sleep(self.bucket.reserve())
+            except asyncio.CancelledError:
+                self.gate.release()
+                raise
+        return self._admitted(start)
+
+    def release(self, started: float, *, overloaded: bool = False) -> None:
+        elapsed = time.perf_counter() - started
+        with self.lock:
+            self.busy += elapsed
+            if overloaded:
+                self.overloads += 1
+        if self.aimd is not None:
+            if overloaded:
+                self.aimd.on_overload()
+            else:
+                self.aimd.on_success(elapsed)
+        self.gate.release()
+
+    def backoff(self, attempt: int, error_or_response=None) -> Optional[float]:
+        """attempt 번째(0부터) 실패 뒤 기다릴 시간. 더 시도하지 않을 때는 None"""
+        if attempt + 1 >= self.max_attempts:
+            return None
+        with self.lock:
+            self.retries += 1
+        delay = random.uniform(0, min(self.max_interval, self.initial_interval * 2 ** attempt))
+        hinted = retry_after(error_or_response) if error_or_response is not None else None
+        # Retry-After 만큼 기다린 뒤에도 지터를 더함 (같은 시각에 거절된 요청이 한꺼번에 다시 몰리지 않게)
+        return min(hinted, self.max_interval) + delay if hinted is not None else delay
+
+    def call(self, func: Callable, *args, **kwargs) -> Any:
+        for attempt in itertools.count():
+            started = self.acquire()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                overloaded = self.retry_on(e)
+                self.release(started, overloaded=overloaded)
+                delay = self.backoff(attempt, e) if overloaded else None
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                continue
+            self.release(started)
+            return result
+
+    async def acall(self, func: Callable, *args, **kwargs) -> Any:
+        for attempt in itertools.count():
+            started = await self.aacquire()
+            try:
+                result = await func(*args, **kwargs)
+            except asyncio.CancelledError:
+                self.release(started)
+                raise
+            except Exception as e:
+                overloaded = self.retry_on(e)
+                self.release(started, overloaded=overloaded)
+                delay = self.backoff(attempt, e) if overloaded else None
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            self.release(started)
+            return result
+
+    def wrap(self, func: Callable) -> Callable:
+        """함수(동기/비동기)를 이 스케줄러를 거쳐 호출하도록 감쌈. @tool 아래에 붙여서 도구에 사용"""
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def awrapper(*args, **kwargs):
+                return await self.acall(func, *args, **kwargs)
+            return awrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return self.call(func, *args, **kwargs)
+        return wrapper
+
+    def stats(self) -> dict[str, Any]:
+        with self.lock, self.gate.lock:
+            elapsed = time.perf_counter() - self.first_call if self.first_call else 0.0
+            return {
+                "name": self.name,
+                "limit": self.gate.limit,
+                "max_concurrency": self.max_concurrency,
+                "in_flight": self.gate.active,
+                "queued": sum(self.gate.waiting.values()),
+                "queued_by_priority": dict(self.gate.waiting),
+                "max_queued": self.gate.max_waiting,
+                "calls": self.calls,
+                "retries": self.retries,
+                "overloads": self.overloads,
+                "limit_decreases": self.aimd.decreases if self.aimd else 0,
+                "wait_seconds_total": self.wait_total,
+                "wait_seconds_max": self.wait_max,
+                "wait_seconds_avg": self.wait_total / self.calls if self.calls else 0.0,
+                "wait_buckets": list(self.wait_buckets),
+                "busy_seconds": self.busy,
+                "concurrency_avg": self.busy / elapsed if elapsed else 0.0,
+                # 지금 동시 실행 수 기준 사용률 (AIMD 가 limit 를 바꿔 왔으므로 대략적인 값)
+                "utilization": self.busy / (self.gate.limit * elapsed) if elapsed else 0.0,
+            }
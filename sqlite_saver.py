@@ -0,0 +1,485 @@
+import asyncio
+import sqlite3
+import threading
+from collections import OrderedDict
+from collections.abc import Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from typing import Any, Optional
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.checkpoint.serde.types import TASKS
+
+# 테이블 구조
+# - checkpoints: 체크포인트 본문 (channel_values 제외)과 메타데이터, 부모 체크포인트 ID
+# - blobs: 채널 값. (thread_id, ns, channel, version) 단위로 한 번만 저장되므로
+#          값이 바뀌지 않은 채널은 매 체크포인트마다 다시 쓰지 않음.
+#          messages 처럼 뒤에 덧붙기만 하는 리스트 채널은 base_version 값 뒤에 붙은
+#          부분(delta)만 저장하고, depth 가 snapshot_every 에 도달하면 전체 값을 다시 저장
+# - writes: 노드가 남긴 pending write (중단/재개, Send 복원용)
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    type TEXT,
+    checkpoint BLOB,
+    metadata_type TEXT,
+    metadata BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS blobs (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    channel TEXT NOT NULL,
+    version TEXT NOT NULL,
+    type TEXT NOT NULL,
+    blob BLOB,
+    base_version TEXT,
+    depth INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT,
+    blob BLOB,
+    task_path TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+) WITHOUT ROWID;
+"""
+
+# 저장된 값이 없는 채널 표시 (None 은 채널 값으로 쓰일 수 있으므로 따로 구분)
+EMPTY = object()
+
+
+class SqliteSaver(BaseCheckpointSaver[str]):
+    """SQLite(WAL 모드) 파일에 체크포인트를 저장하는 체크포인터.
+
+    MemorySaver 대신 `builder.compile(checkpointer=SqliteSaver("checkpoints.db"))`
+    처럼 그대로 교체해서 사용할 수 있습니다. 프로세스를 재시작해도 스레드 기록이
+    유지되고, 모든 조회가 (thread_id, checkpoint_ns, checkpoint_id) 기본키 인덱스를
+    타기 때문에 스레드가 수만 개로 늘어도 get_state / get_state_history /
+    update_state 지연 시간이 거의 일정합니다.
+
+    `add_messages` / `operator.add` 처럼 값이 뒤에 덧붙기만 하는 리스트 채널은
+    스텝마다 늘어난 부분만 저장하므로 대화 길이 n 에 대해 저장 용량이 O(n) 입니다.
+    전체 값은 get_state 등으로 조회할 때 가장 가까운 스냅샷부터 이어 붙여 복원합니다.
+    `snapshot_every=None` 이면 항상 전체 값을 저장합니다.
+    """
+
+    def __init__(
+        self, path: str = "checkpoints.db", *, serde=None, snapshot_every: Optional[int] = 50
+    ) -> None:
+        super().__init__(serde=serde)
+        self.path = path
+        self.snapshot_every = snapshot_every
+        # (thread_id, ns, channel) -> 마지막으로 저장한 (version, 값, depth). delta 기준값
+        self.last_values: OrderedDict[tuple, tuple[str, list, int]] = OrderedDict()
+        # 진행 중인 트랜잭션에서 쓴 기준값. 가장 바깥 트랜잭션이 COMMIT 된 뒤에만 last_values 로 옮김
+        self.staged: dict[tuple, tuple[str, list, int]] = {}
+        # (thread_id, ns, channel, version) -> 복원된 리스트. 히스토리 조회 시 재사용
+        self.decoded: OrderedDict[tuple, list] = OrderedDict()
+        self.cache_size = 256
+        # 그래프는 여러 스레드에서 체크포인터를 호출할 수 있으므로 연결 하나를 락으로 보호
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.lock = threading.RLock()
+        # 비동기 메서드는 이 스레드 하나에서 동기 메서드를 실행 (이벤트 루프를 막지 않음)
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-saver")
+        with self.lock:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            # WAL 모드에서는 NORMAL 이어도 커밋된 트랜잭션이 손상되지 않음
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.executescript(SCHEMA)
+            # delta 컬럼이 없던 이전 버전 DB 파일 마이그레이션
+            columns = {row[1] for row in self.conn.execute("PRAGMA table_info(blobs)")}
+            if "base_version" not in columns:
+                self.conn.execute("ALTER TABLE blobs ADD COLUMN base_version TEXT")
+                self.conn.execute(
+                    "ALTER TABLE blobs ADD COLUMN depth INTEGER NOT NULL DEFAULT 0"
+                )
+
+    # MemorySaver 와 같은 버전 형식을 사용 (문자열 정렬 == 버전 순서)
+    get_next_version = InMemorySaver.get_next_version
+
+    def close(self) -> None:
+        self.executor.shutdown()
+        with self.lock:
+            self.conn.close()
+
+    def __enter__(self) -> "SqliteSaver":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """여러 쓰기를 하나의 트랜잭션으로 묶습니다. 중첩 호출은 바깥 트랜잭션에 합쳐집니다."""
+        with self.lock:
+            if self.conn.in_transaction:
+                yield self.conn
+                return
+            self.conn.execute("BEGIN")
+            try:
+                yield self.conn
+                self.conn.execute("COMMIT")
+            except BaseException:
+                if self.conn.in_transaction:
+                    self.conn.execute("ROLLBACK")
+                # 디스크에 남지 않은 버전을 delta 기준이나 복원 결과로 쓰지 않도록 버림
+                self.staged.clear()
+                self.decoded.clear()
+                raise
+            for key, value in self.staged.items():
+                self._remember(self.last_values, key, value)
+            self.staged.clear()
+
+    def _remember(self, cache: OrderedDict, key: tuple, value: Any) -> None:
+        cache[key] = value
+        cache.move_to_end(key)
+        if len(cache) > self.cache_size:
+            cache.popitem(last=False)
+
+    def _load_blob(self, thread_id: str, checkpoint_ns: str, channel: str, version: str):
+        """채널 값 하나를 읽습니다. delta 이면 스냅샷까지 거슬러 올라가 이어 붙입니다."""
+        chain = []  # 최신 -> 과거 순서의 delta 조각
+        while True:
+            key = (thread_id, checkpoint_ns, channel, version)
+            if (cached := self.decoded.get(key)) is not None:
+                value = list(cached)
+                break
+            row = self.conn.execute(
+                "SELECT type, blob, base_version FROM blobs WHERE thread_id = ? "
+                "AND checkpoint_ns = ? AND channel = ? AND version = ?",
+                key,
+            ).fetchone()
+            if row is None and chain:
+                raise ValueError(
+                    f"delta base {version!r} of channel {channel!r} is missing "
+                    f"(thread {thread_id!r}, ns {checkpoint_ns!r})"
+                )
+            if row is None or row[0] == "empty":
+                return EMPTY
+            type_, blob, base_version = row
+            if base_version is None:
+                value = self.serde.loads_typed((type_, blob))
+                if not chain:
+                    return value
+                break
+            chain.append((key, self.serde.loads_typed((type_, blob))))
+            version = base_version
+        # 스냅샷(또는 캐시된 값)에 delta 를 과거 -> 최신 순으로 이어 붙임
+        for key, suffix in reversed(chain):
+            value = value + suffix
+            self._remember(self.decoded, key, value)
+        return list(value)
+
+    def _load_blobs(
+        self, thread_id: str, checkpoint_ns: str, versions: ChannelVersions
+    ) -> dict[str, Any]:
+        channel_values: dict[str, Any] = {}
+        for channel, version in versions.items():
+            value = self._load_blob(thread_id, checkpoint_ns, channel, str(version))
+            if value is not EMPTY:
+                channel_values[channel] = value
+        return channel_values
+
+    def _dump_blob(
+        self,
+        thread_id: str,
+        checkpoint_ns: str,
+        channel: str,
+        version: str,
+        value: Any,
+        bases: dict,
+    ) -> tuple:
+        """blobs 테이블 한 행을 만듭니다. 이전 값 뒤에 덧붙기만 했으면 늘어난 부분만 저장.
+
+        새 delta 기준값은 bases 에 담아 둡니다. 호출한 쪽이 행을 쓴 뒤 staged 로 옮기고,
+        가장 바깥 트랜잭션이 COMMIT 되면 last_values 에 반영됩니다.
+        """
+        last_key = (thread_id, checkpoint_ns, channel)
+        last = self.staged.get(last_key) or self.last_values.get(last_key)
+        base_version, depth, payload = None, 0, value
+        if (
+            self.snapshot_every
+            and isinstance(value, list)
+            and last is not None
+            and last[2] + 1 < self.snapshot_every
+            and len(value) >= len(last[1])
+            and all(a is b or a == b for a, b in zip(last[1], value))
+        ):
+            base_version, depth, payload = last[0], last[2] + 1, value[len(last[1]):]
+        type_, blob = self.serde.dumps_typed(payload)
+        if isinstance(value, list) and self.snapshot_every:
+            bases[last_key] = (version, list(value), depth)
+        return (thread_id, checkpoint_ns, channel, version, type_, blob, base_version, depth)
+
+    def _load_sends(
+        self, thread_id: str, checkpoint_ns: str, parent_checkpoint_id: Optional[str]
+    ) -> list:
+        # pending_sends 는 부모 체크포인트에 남은 TASKS write 로부터 복원
+        if not parent_checkpoint_id:
+            return []
+        rows = self.conn.execute(
+            "SELECT type, blob FROM writes WHERE thread_id = ? AND checkpoint_ns = ? "
+            "AND checkpoint_id = ? AND channel = ? ORDER BY task_path, task_id, idx",
+            (thread_id, checkpoint_ns, parent_checkpoint_id, TASKS),
+        ).fetchall()
+        return [self.serde.loads_typed((t, b)) for t, b in rows]
+
+    def _load_writes(
+        self, thread_id: str, checkpoint_ns: str, checkpoint_id: str
+    ) -> list[tuple[str, str, Any]]:
+        rows = self.conn.execute(
+            "SELECT task_id, channel, type, blob FROM writes WHERE thread_id = ? "
+            "AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+        return [(task_id, c, self.serde.loads_typed((t, b))) for task_id, c, t, b in rows]
+
+    def _make_tuple(self, thread_id: str, checkpoint_ns: str, row: tuple) -> CheckpointTuple:
+        checkpoint_id, parent_checkpoint_id, type_, checkpoint_b, metadata_type, metadata_b = row
+        checkpoint: Checkpoint = self.serde.loads_typed((type_, checkpoint_b))
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint={
+                **checkpoint,
+                "channel_values": self._load_blobs(
+                    thread_id, checkpoint_ns, checkpoint["channel_versions"]
+                ),
+                "pending_sends": self._load_sends(
+                    thread_id, checkpoint_ns, parent_checkpoint_id
+                ),
+            },
+            metadata=self.serde.loads_typed((metadata_type, metadata_b)),
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": parent_checkpoint_id,
+                    }
+                }
+                if parent_checkpoint_id
+                else None
+            ),
+            pending_writes=self._load_writes(thread_id, checkpoint_ns, checkpoint_id),
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        columns = (
+            "checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata"
+        )
+        with self.lock:
+            if checkpoint_id := get_checkpoint_id(config):
+                row = self.conn.execute(
+                    f"SELECT {columns} FROM checkpoints WHERE thread_id = ? "
+                    "AND checkpoint_ns = ? AND checkpoint_id = ?",
+                    (thread_id, checkpoint_ns, checkpoint_id),
+                ).fetchone()
+            else:
+                # checkpoint_id 는 단조 증가하므로 기본키 역순 첫 행이 최신 체크포인트
+                row = self.conn.execute(
+                    f"SELECT {columns} FROM checkpoints WHERE thread_id = ? "
+                    "AND checkpoint_ns = ? ORDER BY checkpoint_id DESC LIMIT 1",
+                    (thread_id, checkpoint_ns),
+                ).fetchone()
+            if row is None:
+                return None
+            return self._make_tuple(thread_id, checkpoint_ns, row)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        query = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, "
+            "checkpoint, metadata_type, metadata FROM checkpoints"
+        )
+        where, params = [], []
+        if config:
+            where.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if (checkpoint_ns := config["configurable"].get("checkpoint_ns")) is not None:
+                where.append("checkpoint_ns = ?")
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                where.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before and (before_checkpoint_id := get_checkpoint_id(before)):
+            where.append("checkpoint_id < ?")
+            params.append(before_checkpoint_id)
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        query += " ORDER BY thread_id, checkpoint_ns, checkpoint_id DESC"
+
+        with self.lock:
+            rows = self.conn.execute(query, params).fetchall()
+        for thread_id, checkpoint_ns, *row in rows:
+            if limit is not None and limit <= 0:
+                break
+            # 메타데이터는 직렬화된 값이므로 필터는 파이썬에서 적용
+            if filter:
+                metadata = self.serde.loads_typed((row[4], row[5]))
+                if not all(metadata.get(k) == v for k, v in filter.items()):
+                    continue
+            if limit is not None:
+                limit -= 1
+            with self.lock:
+                item = self._make_tuple(thread_id, checkpoint_ns, tuple(row))
+            yield item
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        c = checkpoint.copy()
+        c.pop("pending_sends", None)
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        values: dict[str, Any] = c.pop("channel_values")
+        type_, checkpoint_b = self.serde.dumps_typed(c)
+        metadata_type, metadata_b = self.serde.dumps_typed(
+            get_checkpoint_metadata(config, metadata)
+        )
+        with self.transaction() as conn:
+            # 이번 스텝에서 버전이 바뀐 채널만 새 blob 으로 저장
+            blob_rows, bases = [], {}
+            for channel, version in new_versions.items():
+                if channel in values:
+                    blob_rows.append(
+                        self._dump_blob(
+                            thread_id, checkpoint_ns, channel, str(version), values[channel], bases
+                        )
+                    )
+                else:
+                    blob_rows.append(
+                        (thread_id, checkpoint_ns, channel, str(version), "empty", b"", None, 0)
+                    )
+            conn.executemany(
+                "INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?, ?, ?, ?, ?)", blob_rows
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    thread_id,
+                    checkpoint_ns,
+                    checkpoint["id"],
+                    config["configurable"].get("checkpoint_id"),  # 부모
+                    type_,
+                    checkpoint_b,
+                    metadata_type,
+                    metadata_b,
+                ),
+            )
+            self.staged.update(bases)
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            type_, blob = self.serde.dumps_typed(value)
+            rows.append(
+                (
+                    thread_id,
+                    checkpoint_ns,
+                    checkpoint_id,
+                    task_id,
+                    WRITES_IDX_MAP.get(channel, idx),
+                    channel,
+                    type_,
+                    blob,
+                    task_path,
+                )
+            )
+        # 특수 write(에러, 인터럽트 등, idx < 0)는 덮어쓰고, 일반 write 는 최초 값 유지
+        with self.transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [r for r in rows if r[4] < 0],
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [r for r in rows if r[4] >= 0],
+            )
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self.lock:
+            for cache in (self.last_values, self.staged, self.decoded):
+                for key in [k for k in cache if k[0] == thread_id]:
+                    del cache[key]
+        with self.transaction() as conn:
+            for table in ("checkpoints", "blobs", "writes"):
+                conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+
+    # 비동기 메서드: 연결은 어차피 락 하나로 직렬화되므로 전용 스레드 하나로 넘겨서 실행
+    def _run(self, func, *args, **kwargs):
+        return asyncio.get_running_loop().run_in_executor(self.executor, partial(func, *args, **kwargs))
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await self._run(self.get_tuple, config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        items = await self._run(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in items:
+            yield item
+
+    async def aput(self, config, checkpoint, metadata, new_versions) -> RunnableConfig:
+        return await self._run(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path="") -> None:
+        return await self._run(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        return await self._run(self.delete_thread, thread_id)
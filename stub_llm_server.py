@@ -0,0 +1,307 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import socket
+import threading
+import time
+import urllib.request
+import uuid
+from typing import Optional
+
+# 벤치마크용 OpenAI 호환 스텁 서버 (localhost:1234 의 로컬 모델 대신 사용)
+# - POST /v1/chat/completions : 일반 응답과 "stream": true (SSE) 응답 지원
+# - GET  /v1/models
+# latency 초만큼 기다린 뒤 응답하고, 스트리밍이면 토큰마다 token_delay 초씩 쉬면서 보냅니다.
+# 응답 내용은 reply 함수(messages -> str)로 정하며 기본값은 마지막 메시지를 되돌려주는 것입니다.
+# slots 를 주면 로컬 추론 서버처럼 동시에 slots 개까지만 처리하고 나머지는 기다리게 합니다.
+# max_queue 까지 주면 기다리는 요청이 그보다 많을 때 503 + Retry-After 로 거절합니다(과부하).
+#
+#   python stub_llm_server.py --port 1234 --latency 0.2
+#
+#   url, stop, stub = start_in_thread(latency=0.2)    # 벤치마크 코드 안에서 백그라운드로 실행
+#   url, stop, stub = start_in_process(latency=0.2)   # 별도 프로세스 (부하 테스트용)
+#   llm = ChatOpenAI(base_url=url, api_key="stub", model_name="stub")
+
+
+def echo_reply(messages: list[dict]) -> str:
+    content = messages[-1].get("content") if messages else ""
+    if isinstance(content, list):
+        content = " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return f"응답: {content}"
+
+
+class StubLLMServer:
+    def __init__(
+        self,
+        *,
+        latency: float = 0.2,
+        token_delay: float = 0.01,
+        reply=echo_reply,
+        slots: Optional[int] = None,
+        max_queue: Optional[int] = None,
+    ):
+        self.latency = latency
+        self.token_delay = token_delay
+        self.reply = reply
+        self.slots = slots
+        # slots 가 모두 찼을 때 기다릴 수 있는 요청 수. 넘치면 503 + Retry-After (과부하 서버 흉내)
+        self.max_queue = max_queue
+        self.semaphore: Optional[asyncio.Semaphore] = None
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.rejected = 0
+
+    def snapshot(self) -> dict:
+        return {
+            "requests": self.requests,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "rejected": self.rejected,
+        }
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            # keep-alive 연결에서 요청을 차례로 처리
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode().split(" ", 2)
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    key, _, value = line.decode().partition(":")
+                    headers[key.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                await self.route(method, path.split("?")[0], body, writer)
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            # 클라이언트가 끊었거나 서버를 멈추는 중
+            pass
+        finally:
+            writer.close()
+
+    async def route(self, method: str, path: str, body: bytes, writer: asyncio.StreamWriter) -> None:
+        if method == "GET" and path.endswith("/stats"):
+            await self.send_json(writer, self.snapshot())
+        elif method == "GET" and path.endswith("/models"):
+            await self.send_json(writer, {"object": "list", "data": [{"id": "stub", "object": "model"}]})
+        elif method == "POST" and path.endswith("/chat/completions"):
+            if self.max_queue is not None and self.slots and self.in_flight >= self.slots + self.max_queue:
+                self.rejected += 1
+                await self.send_json(
+                    writer, {"error": {"message": "server overloaded"}},
+                    status="503 Service Unavailable", headers={"Retry-After": "1"},
+                )
+                return
+            self.requests += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            try:
+                if self.semaphore is None:
+                    await self.chat_completion(json.loads(body), writer)
+                else:
+                    async with self.semaphore:
+                        await self.chat_completion(json.loads(body), writer)
+            finally:
+                self.in_flight -= 1
+        else:
+            await self.send_json(writer, {"error": {"message": "not found"}}, status="404 Not Found")
+
+    async def chat_completion(self, payload: dict, writer: asyncio.StreamWriter) -> None:
+        await asyncio.sleep(self.latency)
+        text = self.reply(payload.get("messages", []))
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        model = payload.get("model", "stub")
+        prompt_tokens = sum(len(str(m.get("content", "")).split()) for m in payload.get("messages", []))
+        completion_tokens = len(text.split())
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+        if not payload.get("stream"):
+            await self.send_json(
+                writer,
+                {
+                    "id": completion_id,
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {"role": "assistant", "content": text},
+                            "finish_reason": "stop",
+                        }
+                    ],
+                    "usage": usage,
+                },
+            )
+            return
+
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+            b"Cache-Control: no-cache\r\nTransfer-Encoding: chunked\r\n\r\n"
+        )
+
+        async def send_event(data: str) -> None:
+            chunk = f"data: {data}\n\n".encode()
+            writer.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+            await writer.drain()
+
+        def delta_chunk(delta: dict, finish_reason=None) -> str:
+            return json.dumps(
+                {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+                },
+                ensure_ascii=False,
+            )
+
+        await send_event(delta_chunk({"role": "assistant", "content": ""}))
+        for i, token in enumerate(text.split(" ")):
+            await send_event(delta_chunk({"content": token if i == 0 else " " + token}))
+            await asyncio.sleep(self.token_delay)
+        await send_event(delta_chunk({}, "stop"))
+        await send_event("[DONE]")
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    async def send_json(
+        self, writer: asyncio.StreamWriter, payload: dict, status: str = "200 OK", headers: Optional[dict] = None
+    ) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode()
+        extra = "".join(f"{key}: {value}\r\n" for key, value in (headers or {}).items())
+        writer.write(
+            f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n{extra}"
+            f"Content-Length: {len(body)}\r\n\r\n".encode()
+            + body
+        )
+        await writer.drain()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 1234, started=None) -> None:
+        if self.slots:
+            self.semaphore = asyncio.Semaphore(self.slots)
+        server = await asyncio.start_server(self.handle, host, port, backlog=4096)
+        if started is not None:
+            started(server.sockets[0].getsockname()[1])
+        async with server:
+            await server.serve_forever()
+
+
+def start_in_thread(port: int = 0, **kwargs):
+    """백그라운드 스레드에서 스텁 서버를 띄우고 (base_url, stop 함수, 서버 객체)를 반환"""
+    stub = StubLLMServer(**kwargs)
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+    bound = {}
+
+    def started(actual_port):
+        bound["port"] = actual_port
+        ready.set()
+
+    def run():
+        asyncio.set_event_loop(loop)
+        task = loop.create_task(stub.serve(port=port, started=started))
+        try:
+            loop.run_until_complete(task)
+        except asyncio.CancelledError:
+            pass
+
+    thread = threading.Thread(target=run, name="stub-llm-server", daemon=True)
+    thread.start()
+    ready.wait()
+
+    def stop():
+        for task in asyncio.all_tasks(loop):
+            loop.call_soon_threadsafe(task.cancel)
+        thread.join(timeout=5)
+
+    return f"http://127.0.0.1:{bound['port']}/v1", stop, stub
+
+
+class RemoteStats:
+    """별도 프로세스에서 도는 스텁 서버의 통계를 /v1/stats 로 읽어 옴"""
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+
+    def snapshot(self) -> dict:
+        with urllib.request.urlopen(f"{self.base_url}/stats") as response:
+            return json.loads(response.read())
+
+    @property
+    def requests(self) -> int:
+        return self.snapshot()["requests"]
+
+    @property
+    def max_in_flight(self) -> int:
+        return self.snapshot()["max_in_flight"]
+
+
+def _serve_process(port: int, kwargs: dict) -> None:
+    asyncio.run(StubLLMServer(**kwargs).serve(port=port))
+
+
+def start_in_process(port: int = 0, **kwargs):
+    """별도 프로세스에서 스텁 서버를 띄움 (벤치마크 대상과 GIL 을 나눠 쓰지 않도록).
+
+    start_in_thread 와 같은 (base_url, stop 함수, 통계 객체)를 반환합니다.
+    reply 는 fork 로 넘어가므로 모듈 수준 함수여야 합니다.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        pass
+    else:
+        # 실행 중인 루프 상태까지 fork 되면 자식 프로세스에서 asyncio.run 이 실패함
+        raise RuntimeError("start_in_process 는 이벤트 루프 밖에서 호출해야 합니다")
+    if port == 0:
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            port = probe.getsockname()[1]
+    process = multiprocessing.get_context("fork").Process(
+        target=_serve_process, args=(port, kwargs), name="stub-llm-server", daemon=True
+    )
+    process.start()
+    base_url = f"http://127.0.0.1:{port}/v1"
+    deadline = time.monotonic() + 10
+    while True:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.1):
+                break
+        except OSError:
+            if not process.is_alive() or time.monotonic() > deadline:
+                raise RuntimeError(f"스텁 서버를 시작하지 못했습니다 (port={port})")
+            time.sleep(0.01)
+
+    def stop():
+        process.terminate()
+        process.join(timeout=5)
+
+    return base_url, stop, RemoteStats(base_url)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=1234)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--token-delay", type=float, default=0.01)
+    parser.add_argument("--slots", type=int, default=None, help="동시에 처리할 요청 수")
+    parser.add_argument("--max-queue", type=int, default=None, help="slots 가 찼을 때 기다릴 수 있는 요청 수 (넘으면 503)")
+    parser.add_argument("--reply", default=None, help="항상 이 문자열로 응답 (예: FINISH)")
+    args = parser.parse_args()
+
+    reply = (lambda messages: args.reply) if args.reply else echo_reply
+    stub = StubLLMServer(
+        latency=args.latency, token_delay=args.token_delay, reply=reply, slots=args.slots,
+        max_queue=args.max_queue,
+    )
+    print(f"스텁 LLM 서버: http://127.0.0.1:{args.port}/v1")
+    asyncio.run(stub.serve(port=args.port))
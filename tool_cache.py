@@ -0,0 +1,229 @@
+import ast
+import functools
+import hashlib
+import inspect
+import json
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Callable, Optional
+
+# @tool 함수 결과 캐시
+#
+#   @tool
+#   @cached_tool(ttl=600, normalize={"location": casefold})
+#   def get_current_weather(location: str) -> str:
+#       ...
+#
+# 캐시 키는 (도구 이름, 정규화된 인자) 의 해시입니다. "Seoul", " seoul " 처럼 표기만 다른
+# 인자는 같은 키가 됩니다. 기본 저장소는 프로세스 내 LRU(MemoryBackend)이고,
+# 여러 워커가 결과를 공유하려면 SqliteBackend("tool-cache.db") 를 넘깁니다.
+
+# 도구 이름 -> {"hits", "misses", "expired", "evictions"}
+STATS: defaultdict[str, dict[str, int]] = defaultdict(
+    lambda: {"hits": 0, "misses": 0, "expired": 0, "evictions": 0}
+)
+_stats_lock = threading.Lock()
+
+
+def _count(tool_name: str, field: str, n: int = 1) -> None:
+    with _stats_lock:
+        STATS[tool_name][field] += n
+
+
+def cache_stats() -> dict[str, dict[str, Any]]:
+    """도구별 캐시 적중/미스 통계와 적중률"""
+    with _stats_lock:
+        return {
+            name: {
+                **stats,
+                "hit_rate": stats["hits"] / max(1, stats["hits"] + stats["misses"]),
+            }
+            for name, stats in STATS.items()
+        }
+
+
+# 인자 정규화 함수
+def casefold(value: str) -> str:
+    """대소문자와 앞뒤/중복 공백 차이를 없앰 ("  Seoul " -> "seoul")"""
+    return " ".join(value.split()).casefold()
+
+
+def canonical_expression(value: str) -> str:
+    """수식을 파싱해서 표준 형태로 ("2+2", "2 + 2", "(2+2)" -> "2 + 2")"""
+    try:
+        return ast.unparse(ast.parse(value.strip(), mode="eval"))
+    except SyntaxError:
+        return "".join(value.split())
+
+
+class MemoryBackend:
+    """프로세스 내 LRU 캐시 (max_size 개를 넘으면 가장 오래 쓰지 않은 항목부터 삭제)"""
+
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self.entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: str) -> tuple[bool, Any, bool]:
+        """(찾음 여부, 값, 만료 여부) 반환"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return False, None, False
+            if entry[0] < time.time():
+                del self.entries[key]
+                return False, None, True
+            self.entries.move_to_end(key)
+            return True, entry[1], False
+
+    def set(self, key: str, value: Any, ttl: float) -> int:
+        """값을 저장하고 밀려난 항목 수를 반환"""
+        with self.lock:
+            self.entries[key] = (time.time() + ttl, value)
+            self.entries.move_to_end(key)
+            evicted = 0
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                evicted += 1
+            return evicted
+
+
+class SqliteBackend:
+    """여러 프로세스가 함께 쓰는 SQLite 캐시 (WAL 모드, last_used 기준 LRU).
+
+    항목 수 세기(COUNT(*) 는 테이블 전체를 훑음)와 정리는 evict_every 번 저장할 때마다 한 번만 하므로
+    프로세스마다 최대 evict_every 개까지 max_size 를 넘을 수 있습니다 (기본: max_size 의 1%).
+    """
+
+    def __init__(self, path: str = "tool-cache.db", max_size: int = 100_000, evict_every: Optional[int] = None):
+        self.path = path
+        self.max_size = max_size
+        self.evict_every = evict_every or max(1, max_size // 100)
+        self.writes = 0
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.lock = threading.Lock()
+        with self.lock:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            # 다른 워커가 쓰는 중이면 잠깐 기다렸다가 재시도
+            self.conn.execute("PRAGMA busy_timeout=5000")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS tool_cache ("
+                "key TEXT PRIMARY KEY, value BLOB, expires_at REAL, last_used REAL)"
+            )
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS tool_cache_last_used ON tool_cache (last_used)"
+            )
+
+    def get(self, key: str) -> tuple[bool, Any, bool]:
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT value, expires_at FROM tool_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return False, None, False
+            if row[1] < now:
+                self.conn.execute("DELETE FROM tool_cache WHERE key = ?", (key,))
+                return False, None, True
+            self.conn.execute("UPDATE tool_cache SET last_used = ? WHERE key = ?", (now, key))
+        return True, pickle.loads(row[0]), False
+
+    def set(self, key: str, value: Any, ttl: float) -> int:
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO tool_cache VALUES (?, ?, ?, ?)",
+                (key, pickle.dumps(value), now + ttl, now),
+            )
+            self.writes += 1
+            if self.writes < self.evict_every:
+                return 0
+            self.writes = 0
+            count = self.conn.execute("SELECT COUNT(*) FROM tool_cache").fetchone()[0]
+            if count <= self.max_size:
+                return 0
+            # 만료된 항목을 먼저 지우고, 그래도 넘치면 오래 쓰지 않은 순서로 삭제
+            count -= self.conn.execute("DELETE FROM tool_cache WHERE expires_at < ?", (now,)).rowcount
+            if count <= self.max_size:
+                return 0
+            return self.conn.execute(
+                "DELETE FROM tool_cache WHERE key IN ("
+                "SELECT key FROM tool_cache ORDER BY last_used LIMIT ?)",
+                (count - self.max_size,),
+            ).rowcount
+
+
+_default_backend = MemoryBackend()
+
+
+def cached_tool(
+    ttl: float = 300.0,
+    *,
+    normalize: Optional[dict[str, Callable[[Any], Any]]] = None,
+    backend=None,
+    name: Optional[str] = None,
+):
+    """@tool 아래에 붙여서 같은 인자로 다시 호출할 때 저장된 결과를 돌려주는 데코레이터.
+
+    ttl 은 도구마다 따로 지정하고, normalize 는 인자 이름 -> 정규화 함수 매핑입니다.
+    functools.wraps 로 시그니처와 docstring 을 그대로 유지하므로 @tool 의 스키마 생성에
+    영향을 주지 않습니다. async def 도구는 코루틴이 아니라 await 한 결과를 저장합니다.
+    """
+    normalize = normalize or {}
+
+    def decorator(func):
+        signature = inspect.signature(func)
+        tool_name = name or func.__name__
+        store = backend or _default_backend
+
+        def make_key(args, kwargs) -> str:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            canonical = {
+                k: normalize[k](v) if k in normalize else v for k, v in bound.arguments.items()
+            }
+            payload = json.dumps([tool_name, canonical], sort_keys=True, default=repr)
+            return hashlib.sha256(payload.encode()).hexdigest()
+
+        def lookup(key: str) -> tuple[bool, Any]:
+            found, value, expired = store.get(key)
+            if found:
+                _count(tool_name, "hits")
+                return True, value
+            _count(tool_name, "misses")
+            if expired:
+                _count(tool_name, "expired")
+            return False, None
+
+        def save(key: str, value: Any) -> Any:
+            if evicted := store.set(key, value, ttl):
+                _count(tool_name, "evictions", evicted)
+            return value
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def awrapper(*args, **kwargs):
+                key = make_key(args, kwargs)
+                found, value = lookup(key)
+                if found:
+                    return value
+                return save(key, await func(*args, **kwargs))
+
+            return awrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = make_key(args, kwargs)
+            found, value = lookup(key)
+            if found:
+                return value
+            return save(key, func(*args, **kwargs))
+
+        return wrapper
+
+    return decorator
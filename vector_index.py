@@ -0,0 +1,377 @@
+import os
+import sqlite3
+import threading
+from typing import Any, Callable, Optional, Sequence
+
+from llm_cache import SentenceTransformerEmbedder
+
+# 디스크에 저장되는 FAISS 벡터 검색 인덱스
+#
+#   index = VectorIndex("rag-index")
+#   index.load_async()                    # 그래프를 컴파일하는 동안 백그라운드에서 로딩
+#   index.search("LangGraph란?", k=4)     # [{"id", "text", "source", "page", "score"}, ...]
+#
+# 디렉터리 구성
+#   faiss.index  IVF(기본) 또는 HNSW 인덱스 (문서가 수백 개 이하면 Flat). 검색 전용으로 열 때는 mmap 으로 매핑해서
+#                벡터를 RAM 에 올리지 않고 OS 페이지 캐시를 그대로 씀
+#   chunks.db    청크 본문 (id = faiss 안의 순번)
+#   untrained.f32  IVF 학습에 필요한 양이 모이기 전까지 쌓아 두는 벡터 (메모리에는 학습용 표본만 둠)
+# 벡터는 정규화된 임베딩이고 내적(= 코사인 유사도)으로 검색합니다.
+
+INDEX_FILE = "faiss.index"
+CHUNKS_FILE = "chunks.db"
+UNTRAINED_FILE = "untrained.f32"
+# untrained.f32 머리말: [차원, 마지막 save() 때의 벡터 수] (그 뒤에 붙은 벡터는 다시 열 때 버림)
+SPILL_HEADER = 16
+SPILL_CHUNK = 65536
+
+# 아직 문서를 넣지 않은 인덱스를 처음 만들 때 쓰는 예시 문서
+EXAMPLE_DOCUMENTS = [
+    "LangGraph는 LLM 애플리케이션의 상태 관리에 유용한 라이브러리입니다.",
+    "LangGraph에서는 노드와 엣지로 그래프를 정의합니다.",
+    "조건부 엣지(add_conditional_edges)는 조건 함수의 반환값에 따라 다음 노드를 고릅니다.",
+    "체크포인터를 연결하면 그래프 상태가 스레드별로 저장되어 대화를 이어갈 수 있습니다.",
+    "interrupt_before 로 지정한 노드 앞에서 그래프를 멈추고 사람의 확인을 받을 수 있습니다.",
+    "Send 를 사용하면 같은 노드를 여러 입력으로 동시에 실행하는 map-reduce 를 만들 수 있습니다.",
+    "상태의 채널에 operator.add 같은 reducer 를 지정하면 노드의 반환값이 누적됩니다.",
+    "stream_mode='values' 로 스트리밍하면 스텝마다 전체 상태를 받을 수 있습니다.",
+]
+
+
+class VectorIndex:
+    def __init__(
+        self,
+        path: str = "rag-index",
+        *,
+        embed: Optional[Callable[[list[str]], Any]] = None,
+        kind: str = "ivf",
+        nlist: int = 4096,
+        hnsw_m: int = 32,
+        nprobe: int = 16,
+        ef_search: int = 64,
+        train_memory_mb: float = 64,
+        writable: bool = False,
+    ):
+        if kind not in ("ivf", "hnsw"):
+            raise ValueError(f"kind 는 'ivf' 또는 'hnsw' 여야 합니다: {kind!r}")
+        self.path = path
+        self.embed = embed or SentenceTransformerEmbedder()
+        self.kind = kind
+        self.nlist = nlist
+        self.hnsw_m = hnsw_m
+        self.nprobe = nprobe
+        self.ef_search = ef_search
+        self.train_memory_mb = train_memory_mb
+        self.writable = writable
+        self.index = None
+        # IVF 는 학습(train) 전에는 추가할 수 없으므로 학습에 쓸 만큼 모일 때까지 디스크에 쌓아 두고,
+        # 메모리에는 train_memory_mb 안에 들어가는 만큼만 균등 표본(reservoir sampling)으로 들고 있음
+        self.spill = None
+        self.spilled = 0
+        self.sample = None
+        self.rng = None
+        self.opened_for_write = False
+        self.lock = threading.RLock()
+        self.loader: Optional[threading.Thread] = None
+        self.load_error: Optional[BaseException] = None
+        os.makedirs(path, exist_ok=True)
+        self.conn = sqlite3.connect(
+            os.path.join(path, CHUNKS_FILE), check_same_thread=False, isolation_level=None
+        )
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            "id INTEGER PRIMARY KEY, text TEXT, source TEXT, page INTEGER)"
+        )
+
+    @property
+    def index_path(self) -> str:
+        return os.path.join(self.path, INDEX_FILE)
+
+    def exists(self) -> bool:
+        return os.path.exists(self.index_path)
+
+    # 로딩
+    def load(self) -> None:
+        import faiss
+
+        with self.lock:
+            if self.index is not None or not self.exists():
+                return
+            # 검색 전용이면 mmap, 추가까지 하려면 메모리에 읽어 들임
+            flags = 0 if self.writable else faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+            index = faiss.read_index(self.index_path, flags)
+            self._configure(index)
+            self.index = index
+
+    def load_async(self) -> None:
+        """백그라운드 스레드에서 로딩 시작 (첫 검색이 끝날 때까지 기다림)"""
+
+        def run():
+            try:
+                self.load()
+            except BaseException as e:
+                self.load_error = e
+
+        with self.lock:
+            if self.loader is None and self.index is None:
+                self.loader = threading.Thread(target=run, name="vector-index-load", daemon=True)
+                self.loader.start()
+
+    def _wait_loaded(self) -> None:
+        if self.loader is not None:
+            self.loader.join()
+            if self.load_error is not None:
+                raise self.load_error
+        if self.index is None:
+            self.load()
+
+    def _configure(self, index) -> None:
+        import faiss
+
+        if isinstance(index, faiss.IndexIVF):
+            index.nprobe = self.nprobe
+        elif isinstance(index, faiss.IndexHNSW):
+            index.hnsw.efSearch = self.ef_search
+
+    def _new_index(self, dim: int, n_train: int):
+        import faiss
+
+        if self.kind == "hnsw":
+            return faiss.IndexHNSWFlat(dim, self.hnsw_m, faiss.METRIC_INNER_PRODUCT)
+        # 클러스터마다 39개 이상의 학습 벡터가 있어야 하므로 데이터가 적으면 nlist 를 줄이고,
+        # 클러스터를 16개도 못 만들 만큼 적으면 전수 검색(Flat)으로 충분함
+        nlist = min(self.nlist, n_train // 39)
+        if nlist < 16:
+            return faiss.IndexFlatIP(dim)
+        return faiss.IndexIVFFlat(
+            faiss.IndexFlatIP(dim), dim, nlist, faiss.METRIC_INNER_PRODUCT
+        )
+
+    # 추가
+    def open_for_write(self) -> None:
+        """디스크의 인덱스를 메모리로 읽고, 학습 대기 벡터는 표본만 다시 뽑아서 추가할 수 있게 함"""
+        import numpy as np
+
+        with self.lock:
+            if self.opened_for_write:
+                return
+            if self.index is not None and not self.writable:
+                raise RuntimeError("검색 전용(mmap)으로 연 인덱스에는 추가할 수 없습니다 (writable=True)")
+            self.writable = True
+            self.load()
+            spill_path = os.path.join(self.path, UNTRAINED_FILE)
+            if os.path.exists(spill_path):
+                self.spill = open(spill_path, "r+b")
+                dim, rows = np.frombuffer(self.spill.read(SPILL_HEADER), dtype=np.int64)
+                # 마지막 save() 이후에 붙은 벡터는 chunks.db 에서도 지워지므로 버림
+                self.spill.truncate(SPILL_HEADER + int(rows) * int(dim) * 4)
+                self._new_sample(int(dim))
+                for chunk in self._read_spill(int(dim), int(rows)):
+                    self._add_sample(chunk)
+                    self.spilled += len(chunk)
+            self.opened_for_write = True
+
+    def _new_sample(self, dim: int) -> None:
+        import numpy as np
+
+        # 학습에 필요한 양(nlist * 39)과 메모리 예산 중 작은 쪽만큼
+        size = max(1, min(self.nlist * 39, int(self.train_memory_mb * 2**20) // (4 * dim)))
+        self.sample = np.empty((size, dim), dtype=np.float32)
+        self.rng = np.random.default_rng(0)
+
+    def _add_sample(self, vectors) -> None:
+        """지금까지 쌓인 spilled 개 다음에 오는 vectors 를 표본에 반영"""
+        import numpy as np
+
+        size = len(self.sample)
+        filled = min(self.spilled, size)
+        take = min(size - filled, len(vectors))
+        self.sample[filled:filled + take] = vectors[:take]
+        rest = vectors[take:]
+        if len(rest):
+            # reservoir sampling: t 번째(0부터) 벡터는 size / (t + 1) 확률로 표본의 임의의 한 자리를 대신함
+            positions = self.spilled + take + np.arange(len(rest))
+            slots = self.rng.integers(0, positions + 1)
+            keep = slots < size
+            self.sample[slots[keep]] = rest[keep]
+
+    def _spill(self, vectors) -> None:
+        import numpy as np
+
+        if self.spill is None:
+            self.spill = open(os.path.join(self.path, UNTRAINED_FILE), "w+b")
+            self.spill.write(np.array([vectors.shape[1], 0], dtype=np.int64).tobytes())
+            self._new_sample(vectors.shape[1])
+        self.spill.seek(0, os.SEEK_END)
+        self.spill.write(vectors.tobytes())
+        self._add_sample(vectors)
+        self.spilled += len(vectors)
+
+    def _read_spill(self, dim: int, rows: int):
+        import numpy as np
+
+        self.spill.flush()
+        self.spill.seek(SPILL_HEADER)
+        for start in range(0, rows, SPILL_CHUNK):
+            count = min(SPILL_CHUNK, rows - start)
+            yield np.frombuffer(self.spill.read(count * dim * 4), dtype=np.float32).reshape(count, dim)
+
+    def _train(self, force: bool = False) -> None:
+        if not self.spilled:
+            return
+        if not force and self.spilled < self.nlist * 39:
+            # 인덱스 종류와 nlist 는 학습 데이터 양으로 정해지므로 충분히 모일 때까지 미룸
+            return
+        dim = self.sample.shape[1]
+        sample = self.sample[: min(self.spilled, len(self.sample))]
+        if self.index is None:
+            self.index = self._new_index(dim, len(sample))
+            self._configure(self.index)
+        if not self.index.is_trained:
+            self.index.train(sample)
+        for chunk in self._read_spill(dim, self.spilled):
+            self.index.add(chunk)
+        # 파일은 save() 가 인덱스를 쓰기 직전에 지움 (그 전에 멈추면 다시 열 때 학습 대기 벡터로 남음)
+        self.spilled = 0
+        self.sample = None
+
+    def add_vectors(self, vectors, texts: Sequence[str], metadatas: Optional[Sequence[dict]] = None) -> list[int]:
+        """임베딩과 본문을 이어 붙이고 부여된 id 목록을 반환 (save() 를 불러야 디스크에 기록됨)"""
+        import numpy as np
+
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        metadatas = metadatas or [{}] * len(texts)
+        with self.lock:
+            self.open_for_write()
+            start = self.count()
+            ids = list(range(start, start + len(texts)))
+            self.conn.execute("BEGIN")
+            try:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO chunks VALUES (?, ?, ?, ?)",
+                    [
+                        (i, text, meta.get("source"), meta.get("page"))
+                        for i, text, meta in zip(ids, texts, metadatas)
+                    ],
+                )
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            if self.index is not None and self.index.is_trained:
+                self.index.add(vectors)
+            elif self.kind == "ivf":
+                self._spill(vectors)
+                self._train()
+            else:
+                self.index = self._new_index(vectors.shape[1], len(vectors))
+                self._configure(self.index)
+                self.index.add(vectors)
+            return ids
+
+    def add_texts(self, texts: Sequence[str], metadatas: Optional[Sequence[dict]] = None) -> list[int]:
+        return self.add_vectors(self.embed(list(texts)), texts, metadatas)
+
+    def count(self) -> int:
+        """인덱스에 들어간 벡터 수 (학습 대기 중인 벡터 포함)"""
+        with self.lock:
+            indexed = 0 if self.index is None else self.index.ntotal
+            return indexed + self.spilled
+
+    def save(self, train: bool = True) -> None:
+        """디스크에 기록. train=False 면 IVF 학습에 쓸 벡터가 덜 모였을 때 학습을 미루고
+        대기 중인 벡터 수를 untrained.f32 에 확정 (중간 체크포인트용)"""
+        import faiss
+        import numpy as np
+
+        with self.lock:
+            self.open_for_write()
+            self._train(force=train)
+            # 중단되더라도 같은 벡터가 인덱스와 untrained.f32 양쪽에 남지 않는 순서로 기록
+            # (대기 벡터가 남는 경우는 인덱스가 아직 만들어지지 않았을 때뿐)
+            if not self.spilled and self.spill is not None:
+                self.spill.close()
+                self.spill = None
+                os.remove(os.path.join(self.path, UNTRAINED_FILE))
+            if self.index is not None:
+                # 쓰는 도중 중단돼도 기존 파일이 깨지지 않도록 임시 파일에 쓴 뒤 교체
+                tmp = self.index_path + ".tmp"
+                faiss.write_index(self.index, tmp)
+                os.replace(tmp, self.index_path)
+            if self.spilled:
+                self.spill.flush()
+                os.fsync(self.spill.fileno())
+                self.spill.seek(0)
+                self.spill.write(np.array([self.sample.shape[1], self.spilled], dtype=np.int64).tobytes())
+                self.spill.flush()
+                os.fsync(self.spill.fileno())
+            # 인덱스보다 앞서 기록된 청크(중단된 추가)는 버림
+            self.conn.execute("DELETE FROM chunks WHERE id >= ?", (self.count(),))
+
+    # 검색
+    def search_vectors(self, vectors, k: int = 4):
+        import numpy as np
+
+        self._wait_loaded()
+        if self.index is None or self.index.ntotal == 0:
+            n = len(vectors)
+            return np.zeros((n, 0), dtype=np.float32), np.zeros((n, 0), dtype=np.int64)
+        return self.index.search(np.ascontiguousarray(vectors, dtype=np.float32), k)
+
+    def fetch(self, ids: Sequence[int]) -> dict[int, tuple]:
+        ids = [int(i) for i in ids if i >= 0]
+        if not ids:
+            return {}
+        placeholders = ",".join("?" * len(ids))
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT id, text, source, page FROM chunks WHERE id IN ({placeholders})", ids
+            ).fetchall()
+        return {row[0]: row[1:] for row in rows}
+
+    def search(self, query: str, k: int = 4, min_score: Optional[float] = None) -> list[dict]:
+        """질문과 가까운 청크 k 개 (min_score 보다 유사도가 낮은 결과는 제외)"""
+        scores, ids = self.search_vectors(self.embed([query]), k)
+        rows = self.fetch(ids[0])
+        results = []
+        for score, i in zip(scores[0], ids[0]):
+            if i < 0 or i not in rows or (min_score is not None and score < min_score):
+                continue
+            text, source, page = rows[i]
+            results.append(
+                {"id": int(i), "text": text, "source": source, "page": page, "score": float(score)}
+            )
+        return results
+
+
+def open_index(path: str = "rag-index", *, seed_texts: Sequence[str] = EXAMPLE_DOCUMENTS, **kwargs) -> VectorIndex:
+    """검색용 인덱스를 열고, 아직 없으면 seed_texts 로 새로 만듦"""
+    index = VectorIndex(path, **kwargs)
+    if not index.exists() and seed_texts:
+        writer = VectorIndex(path, **{**kwargs, "embed": index.embed, "writable": True})
+        writer.add_texts(list(seed_texts), [{"source": "example"}] * len(seed_texts))
+        writer.save()
+    return index
+
+
+def retrieval_node(
+    index: VectorIndex,
+    *,
+    k: int = 4,
+    min_score: Optional[float] = None,
+    query_key: str = "query",
+    output_key: str = "documents",
+):
+    """state[query_key] 로 검색해서 본문 목록을 state[output_key] 에 넣는 노드 함수.
+
+    노드를 만드는 시점(그래프 구성/컴파일 시점)에 인덱스 로딩을 백그라운드로 시작합니다.
+    """
+    index.load_async()
+
+    def retrieve(state: dict) -> dict:
+        results = index.search(state[query_key], k=k, min_score=min_score)
+        return {output_key: [result["text"] for result in results]}
+
+    return retrieve
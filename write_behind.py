@@ -0,0 +1,248 @@
+import asyncio
+import threading
+from collections.abc import Iterator, Sequence
+from contextlib import nullcontext
+from typing import Any, Optional
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+)
+from langgraph.checkpoint.serde.types import ERROR, INTERRUPT
+
+from checkpoint_policy import BoundaryDetector
+
+
+class WriteBehindSaver(BaseCheckpointSaver):
+    """put / put_writes 를 큐에 넣고 바로 돌아오는 write-behind 체크포인터 래퍼.
+
+    백그라운드 스레드가 큐에 쌓인 체크포인트를 모아서 inner 저장소에 한 트랜잭션으로
+    씁니다(inner 가 SqliteSaver 처럼 `transaction()` 을 제공하는 경우). 덕분에
+    노드와 노드 사이에서 저장소 지연을 기다리지 않습니다.
+
+    그래프가 멈추는 지점(종료, interrupt_before / interrupt_after 노드, 노드 안의
+    interrupt(), 에러, update_state)의 체크포인트는 큐가 비워질 때까지 기다린 뒤
+    반환하므로, 그래프가 멈춰 있을 때는 재개 가능한 체크포인트가 항상 저장돼 있습니다.
+    조회(get_state 등)도 큐를 먼저 비운 뒤 inner 저장소에서 읽습니다.
+
+    큐에는 최대 max_queue 개까지만 쌓이고, 저장소가 그래프보다 느리면 put 이 자리가 날 때까지
+    기다립니다. 한 트랜잭션이 실패하면 그 묶음을 하나씩 다시 써서 나머지는 저장하고,
+    끝내 저장하지 못한 항목은 failed 에 남깁니다. 그 뒤로는 close() 할 때까지 모든 호출이
+    같은 오류를 냅니다 (저장되지 않은 체크포인트 위에서 그래프가 계속 돌지 않도록).
+
+        WriteBehindSaver(SqliteSaver("interrupt.db"), interrupt_before=["step_2"])
+    """
+
+    def __init__(
+        self,
+        inner: BaseCheckpointSaver,
+        *,
+        max_batch: int = 256,
+        max_queue: int = 10_000,
+        interrupt_before: Sequence[str] = (),
+        interrupt_after: Sequence[str] = (),
+    ) -> None:
+        super().__init__(serde=inner.serde)
+        self.inner = inner
+        self.max_batch = max_batch
+        self.max_queue = max_queue
+        self.is_boundary = BoundaryDetector(interrupt_before, interrupt_after)
+        self.queue: list[tuple] = []
+        self.in_flight = 0
+        self.error: Optional[BaseException] = None
+        self.failed: list[tuple[str, tuple, BaseException]] = []
+        self.closed = False
+        self.cond = threading.Condition()
+        self.worker = threading.Thread(target=self._run, name="checkpoint-writer", daemon=True)
+        self.worker.start()
+
+    def get_next_version(self, current, channel):
+        return self.inner.get_next_version(current, channel)
+
+    def _run(self) -> None:
+        transaction = getattr(self.inner, "transaction", nullcontext)
+        while True:
+            with self.cond:
+                while not self.queue and not self.closed:
+                    self.cond.wait()
+                if not self.queue and self.closed:
+                    return
+                batch = self.queue[: self.max_batch]
+                del self.queue[: self.max_batch]
+                self.in_flight = len(batch)
+                self.cond.notify_all()  # 큐에 자리가 남
+            try:
+                # 모인 체크포인트를 한 트랜잭션으로 기록
+                with transaction():
+                    for method, args in batch:
+                        getattr(self.inner, method)(*args)
+            except Exception:
+                # 묶음 전체가 롤백됨: 하나씩 다시 써서 문제가 된 항목만 실패로 남김
+                for method, args in batch:
+                    try:
+                        getattr(self.inner, method)(*args)
+                    except Exception as e:
+                        with self.cond:
+                            self.failed.append((method, args, e))
+                            self.error = self.error or e
+            with self.cond:
+                self.in_flight = 0
+                self.cond.notify_all()
+
+    def _raise_error(self) -> None:
+        # close() 할 때까지 계속 알림 (한 번 알리고 지우면 이후 호출자는 유실을 모름)
+        if self.error is not None:
+            raise RuntimeError(
+                f"{len(self.failed)} checkpoint write(s) failed, see WriteBehindSaver.failed"
+            ) from self.error
+
+    def _try_enqueue(self, method: str, args: tuple) -> bool:
+        """큐에 자리가 있으면 넣고 True, 가득 찼으면 False (self.cond 를 잡은 상태에서 호출)"""
+        self._raise_error()
+        if self.closed:
+            raise RuntimeError("WriteBehindSaver is closed")
+        if len(self.queue) >= self.max_queue:
+            return False
+        self.queue.append((method, args))
+        self.cond.notify_all()
+        return True
+
+    def _enqueue(self, method: str, *args) -> None:
+        with self.cond:
+            while not self._try_enqueue(method, args):
+                self.cond.wait()
+
+    def _wait_for_room(self) -> None:
+        with self.cond:
+            while len(self.queue) >= self.max_queue and self.error is None and not self.closed:
+                self.cond.wait()
+
+    async def _aenqueue(self, method: str, *args) -> None:
+        # 큐가 가득 차면 이벤트 루프를 막지 않도록 자리가 날 때까지 스레드에서 기다림
+        while True:
+            with self.cond:
+                if self._try_enqueue(method, args):
+                    return
+            await asyncio.to_thread(self._wait_for_room)
+
+    def flush(self) -> None:
+        """큐에 쌓인 체크포인트가 모두 저장될 때까지 기다립니다."""
+        with self.cond:
+            while self.queue or self.in_flight:
+                self.cond.wait()
+            self._raise_error()
+
+    async def aflush(self) -> None:
+        """flush 의 비동기 버전. 기다릴 것이 있을 때만 스레드로 넘겨 이벤트 루프를 막지 않습니다."""
+        with self.cond:
+            if not self.queue and not self.in_flight:
+                self._raise_error()
+                return
+        await asyncio.to_thread(self.flush)
+
+    def close(self) -> None:
+        """남은 큐를 모두 쓰고 멈춥니다. 저장하지 못한 항목이 있었으면 그 오류를 냅니다."""
+        with self.cond:
+            while self.queue or self.in_flight:
+                self.cond.wait()
+            self.closed = True
+            self.cond.notify_all()
+        self.worker.join()
+        self._raise_error()
+
+    def __enter__(self) -> "WriteBehindSaver":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        self._enqueue("put", config, checkpoint, metadata, new_versions)
+        result, boundary = self._put_result(config, checkpoint, metadata)
+        if boundary:
+            self.flush()
+        return result
+
+    def _put_result(self, config, checkpoint, metadata) -> tuple[RunnableConfig, bool]:
+        """큐에 넣은 체크포인트의 (반환할 config, 그래프가 멈추는 지점인지)"""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        result = {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+        return result, self.is_boundary((thread_id, checkpoint_ns), checkpoint, metadata)
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        self._enqueue("put_writes", config, list(writes), task_id, task_path)
+        if self._stops(writes):
+            self.flush()
+
+    @staticmethod
+    def _stops(writes) -> bool:
+        # 노드 안의 interrupt() 또는 에러로 그래프가 멈추는 지점
+        return any(channel in (INTERRUPT, ERROR) for channel, _ in writes)
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        self.flush()
+        return self.inner.get_tuple(config)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        self.flush()
+        yield from self.inner.list(config, filter=filter, before=before, limit=limit)
+
+    def delete_thread(self, thread_id: str) -> None:
+        self.flush()
+        self.inner.delete_thread(thread_id)
+
+    # 비동기 메서드: 큐에 자리가 없을 때, 큐를 비울 때, inner 를 읽을 때만 기다림
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        await self.aflush()
+        return await self.inner.aget_tuple(config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        await self.aflush()
+        async for item in self.inner.alist(config, filter=filter, before=before, limit=limit):
+            yield item
+
+    async def aput(self, config, checkpoint, metadata, new_versions) -> RunnableConfig:
+        await self._aenqueue("put", config, checkpoint, metadata, new_versions)
+        result, boundary = self._put_result(config, checkpoint, metadata)
+        if boundary:
+            await self.aflush()
+        return result
+
+    async def aput_writes(self, config, writes, task_id, task_path="") -> None:
+        await self._aenqueue("put_writes", config, list(writes), task_id, task_path)
+        if self._stops(writes):
+            await self.aflush()
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await self.aflush()
+        await self.inner.adelete_thread(thread_id)